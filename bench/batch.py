@@ -0,0 +1,42 @@
+from sleepy.asmik.argument import IMMEDIATE
+from sleepy.asmik.memory import Memory
+from sleepy.interpreter import AsmikInterpreter
+from sleepy.interpreter.batch import BatchInterpreter
+
+from .common import compiled, report, seconds, workload
+
+VARIANTS = 8
+
+
+def main() -> None:
+    # wide constants stay in data memory, so the code is same, and
+    # positive ones keep values in 64 bits, so the lanes are exact
+    wide = 1 << IMMEDIATE
+    units = [compiled(workload(200, wide + i)) for i in range(VARIANTS)]
+
+    retired = []
+    for unit in units:
+        reference = AsmikInterpreter()
+        reference.load(unit)
+        reference.run()
+        retired.append(reference.retired)
+
+    for lanes in (1, 16, 256, 4096):
+        inputs = [units[i % VARIANTS].memory for i in range(lanes)]
+        count = sum(retired[i % VARIANTS] for i in range(lanes))
+        interp = BatchInterpreter()
+
+        def setup(
+            interp: BatchInterpreter = interp,
+            inputs: list[Memory] = inputs,
+        ) -> None:
+            interp.load(units[0], inputs)
+
+        def run(interp: BatchInterpreter = interp) -> None:
+            interp.run()
+
+        report(f"batch x{lanes}", count, seconds(run, setup, repeat=3))
+
+
+if __name__ == "__main__":
+    main()
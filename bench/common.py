@@ -0,0 +1,54 @@
+from collections.abc import Callable
+from time import perf_counter
+
+from sleepy.asmik import AsmikUnit
+from sleepy.syntax import LarkParser, to_program
+from sleepy.tafka import TafkaUnit
+
+parser = LarkParser()
+
+
+def compiled(source: str) -> AsmikUnit:
+    syntax = parser.parse_program(source)
+    program = to_program(syntax)
+    tafka = TafkaUnit.emitted_from(program)
+    return AsmikUnit.emited_from(tafka)
+
+
+def workload(calls: int, start: int = 1) -> str:
+    """Straight-line program with a lot of calls and branches."""
+    source = f"""
+        (def step (lambda (a int b int)
+            (if (lt a b)
+                (sum (mul a 3) b)
+                (if (eq (rem a 2) 0)
+                    (div a 2)
+                    (rem a 7)))))
+        (def x0 {start})
+    """
+    for i in range(1, calls + 1):
+        source += f"(def x{i} (step x{i - 1} {i % 13}))\n"
+    source += f"x{calls}\n"
+    return source
+
+
+def seconds(
+    action: Callable[[], None],
+    setup: Callable[[], None] = lambda: None,
+    repeat: int = 20,
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = perf_counter()
+        action()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(  # noqa: T201
+        f"{name:>12}: {count:>9} instr, "
+        f"{elapsed * 1000:9.2f} ms, "
+        f"{count / elapsed / 1e6:7.3f} M instr/s",
+    )
@@ -0,0 +1,37 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from sleepy.interpreter import DispatchInterpreter, Image
+
+from .common import compiled, workload
+
+
+def main() -> None:
+    source = workload(2000)
+
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "image"
+
+        start = perf_counter()
+        unit = compiled(source)
+        recompiled = perf_counter() - start
+
+        Image.encoded(unit).save(path)
+
+        start = perf_counter()
+        Image.mapped(path).decoded()
+        mapped = perf_counter() - start
+
+        interp = DispatchInterpreter()
+        start = perf_counter()
+        interp.load_image(Image.mapped(path))
+        loaded = perf_counter() - start
+
+    print(f"recompile: {recompiled * 1000:9.2f} ms")  # noqa: T201
+    print(f"    image: {mapped * 1000:9.2f} ms")  # noqa: T201
+    print(f"     load: {loaded * 1000:9.2f} ms, image and bind")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
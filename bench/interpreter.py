@@ -0,0 +1,51 @@
+from functools import partial
+
+from sleepy.asmik import AsmikUnit
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    JitInterpreter,
+)
+
+from .common import compiled, report, seconds, workload
+
+
+def retired(unit: AsmikUnit) -> int:
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    interp.run()
+    return interp.retired
+
+
+def main() -> None:
+    unit = compiled(workload(2000))
+    count = retired(unit)
+
+    for name, interpreter in (
+        ("reference", AsmikInterpreter),
+        ("dispatch", partial(DispatchInterpreter, fuse=False)),
+        ("fused", DispatchInterpreter),
+        ("jit", JitInterpreter),
+    ):
+        interp = interpreter()
+
+        def setup(
+            interp: AsmikInterpreter | DispatchInterpreter = interp,
+        ) -> None:
+            interp.load(unit)
+
+        def run(
+            interp: AsmikInterpreter | DispatchInterpreter = interp,
+        ) -> None:
+            interp.run()
+
+        report(name, count, seconds(run, setup))
+
+    fused = DispatchInterpreter()
+    fused.load(unit)
+    fused.run()
+    print(fused.fusion.to_text(), end="")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
+from sleepy.asmik.allocation import (
+    Allocation,
+    Allocator,
+    GraphColoring,
+    LinearScan,
+)
 from sleepy.asmik.argument import Integer, Register
 from sleepy.asmik.data import IntegerData
 from sleepy.asmik.instruction import (
     Addi,
     Addim,
     Andb,
+    Blt,
+    Bne,
+    Branch,
     Brn,
+    Brni,
+    CompareBranch,
     Divi,
     Hlt,
     Instruction,
@@ -0,0 +1,364 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields, replace
+from typing import TypeGuard
+
+from sleepy.core import SleepyError
+
+from .argument import (
+    GENERAL,
+    Integer,
+    PhysicalRegister,
+    Register,
+    VirtualRegister,
+)
+from .data import IntegerData
+from .emit import AsmikEmitListener
+from .flow import Flow, defs_of, flows_of, uses_of, virtual
+from .instruction import Addim, Instruction, Load, Stor
+
+SCRATCH = 2
+"""Registers kept free to reload and store spilled registers."""
+
+
+@dataclass
+class Spills:
+
+    """Cost of register allocation in a single procedure."""
+
+    registers: int = 0
+    """Physical registers used."""
+    spilled: int = 0
+    """Virtual registers kept in memory."""
+    loads: int = 0
+    stores: int = 0
+    moves: int = 0
+    """Moves left after allocation."""
+    removed: int = 0
+    """Moves removed as both of their registers got the same one."""
+
+
+@dataclass
+class Allocation:
+    procedures: dict[str, Spills] = field(default_factory=dict)
+
+    def to_text(self) -> str:
+        text = "allocation\n"
+        for name, spills in self.procedures.items():
+            text += (
+                f"{name}: "
+                f"registers {spills.registers}, "
+                f"spilled {spills.spilled}, "
+                f"loads {spills.loads}, "
+                f"stores {spills.stores}, "
+                f"moves {spills.moves}, "
+                f"removed {spills.removed}\n"
+            )
+        return text
+
+
+class Allocator(ABC):
+
+    """
+    Maps virtual registers onto `registers` physical ones.
+
+    Procedures are allocated one by one and share the physical
+    registers, so registers live across a call or used by several
+    procedures are kept in memory. Each of the other virtual
+    registers either gets a physical register or is spilled too.
+    A spilled register lives in a data memory cell of its own and
+    is reloaded before and stored after each instruction using it.
+    """
+
+    def __init__(self, registers: int) -> None:
+        if not SCRATCH < registers <= len(GENERAL):
+            message = (
+                f"can not allocate {registers} registers, "
+                f"expected from {SCRATCH + 1} to {len(GENERAL)}"
+            )
+            raise SleepyError(message)
+        self.registers = registers
+        self.scratch = [
+            PhysicalRegister.general(number)
+            for number in range(registers - SCRATCH + 1, registers + 1)
+        ]
+
+    @property
+    def available(self) -> int:
+        return self.registers - SCRATCH
+
+    @abstractmethod
+    def assigned(self, flow: Flow, pinned: set[int]) -> dict[int, int]:
+        """
+        Assign numbers of physical registers to virtual registers.
+
+        Registers that are `pinned` or left unassigned are spilled.
+        """
+        raise NotImplementedError
+
+    def allocate(self, asmik: AsmikEmitListener) -> Allocation:
+        flows = flows_of(asmik)
+        occurrences: dict[int, set[str]] = {}
+        for name, flow in flows.items():
+            for instr in flow.code:
+                for reg in virtual(uses_of(instr) + defs_of(instr)):
+                    occurrences.setdefault(reg, set()).add(name)
+        shared = {reg for reg, names in occurrences.items() if len(names) > 1}
+
+        allocation = Allocation()
+        slots: dict[int, int] = {}
+        groups: list[list[Instruction]] = []
+        for name, flow in flows.items():
+            pinned = shared | flow.across_calls() | flow.live_in[0]
+            assigned = self.assigned(flow, pinned)
+
+            spiller = Spiller(asmik, assigned, slots, self.scratch)
+            groups.extend(spiller.rewritten(instr) for instr in flow.code)
+            allocation.procedures[name] = spiller.spills
+
+        asmik.rewrite(groups)
+        return allocation
+
+class LinearScan(Allocator):
+
+    """
+    Linear scan register allocation.
+
+    Live intervals are scanned in the order of their starts, an
+    interval gets a register freed by the intervals that ended
+    before. If there is none, the interval that ends last is spilled.
+    """
+
+    def assigned(self, flow: Flow, pinned: set[int]) -> dict[int, int]:
+        intervals = sorted(
+            (start, end, reg)
+            for reg, (start, end) in flow.intervals().items()
+            if reg not in pinned
+        )
+
+        free = list(reversed(range(1, self.available + 1)))
+        active: list[tuple[int, int]] = []
+        assigned: dict[int, int] = {}
+        for start, end, reg in intervals:
+            # registers read by an instruction can be written by it
+            for expired in [_ for _ in active if _[0] <= start]:
+                active.remove(expired)
+                free.append(assigned[expired[1]])
+
+            if free:
+                assigned[reg] = free.pop()
+                active.append((end, reg))
+                continue
+
+            last = max(active)
+            if last[0] > end:
+                active.remove(last)
+                assigned[reg] = assigned.pop(last[1])
+                active.append((end, reg))
+
+        return assigned
+
+
+class GraphColoring(Allocator):
+
+    """
+    Chaitin-Briggs graph coloring register allocation.
+
+    Moves between registers that do not interfere are coalesced while
+    the merged register has fewer neighbours of significant degree than
+    there are registers available, so both get the same register and
+    the move is removed. Registers are then simplified from the graph
+    in the order of their degrees, when all of them are significant,
+    the one with the fewest uses per neighbour is removed optimistically.
+    Registers are colored in the reverse order, the ones that did not
+    get a color are spilled.
+    """
+
+    def assigned(self, flow: Flow, pinned: set[int]) -> dict[int, int]:
+        graph = Interference.built(flow, pinned)
+        graph.coalesce(self.available)
+        order = graph.simplified(self.available)
+        colors = graph.colored(order, self.available)
+        return {
+            reg: colors[graph.alias(reg)]
+            for reg in graph.registers
+            if graph.alias(reg) in colors
+        }
+
+
+@dataclass
+class Interference:
+
+    """Interference graph of virtual registers in a procedure."""
+
+    registers: set[int] = field(default_factory=set)
+    neighbours: dict[int, set[int]] = field(default_factory=dict)
+    costs: dict[int, int] = field(default_factory=dict)
+    """Number of instructions using or defining a register."""
+    moves: list[tuple[int, int]] = field(default_factory=list)
+    aliases: dict[int, int] = field(default_factory=dict)
+    """Registers coalesced into another one."""
+
+    @staticmethod
+    def built(flow: Flow, pinned: set[int]) -> "Interference":
+        """Build the graph of registers of `flow` except the `pinned`."""
+        graph = Interference()
+        for i, instr in enumerate(flow.code):
+            for reg in virtual(uses_of(instr) + defs_of(instr)) - pinned:
+                graph.neighbours.setdefault(reg, set())
+                graph.costs[reg] = graph.costs.get(reg, 0) + 1
+
+            # a move does not make its registers interfere
+            source = virtual([instr.lhs]) if is_mov(instr) else set()
+            for reg in virtual(defs_of(instr)) - pinned:
+                for other in flow.live_out[i] - pinned - source - {reg}:
+                    graph.add(reg, other)
+                graph.moves += [(reg, src) for src in source - pinned]
+
+        graph.registers = set(graph.neighbours)
+        return graph
+
+    def add(self, lhs: int, rhs: int) -> None:
+        self.neighbours[lhs].add(rhs)
+        self.neighbours[rhs].add(lhs)
+
+    def alias(self, reg: int) -> int:
+        while reg in self.aliases:
+            reg = self.aliases[reg]
+        return reg
+
+    def coalesce(self, colors: int) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for dst, src in self.moves:
+                lhs, rhs = self.alias(dst), self.alias(src)
+                if lhs != rhs and self.is_conservative(lhs, rhs, colors):
+                    self.merge(lhs, rhs)
+                    changed = True
+
+    def is_conservative(self, lhs: int, rhs: int, colors: int) -> bool:
+        """Tell if `lhs` and `rhs` can be merged keeping the graph colorable."""
+        if rhs in self.neighbours[lhs]:
+            return False
+        merged = self.neighbours[lhs] | self.neighbours[rhs]
+        significant = [_ for _ in merged if len(self.neighbours[_]) >= colors]
+        return len(significant) < colors
+
+    def merge(self, lhs: int, rhs: int) -> None:
+        self.aliases[rhs] = lhs
+        for other in self.neighbours.pop(rhs):
+            self.neighbours[other].discard(rhs)
+            self.add(lhs, other)
+        self.costs[lhs] += self.costs.pop(rhs)
+
+    def simplified(self, colors: int) -> list[int]:
+        """Tell the order registers are removed from the graph in."""
+        degrees = {reg: len(_) for reg, _ in self.neighbours.items()}
+        order: list[int] = []
+        while degrees:
+            insignificant = [_ for _ in degrees if degrees[_] < colors]
+            reg = min(insignificant or degrees, key=self.priority(degrees))
+            del degrees[reg]
+            order.append(reg)
+            for other in self.neighbours[reg] & degrees.keys():
+                degrees[other] -= 1
+        return order
+
+    def priority(self, degrees: dict[int, int]) -> Callable[[int], tuple]:
+        return lambda reg: (self.costs[reg] / (degrees[reg] + 1), reg)
+
+    def colored(self, order: list[int], colors: int) -> dict[int, int]:
+        colored: dict[int, int] = {}
+        for reg in reversed(order):
+            used = {colored.get(_) for _ in self.neighbours[reg]}
+            free = [_ for _ in range(1, colors + 1) if _ not in used]
+            if free:
+                colored[reg] = free[0]
+        return colored
+
+
+class Spiller:
+
+    """Rewrites a procedure onto physical registers and memory cells."""
+
+    def __init__(
+        self,
+        asmik: AsmikEmitListener,
+        assigned: dict[int, int],
+        slots: dict[int, int],
+        scratch: list[PhysicalRegister],
+    ) -> None:
+        self.asmik = asmik
+        self.assigned = assigned
+        self.slots = slots
+        self.scratch = scratch
+        self.spills = Spills(
+            registers=len(set(assigned.values())),
+        )
+
+    def rewritten(self, instr: Instruction) -> list[Instruction]:
+        reloaded: dict[int, Register] = {}
+        group: list[Instruction] = []
+        for reg in uses_of(instr):
+            if self.is_spilled(reg) and reg.index not in reloaded:
+                scratch = self.scratch[len(reloaded)]
+                reloaded[reg.index] = scratch
+                group.append(Load(scratch, Register.ze(), self.slot(reg)))
+                self.spills.loads += 1
+
+        stored: list[Instruction] = []
+        for reg in defs_of(instr):
+            if self.is_spilled(reg):
+                value = reloaded.get(reg.index, self.scratch[0])
+                reloaded[reg.index] = value
+                stored.append(Stor(Register.ze(), value, self.slot(reg)))
+                self.spills.stores += 1
+
+        instr = renamed(instr, reloaded, self.assigned)
+        if is_mov(instr) and instr.dst == instr.lhs:
+            self.spills.removed += 1
+            return group + stored
+        self.spills.moves += is_mov(instr)
+        return [*group, instr, *stored]
+
+    def is_spilled(self, reg: Register) -> bool:
+        return isinstance(reg, VirtualRegister) and (
+            reg.index not in self.assigned
+        )
+
+    def slot(self, reg: Register) -> Integer:
+        if reg.index not in self.slots:
+            self.spills.spilled += 1
+            cell = IntegerData(0, f"spill {reg!r}")
+            self.slots[reg.index] = self.asmik.memory.data_put(cell)
+        return Integer(self.slots[reg.index])
+
+
+def renamed(
+    instr: Instruction,
+    reloaded: dict[int, Register],
+    assigned: dict[int, int],
+) -> Instruction:
+    def physical(reg: Register) -> Register:
+        if reg.index in reloaded:
+            return reloaded[reg.index]
+        if reg.index in assigned:
+            return PhysicalRegister.general(assigned[reg.index])
+        return reg
+
+    changes = {
+        operand.name: physical(getattr(instr, operand.name))
+        for operand in fields(instr)  # type: ignore[arg-type]
+        if isinstance(getattr(instr, operand.name), Register)
+    }
+    return replace(instr, **changes)  # type: ignore[type-var]
+
+
+def is_mov(instr: Instruction) -> TypeGuard[Addim]:
+    return (
+        isinstance(instr, Addim)
+        and instr.rhs == Integer(0)
+        and instr.lhs != Register.ze()
+    )
+
@@ -1,7 +1,22 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import override
 
+GENERAL = tuple(f"r{number}" for number in range(1, 17))
+
+PHYSICAL = (
+    *("ze", "ip", "sp", "ra", "a1", "a2", "a3", "a4", "a5", "a6"),
+    *GENERAL,
+)
+
+IMMEDIATE = 24
+"""Width of a signed immediate operand in an encoded instruction."""
+
+
+def fits(value: int) -> bool:
+    """Tell if a value fits into a signed immediate operand."""
+    return -(1 << (IMMEDIATE - 1)) <= value < 1 << (IMMEDIATE - 1)
+
 
 class Argument(ABC):
     @abstractmethod
@@ -10,6 +25,15 @@ class Argument(ABC):
 
 
 class Register(Argument):
+    index: int
+    """Dense number of a register in a register file."""
+
+    @staticmethod
+    def indexed(index: int) -> "Register":
+        if index < len(PHYSICAL):
+            return PhysicalRegister(PHYSICAL[index])
+        return VirtualRegister(index - len(PHYSICAL))
+
     @staticmethod
     def ze() -> "PhysicalRegister":
         return PhysicalRegister("ze")
@@ -34,6 +58,10 @@ class Register(Argument):
 @dataclass(repr=False)
 class VirtualRegister(Register):
     number: int
+    index: int = field(init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.index = len(PHYSICAL) + self.number
 
     @override
     def __repr__(self) -> str:
@@ -43,6 +71,10 @@ class VirtualRegister(Register):
 @dataclass(repr=False)
 class PhysicalRegister(Register):
     name: str
+    index: int = field(init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.index = PHYSICAL.index(self.name)
 
     @override
     def __repr__(self) -> str:
@@ -55,6 +87,11 @@ class PhysicalRegister(Register):
             raise NotImplementedError
         return PhysicalRegister(f"a{number}")
 
+    @staticmethod
+    def general(number: int) -> "PhysicalRegister":
+        """General purpose register, the target of register allocation."""
+        return PhysicalRegister(GENERAL[number - 1])
+
 
 class Immediate(Argument):
     pass
@@ -17,8 +17,14 @@ class Data(ABC):
 
 
 class IntegerData(Data):
-    def __init__(self, value: int) -> None:
+    def __init__(self, value: int, name: str | None = None) -> None:
         self.value = value
+        self.name = name
+
+    @override
+    @property
+    def identifier(self) -> str:
+        return self.name if self.name is not None else repr(self)
 
     @override
     @property
@@ -1,9 +1,10 @@
 from typing import override
 
 import sleepy.tafka.representation as taf
+from sleepy.tafka.usage import Usages
 from sleepy.tafka.walker import TafkaWalker
 
-from .argument import Immediate, Integer, Unassigned
+from .argument import Immediate, Integer, Unassigned, fits
 from .argument import PhysicalRegister as PhysReg
 from .argument import Register as Reg
 from .argument import VirtualRegister as VirtReg
@@ -12,7 +13,10 @@ from .instruction import (
     Addi,
     Addim,
     Andb,
+    Blt,
+    Bne,
     Brn,
+    Brni,
     Divi,
     Instruction,
     Load,
@@ -43,16 +47,43 @@ class VirtualRegisters:
 
 
 class AsmikEmitListener(TafkaWalker.Listener):
-    def __init__(self) -> None:
+
+    """
+    Emits Asmik code for Tafka procedures and blocks.
+
+    Integer constants that fit an immediate operand are put into code,
+    only wider ones are kept in data memory and loaded from there.
+    Procedures known statically are branched to directly, so a word
+    holding the address of a procedure is put into data only when the
+    procedure is loaded as a value. An invocation whose result is only
+    returned is a tail call, it jumps to the callee leaving `ra` as is,
+    so the callee returns right to the caller of this procedure.
+    With `usages` of the whole unit known, an equality or a comparison
+    read only by the conditional jump right after it is not computed,
+    the jump compares its operands instead.
+    """
+
+    def __init__(self, usages: Usages | None = None) -> None:
         self.memory = Memory()
         self.registers = VirtualRegisters()
 
         self.resolved: dict[str, int] = {}
+        self.entries: dict[str, IntegerData] = {}
+        """Entry addresses of procedures by their constants."""
+
+        self.usages = usages
+        self.block: taf.Block | None = None
+        self.statement: taf.Statement | None = None
+        self.compared: dict[str, taf.BinaryOperator] = {}
+        """Comparisons left to conditional jumps by their targets."""
+        self.immediates = 0
+        """Integer constants put into instructions, not into data memory."""
+        self.left = False
+        """Tells the block was left by a tail call, so the rest is dead."""
 
     @override
     def enter_procedure(self, procedure: taf.Procedure) -> None:
-        addr = self.memory.data_put(IntegerData(self.next_instr_addr))
-        self.resolved[repr(procedure.const)] = addr
+        self.entry_of(procedure.const).value = self.next_instr_addr
         for i, param in enumerate(procedure.parameters):
             register = self.registers.binded_to(param)
             self.emit(mov(register, PhysReg.arg(i + 1)))
@@ -64,14 +95,15 @@ class AsmikEmitListener(TafkaWalker.Listener):
     @override
     def enter_block(self, block: taf.Block) -> None:
         self.resolved[repr(block.label)] = self.next_instr_addr
+        self.block = block
 
     @override
     def exit_block(self, block: taf.Block) -> None:
-        pass
+        self.left = False
 
     @override
     def enter_statement(self, statement: taf.Statement) -> None:
-        pass
+        self.statement = statement
 
     @override
     def exit_statement(self, statement: taf.Statement) -> None:
@@ -86,17 +118,23 @@ class AsmikEmitListener(TafkaWalker.Listener):
     @override
     def on_goto(self, goto: taf.Goto) -> None:
         block_label = repr(goto.block.label)
-        label = self.registers.temporary()
-        self.emit(movi(label, Unassigned(block_label)))
-        self.emit(Brn(Reg.ze(), label))
+        self.emit(Brni(Reg.ze(), Unassigned(block_label)))
 
     @override
     def on_conditional(self, conditional: taf.Conditional) -> None:
-        else_label = repr(conditional.else_branch.label)
-        condition = self.registers.binded_to(conditional.condition)
-        else_address = self.registers.temporary()
-        self.emit(movi(else_address, Unassigned(else_label)))
-        self.emit(Brn(condition, else_address))
+        then_label = Unassigned(repr(conditional.then_branch.label))
+        else_label = Unassigned(repr(conditional.else_branch.label))
+        binded = self.registers.binded_to
+        match self.compared.pop(repr(conditional.condition), None):
+            case taf.Eq(left, right):
+                self.emit(Bne(binded(left), binded(right), else_label))
+            case taf.Lt(left, right):
+                # there is no bge, so the then branch is jumped over to
+                self.emit(Blt(binded(left), binded(right), then_label))
+                self.emit(Brni(Reg.ze(), else_label))
+            case _:
+                condition = binded(conditional.condition)
+                self.emit(Brni(condition, else_label))
 
     @override
     def on_invokation(
@@ -108,24 +146,33 @@ class AsmikEmitListener(TafkaWalker.Listener):
             arg_reg = self.registers.binded_to(arg)
             self.emit(mov(PhysReg.arg(i + 1), arg_reg))
 
-        prev_ra = self.registers.temporary()
-        self.emit(mov(prev_ra, Reg.ra()))
-
-        proc_reg = self.registers.binded_to(source.closure)
-        self.emit(Addim(Reg.ra(), Reg.ip(), Integer(4)))
-        self.emit(Brn(Reg.ze(), proc_reg))
-
+        # `ra` is kept by procedures making calls, see `linked`
+        is_tail = self.is_returned(target)
+        if not is_tail:
+            self.emit(Addim(Reg.ra(), Reg.ip(), Integer(4)))
+        match source.closure:
+            case taf.Const() as procedure:
+                self.emit(Brni(Reg.ze(), Unassigned(repr(procedure))))
+            case taf.Var() as closure:
+                proc_reg = self.registers.binded_to(closure)
+                self.emit(Brn(Reg.ze(), proc_reg))
+
+        if is_tail:
+            self.left = True
+            return
         res_reg = self.registers.binded_to(target)
         self.emit(mov(res_reg, Reg.a1()))
 
-        self.emit(mov(Reg.ra(), prev_ra))
-
     @override
     def on_load(self, target: taf.Var, source: taf.Load) -> None:
         dst = self.registers.binded_to(target)
-        addr = self.addr_of(source.constant)
-        self.emit(Addim(dst, Reg.ze(), addr))
-        self.emit(Load(dst, dst))
+        cnst = source.constant
+        if isinstance(cnst.kind, taf.Int) and fits(int(cnst.name)):
+            self.emit(movi(dst, Integer(int(cnst.name))))
+            self.immediates += 1
+            return
+        addr = self.addr_of(cnst)
+        self.emit(Load(dst, Reg.ze(), addr))
 
     @override
     def on_copy(self, target: taf.Var, source: taf.Copy) -> None:
@@ -151,10 +198,13 @@ class AsmikEmitListener(TafkaWalker.Listener):
 
     @override
     def on_eq(self, target: taf.Var, source: taf.Eq) -> None:
+        if self.is_branched_on(target):
+            self.compared[repr(target)] = source
+            return
+
         dstr = self.registers.binded_to(target)
         lhsr = self.registers.binded_to(source.left)
         rhsr = self.registers.binded_to(source.right)
-
         l2r = orb = dstr
         r2l = self.registers.temporary()
         neg = self.registers.temporary()
@@ -167,6 +217,9 @@ class AsmikEmitListener(TafkaWalker.Listener):
 
     @override
     def on_lt(self, target: taf.Var, source: taf.Lt) -> None:
+        if self.is_branched_on(target):
+            self.compared[repr(target)] = source
+            return
         self.on_trivial_binary_operation(target, source)
 
     @override
@@ -177,6 +230,29 @@ class AsmikEmitListener(TafkaWalker.Listener):
     def on_or(self, target: taf.Var, source: taf.Or) -> None:
         self.on_trivial_binary_operation(target, source)
 
+    def is_branched_on(self, target: taf.Var) -> bool:
+        """Tell if only the jump ending the block reads `target`."""
+        if self.usages is None or self.block is None:
+            return False
+        match self.block.statements[-2:]:
+            case [statement, taf.Conditional(condition)] if (
+                statement is self.statement and repr(condition) == repr(target)
+            ):
+                reads = self.usages.reads.get(repr(target), [])
+                return len(reads) == 1
+            case _:
+                return False
+
+    def is_returned(self, target: taf.Var) -> bool:
+        """Tell if the rest of the procedure only returns `target`."""
+        if self.block is None:
+            return False
+        statements = self.block.statements
+        for i, statement in enumerate(statements):
+            if statement is self.statement:
+                return returns(statements[i + 1 :], repr(target))
+        return False
+
     def on_trivial_binary_operation(
         self,
         target: taf.Var,
@@ -206,7 +282,39 @@ class AsmikEmitListener(TafkaWalker.Listener):
         self.emit(instruction)
 
     def emit(self, instr: Instruction) -> None:
-        self.memory.instr.append(instr)
+        if not self.left:
+            self.memory.instr.append(instr)
+
+    def rewrite(self, groups: list[list[Instruction]]) -> None:
+        """
+        Replace each instruction with a group of instructions.
+
+        Blocks and procedures that started at an instruction start
+        at its group then, or at the next one if the group is empty.
+        Addresses relative to `ip` are moved the same way.
+        """
+        starts = [0]
+        for group in groups:
+            starts.append(starts[-1] + len(group))
+        self.relabel(starts)
+
+        self.memory.instr = []
+        for i, group in enumerate(groups):
+            for instr in group:
+                self.relocate(instr, starts[i + 1 + offset_of(instr) // 4])
+                self.emit(instr)
+
+    def relabel(self, starts: list[int]) -> None:
+        for label, addr in self.resolved.items():
+            if label not in self.entries:
+                self.resolved[label] = starts[addr // 4] * 4
+        for entry in self.entries.values():
+            entry.value = starts[entry.value // 4] * 4
+
+    def relocate(self, instr: Instruction, target: int) -> None:
+        if isinstance(instr, Addim) and instr.lhs == Reg.ip():
+            offset = (target - self.next_instr_addr // 4 - 1) * 4
+            instr.rhs = Integer(offset)
 
     def addr_of(self, cnst: taf.Const) -> Immediate:
         match cnst.kind:
@@ -215,10 +323,41 @@ class AsmikEmitListener(TafkaWalker.Listener):
                 addr = self.memory.data_put(data)
                 return Integer(addr)
             case taf.Signature():
-                return Unassigned(repr(cnst))
+                return Integer(self.memory.data_put(self.entry_of(cnst)))
             case _:
                 raise NotImplementedError
 
+    def entry_of(self, procedure: taf.Const) -> IntegerData:
+        """Tell the entry of a procedure, that may be not emitted yet."""
+        name = repr(procedure)
+        return self.entries.setdefault(name, IntegerData(0, name))
+
     @property
     def next_instr_addr(self) -> int:
         return len(self.memory.instr) * 4
+
+
+def returns(statements: list[taf.Statement], value: str) -> bool:
+    """Tell if `statements` only return `value`, maybe copying it."""
+    for statement in statements:
+        match statement:
+            case taf.Set(target, taf.Copy(argument)) if (
+                repr(argument) == value
+            ):
+                value = repr(target)
+            case taf.Goto(block):
+                return returns(block.statements, value)
+            case taf.Return(returned):
+                return repr(returned) == value
+            case _:
+                return False
+    return False
+
+
+def offset_of(instr: Instruction) -> int:
+    """Tell the offset an instruction addresses relative to `ip`."""
+    match instr:
+        case Addim(_, lhs, Integer(value)) if lhs == Reg.ip():
+            return value
+        case _:
+            return 0
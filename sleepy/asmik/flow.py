@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+
+from .argument import Register, Unassigned, VirtualRegister
+from .emit import AsmikEmitListener
+from .instruction import (
+    Addim,
+    BinRegOperation,
+    Branch,
+    Brn,
+    Brni,
+    CompareBranch,
+    Instruction,
+    Load,
+    Stor,
+)
+
+
+def uses_of(instr: Instruction) -> list[Register]:
+    match instr:
+        case BinRegOperation(_, lhs, rhs):
+            return [lhs, rhs]
+        case Addim(_, lhs, _) | Load(_, lhs) | Brni(lhs, _):
+            return [lhs]
+        case Stor(lhs, rhs) | Brn(lhs, rhs) | CompareBranch(lhs, rhs, _):
+            return [lhs, rhs]
+        case _:
+            return []
+
+
+def defs_of(instr: Instruction) -> list[Register]:
+    match instr:
+        case BinRegOperation(dst, _, _) | Addim(dst, _, _) | Load(dst, _):
+            return [dst]
+        case _:
+            return []
+
+
+def virtual(registers: list[Register]) -> set[int]:
+    return {reg.index for reg in registers if isinstance(reg, VirtualRegister)}
+
+
+@dataclass
+class Flow:
+
+    """
+    Control flow and liveness of virtual registers in a procedure.
+
+    Instructions are numbered from the start of the procedure. A branch
+    to a block label, directly or through a register set from it,
+    is a jump and a `brn ze, ra` is a return. Any other `brn ze` or
+    a branch to a label of a procedure is a call, that continues at
+    the next instruction once the callee returns, when it is right
+    after `ra` is set, and a tail call, that leaves the procedure as
+    a return does, otherwise.
+    """
+
+    code: list[Instruction]
+    successors: list[list[int]]
+    calls: list[int]
+    live_in: list[set[int]]
+    live_out: list[set[int]]
+
+    @staticmethod
+    def analyzed(code: list[Instruction], blocks: dict[str, int]) -> "Flow":
+        """Analyze `code` with `blocks` indices relative to its start."""
+        labels = {
+            instr.dst.index: blocks[instr.rhs.label]
+            for instr in code
+            if isinstance(instr, Addim)
+            and isinstance(instr.rhs, Unassigned)
+            and instr.rhs.label in blocks
+        }
+
+        successors: list[list[int]] = []
+        calls = []
+        for i, instr in enumerate(code):
+            target = jumped(instr, labels, blocks)
+            match instr:
+                case Branch() if target is not None:
+                    fall = [] if is_unconditional(instr) else [i + 1]
+                    successors.append([target, *fall])
+                case Brn(_, label) if label == Register.ra():
+                    successors.append([])
+                case Brn() | Brni(_, Unassigned()) if is_linked(code, i):
+                    calls.append(i)
+                    successors.append([i + 1])
+                case Brn() | Brni(_, Unassigned()):
+                    successors.append([])
+                case _:
+                    successors.append([i + 1])
+
+        live_in, live_out = liveness(code, successors)
+        return Flow(code, successors, calls, live_in, live_out)
+
+    def intervals(self) -> dict[int, tuple[int, int]]:
+        """Tell the first and the last instruction a register is live at."""
+        intervals: dict[int, tuple[int, int]] = {}
+        for i, instr in enumerate(self.code):
+            for reg in self.live_in[i] | virtual(defs_of(instr)):
+                start, _ = intervals.get(reg, (i, i))
+                intervals[reg] = (start, i)
+        return intervals
+
+    def across_calls(self) -> set[int]:
+        """Tell registers live across calls, as callees may clobber them."""
+        return set().union(*(self.live_out[i] for i in self.calls))
+
+
+def jumped(
+    instr: Instruction,
+    labels: dict[int, int],
+    blocks: dict[str, int],
+) -> int | None:
+    """Tell the index of a block a branch jumps to, if it is known."""
+    match instr:
+        case (
+            Brni(_, Unassigned(label))
+            | CompareBranch(_, _, Unassigned(label))
+        ):
+            return blocks.get(label)
+        case Brn(_, label):
+            return labels.get(label.index)
+        case _:
+            return None
+
+
+def is_linked(code: list[Instruction], i: int) -> bool:
+    """Tell if the return address is set right before a branch."""
+    match code[i - 1] if i > 0 else None:
+        case Addim(dst, lhs, _):
+            return dst == Register.ra() and lhs == Register.ip()
+        case _:
+            return False
+
+
+def is_unconditional(instr: Instruction) -> bool:
+    return isinstance(instr, Brn | Brni) and instr.cond == Register.ze()
+
+
+def liveness(
+    code: list[Instruction],
+    successors: list[list[int]],
+) -> tuple[list[set[int]], list[set[int]]]:
+    uses = [virtual(uses_of(instr)) for instr in code]
+    defs = [virtual(defs_of(instr)) for instr in code]
+    live_in: list[set[int]] = [set() for _ in code]
+    live_out: list[set[int]] = [set() for _ in code]
+
+    # branches mostly go forward, so a backward pass almost converges
+    changed = True
+    while changed:
+        changed = False
+        for i in reversed(range(len(code))):
+            out = set().union(
+                *(live_in[j] for j in successors[i] if j < len(code)),
+            )
+            new = uses[i] | (out - defs[i])
+            if out != live_out[i] or new != live_in[i]:
+                live_out[i], live_in[i] = out, new
+                changed = True
+
+    return live_in, live_out
+
+
+def regions_of(asmik: AsmikEmitListener) -> dict[str, tuple[int, int]]:
+    """Tell instruction index ranges of main and procedures."""
+    starts = {"main": 0} | {
+        name: entry.value // 4 for name, entry in asmik.entries.items()
+    }
+    bounds = sorted(starts.items(), key=lambda start: start[1])
+    ends = [start for _, start in bounds[1:]] + [len(asmik.memory.instr)]
+    return {
+        name: (start, end)
+        for (name, start), end in zip(bounds, ends, strict=True)
+    }
+
+
+def flows_of(asmik: AsmikEmitListener) -> dict[str, Flow]:
+    """Analyze main and procedures in the order of their addresses."""
+    flows = {}
+    for name, (start, end) in regions_of(asmik).items():
+        blocks = {
+            label: addr // 4 - start
+            for label, addr in asmik.resolved.items()
+            if label not in asmik.entries and start <= addr // 4 < end
+        }
+        flows[name] = Flow.analyzed(asmik.memory.instr[start:end], blocks)
+    return flows
@@ -0,0 +1,94 @@
+from .argument import (
+    PHYSICAL,
+    Integer,
+    Register,
+    Unassigned,
+    VirtualRegister,
+)
+from .emit import AsmikEmitListener
+from .flow import flows_of
+from .instruction import Addim, Instruction, Load, Stor, mov, movi
+
+STACK = "stack"
+"""Label of the first word after the data, where the stack starts."""
+
+WORD = 8
+
+
+def framed(asmik: AsmikEmitListener) -> int:
+    """
+    Save registers live across calls on the stack, tell their count.
+
+    The stack grows up from `STACK` and `sp` points to its first free
+    word. Registers live after a call are stored to a frame on top of
+    the stack right before it and loaded back right after it returns,
+    so a callee, the caller itself including, may clobber any virtual
+    register.
+    """
+    groups: list[list[Instruction]] = []
+    saved = 0
+    for flow in flows_of(asmik).values():
+        start = len(groups)
+        groups.extend([instr] for instr in flow.code)
+        for call in flow.calls:
+            registers = [
+                VirtualRegister(index - len(PHYSICAL))
+                for index in sorted(flow.live_out[call])
+            ]
+            # before `ra` is set, so the call is still right after it
+            groups[start + call - 1][:0] = pushed(registers)
+            groups[start + call + 1][:0] = popped(registers)
+            saved += len(registers)
+
+    if saved:
+        groups[0][:0] = [movi(Register.sp(), Unassigned(STACK))]
+        asmik.rewrite(groups)
+    return saved
+
+
+def linked(asmik: AsmikEmitListener) -> int:
+    """
+    Keep return addresses of procedures making calls, tell their count.
+
+    A call sets `ra`, so a procedure making calls copies it to a virtual
+    register on entry and restores it before leaving by a return or a
+    tail call. Leaf procedures, the ones only jumping to others if at
+    all, leave `ra` as is.
+    """
+    groups: list[list[Instruction]] = []
+    count = 0
+    for flow in flows_of(asmik).values():
+        start = len(groups)
+        groups.extend([instr] for instr in flow.code)
+        if not flow.calls:
+            continue
+        saved = asmik.registers.temporary()
+        groups[start][:0] = [mov(saved, Register.ra())]
+        for i, successors in enumerate(flow.successors):
+            if not successors:
+                groups[start + i][:0] = [mov(Register.ra(), saved)]
+        count += 1
+
+    if count:
+        asmik.rewrite(groups)
+    return count
+
+
+def pushed(registers: list[VirtualRegister]) -> list[Instruction]:
+    if not registers:
+        return []
+    sp = Register.sp()
+    code: list[Instruction] = [
+        Stor(sp, reg, Integer(i * WORD)) for i, reg in enumerate(registers)
+    ]
+    return [*code, Addim(sp, sp, Integer(len(registers) * WORD))]
+
+
+def popped(registers: list[VirtualRegister]) -> list[Instruction]:
+    if not registers:
+        return []
+    sp = Register.sp()
+    code: list[Instruction] = [
+        Load(reg, sp, Integer(i * WORD)) for i, reg in enumerate(registers)
+    ]
+    return [Addim(sp, sp, Integer(-len(registers) * WORD)), *code]
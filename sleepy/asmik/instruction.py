@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod, abstractproperty
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import override
 
 from .argument import Immediate, Integer, Register
@@ -159,6 +159,7 @@ class Xorb(BinRegOperation):
 class Load(Instruction):
     dst: Register
     src_addr: Register
+    offset: Immediate = field(default_factory=lambda: Integer(0))
 
     @override
     @property
@@ -168,17 +169,19 @@ class Load(Instruction):
     @override
     @property
     def action(self) -> str:
-        return "dst <- [src]"
+        return "dst <- [src + offset]"
 
     @override
     def __repr__(self) -> str:
-        return f"{self.name} {self.dst}, {self.src_addr}"
+        suffix = suffix_of(self.offset)
+        return f"{self.name} {self.dst}, {self.src_addr}{suffix}"
 
 
 @dataclass(repr=False)
 class Stor(Instruction):
     dst_addr: Register
     src: Register
+    offset: Immediate = field(default_factory=lambda: Integer(0))
 
     @override
     @property
@@ -188,15 +191,25 @@ class Stor(Instruction):
     @override
     @property
     def action(self) -> str:
-        return "[dst] <- src"
+        return "[dst + offset] <- src"
 
     @override
     def __repr__(self) -> str:
-        return f"{self.name} {self.dst_addr}, {self.src}"
+        suffix = suffix_of(self.offset)
+        return f"{self.name} {self.dst_addr}, {self.src}{suffix}"
+
+
+def suffix_of(offset: Immediate) -> str:
+    """Tell an offset as the last operand, a zero one is left out."""
+    return "" if offset == Integer(0) else f", {offset}"
+
+
+class Branch(Instruction):
+    pass
 
 
 @dataclass(repr=False)
-class Brn(Instruction):
+class Brn(Branch):
     cond: Register
     label: Register
 
@@ -215,6 +228,63 @@ class Brn(Instruction):
         return f"{self.name} {self.cond}, {self.label}"
 
 
+@dataclass(repr=False)
+class Brni(Branch):
+    cond: Register
+    label: Immediate
+
+    @override
+    @property
+    def name(self) -> str:
+        return "brni"
+
+    @override
+    @property
+    def action(self) -> str:
+        return "ip <- (not cond) ? label : (ip + 4)"
+
+    @override
+    def __repr__(self) -> str:
+        return f"{self.name} {self.cond}, {self.label}"
+
+
+@dataclass(repr=False)
+class CompareBranch(Branch):
+    lhs: Register
+    rhs: Register
+    label: Immediate
+
+    @override
+    def __repr__(self) -> str:
+        return f"{self.name} {self.lhs}, {self.rhs}, {self.label}"
+
+
+@dataclass(repr=False)
+class Bne(CompareBranch):
+    @override
+    @property
+    def name(self) -> str:
+        return "bne"
+
+    @override
+    @property
+    def action(self) -> str:
+        return "ip <- (lhs != rhs) ? label : (ip + 4)"
+
+
+@dataclass(repr=False)
+class Blt(CompareBranch):
+    @override
+    @property
+    def name(self) -> str:
+        return "blt"
+
+    @override
+    @property
+    def action(self) -> str:
+        return "ip <- (lhs < rhs) ? label : (ip + 4)"
+
+
 @dataclass(repr=False)
 class Hlt(Instruction):
     @override
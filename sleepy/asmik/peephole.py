@@ -0,0 +1,191 @@
+from collections.abc import Callable
+from typing import cast
+
+from .argument import Integer, Register, Unassigned
+from .emit import AsmikEmitListener
+from .flow import defs_of
+from .instruction import (
+    Addim,
+    Branch,
+    Brni,
+    CompareBranch,
+    Instruction,
+    Load,
+    Stor,
+    mov,
+)
+
+Rule = Callable[["Peephole", list[Instruction], int], list[Instruction] | None]
+"""Rewrites a window starting at an index or tells it does not match."""
+
+
+def self_move(
+    _: "Peephole",
+    window: list[Instruction],
+    _i: int,
+) -> list[Instruction] | None:
+    match window:
+        case [Addim(dst, lhs, Integer(0))] if dst == lhs:
+            return []
+        case _:
+            return None
+
+
+def branch_to_next(
+    peephole: "Peephole",
+    window: list[Instruction],
+    i: int,
+) -> list[Instruction] | None:
+    match window:
+        case [
+            Brni(_, Unassigned(label))
+            | CompareBranch(_, _, Unassigned(label)),
+        ] if peephole.address_of(label) == (i + 1) * 4:
+            return []
+        case _:
+            return None
+
+
+def move_back(
+    _: "Peephole",
+    window: list[Instruction],
+    _i: int,
+) -> list[Instruction] | None:
+    match window:
+        case [
+            Addim(dst, src, Integer(0)) as first,
+            Addim(back, to, Integer(0)),
+        ] if back == src and to == dst:
+            return [first]
+        case _:
+            return None
+
+
+def constant_reload(
+    peephole: "Peephole",
+    window: list[Instruction],
+    _i: int,
+) -> list[Instruction] | None:
+    key = constant_of(window[0])
+    if key is None or key not in peephole.known:
+        return None
+    dst, known = cast(Load, window[0]).dst, peephole.known[key]
+    return [] if known == dst else [mov(dst, known)]
+
+
+RULES: dict[str, tuple[int, Rule]] = {
+    "self move": (1, self_move),
+    "branch to next": (1, branch_to_next),
+    "move back": (2, move_back),
+    "constant reload": (1, constant_reload),
+}
+"""Rules by their names with sizes of their windows, tried in order."""
+
+
+class Peephole:
+
+    """
+    Rewrites short windows of instructions by `rules` until none fires.
+
+    A window never spans a start of a block, a procedure or a return
+    from a call, so control can only enter it at the first instruction.
+    Registers holding words loaded from fixed addresses are tracked
+    within such straight-line code until anything is stored.
+    """
+
+    def __init__(
+        self,
+        asmik: AsmikEmitListener,
+        rules: dict[str, tuple[int, Rule]] = RULES,
+    ) -> None:
+        self.asmik = asmik
+        self.rules = rules
+        self.fired = dict.fromkeys(rules, 0)
+        self.known: dict[str, Register] = {}
+        """Registers holding constants by addresses they are loaded from."""
+
+    def optimize(self) -> dict[str, int]:
+        """Rewrite the code and tell how many times each rule fired."""
+        while self.rewritten():
+            pass
+        return self.fired
+
+    def rewritten(self) -> bool:
+        code = self.asmik.memory.instr
+        leaders = self.leaders()
+        groups: list[list[Instruction]] = []
+        fired = False
+        while len(groups) < len(code):
+            i = len(groups)
+            if i in leaders or i == 0:
+                self.known.clear()
+            size, group = self.matched(code, i, leaders)
+            fired |= group != code[i : i + size]
+            groups += [group] + [[] for _ in range(size - 1)]
+            for instr in group:
+                self.track(instr)
+
+        if fired:
+            self.asmik.rewrite(groups)
+        return fired
+
+    def matched(
+        self,
+        code: list[Instruction],
+        i: int,
+        leaders: set[int],
+    ) -> tuple[int, list[Instruction]]:
+        for name, (size, rule) in self.rules.items():
+            window = code[i : i + size]
+            if len(window) < size or leaders & set(range(i + 1, i + size)):
+                continue
+            group = rule(self, window, i)
+            if group is not None:
+                self.fired[name] += 1
+                return size, group
+        return 1, [code[i]]
+
+    def track(self, instr: Instruction) -> None:
+        """Follow constants in registers through straight-line code."""
+        if isinstance(instr, Branch | Stor):
+            self.known.clear()
+        for reg in defs_of(instr):
+            self.known = {
+                key: known for key, known in self.known.items() if known != reg
+            }
+
+        key = constant_of(instr)
+        if key is not None:
+            self.known[key] = cast(Load, instr).dst
+
+    def address_of(self, label: str) -> int | None:
+        """Tell the address of a block or a procedure if it is known."""
+        if label in self.asmik.entries:
+            return self.asmik.entries[label].value
+        return self.asmik.resolved.get(label)
+
+    def leaders(self) -> set[int]:
+        """Tell indices control can enter at not from the previous one."""
+        blocks = {
+            addr // 4
+            for label, addr in self.asmik.resolved.items()
+            if label not in self.asmik.entries
+        }
+        entries = {entry.value // 4 for entry in self.asmik.entries.values()}
+        returns = {
+            i + 1
+            for i, instr in enumerate(self.asmik.memory.instr)
+            if isinstance(instr, Branch)
+        }
+        return blocks | entries | returns
+
+
+def constant_of(instr: Instruction) -> str | None:
+    """Tell the address a `load x, ze, addr` loads from."""
+    match instr:
+        case Load(value, src, addr) if (
+            src == Register.ze() and value != Register.ze()
+        ):
+            return repr(addr)
+        case _:
+            return None
@@ -1,38 +1,76 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 
 from sleepy.tafka import TafkaUnit, TafkaWalker
 
+from .allocation import Allocation, Allocator
 from .argument import Integer, Unassigned
 from .emit import AsmikEmitListener
-from .instruction import Addim
+from .frame import STACK, WORD, framed, linked
 from .memory import Memory
+from .peephole import Peephole
 
 
 @dataclass
 class AsmikUnit:
     memory: Memory
+    procedures: dict[str, int] = field(default_factory=dict)
+    """Entry addresses of procedures by their constants."""
+    blocks: dict[str, int] = field(default_factory=dict)
+    """Addresses of Tafka blocks by their labels."""
+    allocation: Allocation | None = None
+    """Cost of register allocation, if registers were allocated."""
+    peephole: dict[str, int] = field(default_factory=dict)
+    """Number of times each peephole rule fired."""
+    immediates: int = 0
+    """Data memory loads avoided by integer constants put into code."""
 
     @staticmethod
-    def emited_from(tafka: TafkaUnit) -> "AsmikUnit":
+    def emited_from(
+        tafka: TafkaUnit,
+        allocator: Allocator | None = None,
+        *,
+        peephole: bool = True,
+    ) -> "AsmikUnit":
         def resolve_addresses(asmik: AsmikEmitListener) -> None:
             for instr in asmik.memory.instr:
-                if (
-                    isinstance(instr, Addim)  #
-                    and isinstance(instr.rhs, Unassigned)
-                ):
-                    label = instr.rhs.label
-                    instr.rhs = Integer(asmik.resolved[label])
-
-        asmik = AsmikEmitListener()
+                for operand in fields(instr):  # type: ignore[arg-type]
+                    value = getattr(instr, operand.name)
+                    if isinstance(value, Unassigned):
+                        address = Integer(asmik.resolved[value.label])
+                        setattr(instr, operand.name, address)
+
+        asmik = AsmikEmitListener(tafka.usages())
         walker = TafkaWalker(asmik)
 
         walker.explore_block(tafka.main)
         for proc in tafka.procedures:
             walker.explore_procedure(proc)
 
+        linked(asmik)
+        framed(asmik)
+        allocation = allocator.allocate(asmik) if allocator else None
+        fired = Peephole(asmik).optimize() if peephole else {}
+
+        end = asmik.memory.stack_pointer
+        asmik.resolved[STACK] = (end + WORD - 1) // WORD * WORD
+        procedures = {
+            name: entry.value for name, entry in asmik.entries.items()
+        }
+        asmik.resolved |= procedures
         resolve_addresses(asmik)
 
-        return AsmikUnit(asmik.memory)
+        return AsmikUnit(
+            asmik.memory,
+            procedures=procedures,
+            blocks={
+                label: addr
+                for label, addr in asmik.resolved.items()
+                if label not in procedures and label != STACK
+            },
+            allocation=allocation,
+            peephole=fired,
+            immediates=asmik.immediates,
+        )
 
     def to_text(self) -> str:
         text = ""
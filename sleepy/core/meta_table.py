@@ -15,6 +15,8 @@ class Identifiable(ABC):
 class MetaTable(Generic[T]):
     def __init__(self) -> None:
         self.entries: dict[UID, T] = {}
+        # keys are pinned, so that their ids are not reused
+        self.keys: dict[UID, Identifiable] = {}
 
     def __getitem__(self, key: Identifiable) -> T:
         try:
@@ -23,8 +25,12 @@ class MetaTable(Generic[T]):
             e.add_note(f"key: {key!r}")
             raise
 
+    def __contains__(self, key: Identifiable) -> bool:
+        return key.uid in self.entries
+
     def __setitem__(self, key: Identifiable, value: T) -> None:
         if key.uid in self.entries:
             message = f"can't assign {value}, to key with id {key.uid}: {key!r}"
             raise KeyError(message)
         self.entries[key.uid] = value
+        self.keys[key.uid] = key
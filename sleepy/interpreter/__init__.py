@@ -1 +1,19 @@
 from .asmik import AsmikInterpreter
+from .cache import Cache, Policy
+from .cooperative import Latency
+from .dispatch import DispatchInterpreter
+from .image import Image
+from .jit import JitInterpreter
+from .observer import Observer, Observers
+from .pipeline import Pipeline, Stall
+from .predictor import (
+    Bimodal,
+    Gshare,
+    NotTaken,
+    Prediction,
+    Predictor,
+    ReturnStack,
+)
+from .profile import Profile
+from .snapshot import Snapshot
+from .step import Status
@@ -1,16 +1,22 @@
-from typing import Any, cast
+import operator
+from collections.abc import Callable
+from typing import Any, cast, override
 
 from sleepy.asmik import (
     Addi,
     Addim,
     Andb,
     AsmikUnit,
+    Blt,
+    Bne,
+    Branch,
     Brn,
+    Brni,
+    CompareBranch,
     Divi,
     Hlt,
     Instruction,
     Integer,
-    IntegerData,
     Load,
     Muli,
     Orb,
@@ -20,46 +26,171 @@ from sleepy.asmik import (
     Stor,
     Xorb,
 )
-from sleepy.core import SleepyError
 
+from .cache import Cache
+from .cooperative import Cooperative
+from .decode import (
+    IP,
+    RA,
+    ZE,
+    Decoded,
+    decoded,
+    named,
+    registers_of,
+)
+from .memory import Allocator, DataMemory
+from .observer import (
+    Caching,
+    Observer,
+    Predicting,
+    Profiling,
+    Timing,
+    Tracing,
+)
+from .pipeline import Pipeline
+from .predictor import Prediction
+from .profile import Profile
+from .snapshot import Snapshot, copied
+from .step import Status, checked
+from .trace import Trace
+
+COMPARISONS: dict[type[CompareBranch], Callable[[int, int], bool]] = {
+    Bne: operator.ne,
+    Blt: operator.lt,
+}
 
-class AsmikInterpreter:
+
+class AsmikInterpreter(Cooperative):
     STOP = 666666666
 
-    def __init__(self) -> None:
-        self.registers: dict[str, int] = {}
+    def __init__(self, memory: Allocator = DataMemory.allocated) -> None:
+        self.registers: list[Any] = [None] * (RA + 1)
 
-        self.stack: dict[int, int] = {}
+        self.allocate = memory
+        self.memory = DataMemory.allocated(0)
         self.instr: list[Instruction] = []
+        self.code: list[Decoded] = []
 
-        self.registers["ze"] = 0
-        self.registers["ip"] = 0
-        self.registers["ra"] = self.STOP
+        self.registers[ZE] = 0
+        self.registers[IP] = 0
+        self.registers[RA] = self.STOP
 
         self.running = False
+        self.halted = False
+        self.retired = 0
+        self.profile = Profile()
+        self.checkpoint: Snapshot | None = None
 
     def load(self, unit: AsmikUnit) -> None:
-        self.stack = {}
+        self.memory = self.allocate(DataMemory.words_of(unit.memory))
+        self.memory.fill(unit.memory)
         self.instr = []
+        self.code = []
+        self.halted = False
+        self.retired = 0
 
-        for addr, data in sorted(unit.memory.stack.items()):
-            data = cast(IntegerData, data)
-            self.stack[addr] = data.value
-
-        for instr in unit.memory.instr:
+        size = len(self.registers)
+        for i, instr in enumerate(unit.memory.instr):
+            code = decoded(instr, i * 4)
+            size = max([size] + [index + 1 for index in registers_of(code)])
             self.instr.append(instr)
+            self.code.append(code)
+
+        self.registers.extend([None] * (size - len(self.registers)))
 
-        self.write(Register.ip(), 0)
+        self.registers[IP] = 0
+        self.profile = Profile.empty(len(self.instr))
+        self.checkpoint = None
 
-    def run(self) -> None:
-        self.running = True
-        while self.running:
-            ip = Register.ip()
-            instr = self.instr[self.read(ip) // 4]
-            self.write(ip, self.read(ip) + 4)
+    @override
+    def run(self, max_steps: int | None = None) -> Status:
+        checked(max_steps)
+        if self.halted:
+            return Status.HALTED
+
+        regs = self.registers
+        steps = 0
+        self.running = regs[IP] != self.STOP
+        while self.running and (max_steps is None or steps < max_steps):
+            ip = regs[IP]
+            instr = self.instr[ip // 4]
+            regs[IP] = ip + 4
             self.execute(instr)
-            if self.read(ip) == self.STOP:
+            steps += 1
+            if regs[IP] == self.STOP:
                 self.running = False
+        self.retired += steps
+        self.halted = not self.running
+        return Status.EXHAUSTED if self.running else Status.HALTED
+
+    def observed(
+        self,
+        observer: Observer,
+        max_steps: int | None = None,
+    ) -> Status:
+        """Run as `run` does, showing each instruction to `observer`."""
+        checked(max_steps)
+        if self.halted:
+            return Status.HALTED
+
+        regs = self.registers
+        steps = 0
+        self.running = regs[IP] != self.STOP
+        try:
+            while self.running and (max_steps is None or steps < max_steps):
+                ip = regs[IP]
+                i = ip // 4
+                regs[IP] = ip + 4
+                observer.before(i, regs)
+                self.execute(self.instr[i])
+                observer.after(i, regs)
+                steps += 1
+                if regs[IP] == self.STOP:
+                    self.running = False
+        finally:
+            self.retired += steps
+            self.halted = not self.running
+        return Status.EXHAUSTED if self.running else Status.HALTED
+
+    def run_profiled(self, max_steps: int | None = None) -> Status:
+        """Run as `run` does, counting executions into `profile`."""
+        return self.observed(Profiling(self.profile, self.code), max_steps)
+
+    def run_traced(self, trace: Trace, max_steps: int | None = None) -> Status:
+        """Run as `run` does, writing a record per instruction to `trace`."""
+        try:
+            return self.observed(Tracing(trace, self.code), max_steps)
+        finally:
+            trace.flush()
+
+    def run_cached(
+        self,
+        data: Cache,
+        instr: Cache | None = None,
+        max_steps: int | None = None,
+    ) -> Status:
+        """Run as `run` does, passing memory accesses through caches."""
+        return self.observed(Caching(data, instr, self.code), max_steps)
+
+    def run_timed(
+        self,
+        pipeline: Pipeline,
+        max_steps: int | None = None,
+    ) -> Status:
+        """Run as `run` does, timing instructions on `pipeline`."""
+        if pipeline.code is not self.code:
+            pipeline.attach(self.code, len(self.registers))
+        return self.observed(Timing(pipeline), max_steps)
+
+    def run_predicted(
+        self,
+        prediction: Prediction,
+        max_steps: int | None = None,
+    ) -> Status:
+        """Run as `run` does, predicting branches with `prediction`."""
+        if prediction.code is not self.code:
+            prediction.attach(self.code)
+        return self.observed(Predicting(prediction), max_steps)
 
     def execute(self, instr: Instruction) -> None:
         match instr:
@@ -83,27 +214,56 @@ class AsmikInterpreter:
                 self.write(dst, self.read(lhs) & self.read(rhs))
             case Xorb(dst, lhs, rhs):
                 self.write(dst, self.read(lhs) ^ self.read(rhs))
-            case Load(dst, src_addr):
-                self.write(dst, self.stack[self.read(src_addr)])
-            case Stor(dst_addr, src):
-                self.stack[self.read(dst_addr)] = self.read(src)
-            case Brn(cond, label):
-                if self.read(cond) % 2 == 0:
-                    self.write(Register.ip(), self.read(label))
+            case Load(dst, src_addr, offset):
+                addr = self.read(src_addr) + cast(Integer, offset).value
+                self.write(dst, self.memory.load(addr))
+            case Stor(dst_addr, src, offset):
+                addr = self.read(dst_addr) + cast(Integer, offset).value
+                self.memory.store(addr, self.read(src))
+            case Branch():
+                self.branch(instr)
             case Hlt():
                 self.running = False
 
+    def branch(self, instr: Branch) -> None:
+        match instr:
+            case Brn(cond, label):
+                taken, target = self.read(cond) % 2 == 0, self.read(label)
+            case Brni(cond, label):
+                taken = self.read(cond) % 2 == 0
+                target = cast(Integer, label).value
+            case CompareBranch(lhs, rhs, label):
+                taken = COMPARISONS[type(instr)](self.read(lhs), self.read(rhs))
+                target = cast(Integer, label).value
+            case _:
+                raise NotImplementedError
+        if taken:
+            self.registers[IP] = target
+
+    def snapshot(self) -> Snapshot:
+        self.checkpoint = Snapshot.taken(
+            self.registers,
+            self.memory,
+            self.checkpoint,
+            self.retired,
+            self.profile,
+        )
+        return self.checkpoint
+
+    def restore(self, snapshot: Snapshot) -> None:
+        snapshot.restore(self.registers, self.memory)
+        self.checkpoint = snapshot
+        self.halted = self.registers[IP] == self.STOP
+        self.retired = snapshot.retired
+        profile = copied(snapshot.profile)
+        self.profile = profile or Profile.empty(len(self.instr))
+
     @property
     def state(self) -> dict[str, Any]:
-        return {"registers": self.registers}
+        return {"registers": named(self.registers)}
 
     def read(self, reg: Register) -> int:
-        return self.registers[repr(reg)]
+        return self.registers[reg.index]
 
     def write(self, reg: Register, value: int) -> None:
-        match reg:
-            case "ze":
-                message = "ze is readonly"
-                raise SleepyError(message)
-            case _:
-                self.registers[repr(reg)] = value
+        self.registers[reg.index] = value
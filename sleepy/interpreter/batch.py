@@ -0,0 +1,209 @@
+from collections.abc import Sequence
+from typing import Any, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+from sleepy.asmik import AsmikUnit, IntegerData
+from sleepy.asmik.memory import Memory
+from sleepy.core import SleepyError
+
+from .decode import (
+    BRANCHES,
+    IP,
+    RA,
+    ZE,
+    Decoded,
+    Opcode,
+    decoded,
+    name_of,
+    registers_of,
+)
+from .memory import DataMemory
+from .step import Status, checked
+
+Lanes = NDArray[np.int64]
+Selection = NDArray[np.bool_] | slice
+
+UFUNCS: dict[Opcode, np.ufunc] = {
+    Opcode.ADDI: np.add,
+    Opcode.MULI: np.multiply,
+    Opcode.DIVI: np.floor_divide,
+    Opcode.REMI: np.remainder,
+    Opcode.SLTI: np.less,
+    Opcode.ORB: np.bitwise_or,
+    Opcode.ANDB: np.bitwise_and,
+    Opcode.XORB: np.bitwise_xor,
+}
+
+COMPARES: dict[Opcode, np.ufunc] = {
+    Opcode.BNE: np.not_equal,
+    Opcode.BLT: np.less,
+}
+
+
+class BatchInterpreter:
+
+    """
+    Asmik interpreter running one unit over many lanes at once.
+
+    Registers and data memory are `int64` arrays with a column per
+    lane, so an instruction is executed as a few NumPy operations
+    over all lanes standing at its address. Lanes with the lowest
+    ip go first and others wait, so lanes diverged on a `brn`
+    re-converge as soon as they reach the same block again.
+
+    Values wrap to 64 bits, so results of a lane match the results
+    of `AsmikInterpreter` taken modulo 2**64.
+    """
+
+    STOP = 666666666
+
+    def __init__(self) -> None:
+        self.code: list[Decoded] = []
+        self.registers: Lanes = np.zeros((RA + 1, 0), dtype=np.int64)
+        self.written = np.zeros((RA + 1, 0), dtype=np.bool_)
+        self.memory: Lanes = np.zeros((0, 0), dtype=np.int64)
+        self.running = np.zeros(0, dtype=np.bool_)
+        self.retired: Lanes = np.zeros(0, dtype=np.int64)
+        self.everyone: Lanes = np.zeros(0, dtype=np.int64)
+        self.dispatched = 0
+
+    def load(self, unit: AsmikUnit, inputs: Sequence[Memory]) -> None:
+        """
+        Load the code of `unit` into a lane per input.
+
+        Each lane starts with its own data memory, for example the
+        memory of the same program compiled with other constants.
+        An input with other code is rejected, as lanes share the code.
+        """
+        for lane, memory in enumerate(inputs):
+            if memory.instr != unit.memory.instr:
+                message = f"code of lane {lane} differs from the unit"
+                raise SleepyError(message)
+
+        self.code = [
+            wrapped_code(decoded(instr, i * 4))
+            for i, instr in enumerate(unit.memory.instr)
+        ]
+
+        lanes = len(inputs)
+        size = max(
+            [RA + 1]
+            + [max(registers_of(code), default=0) + 1 for code in self.code],
+        )
+        self.registers = np.zeros((size, lanes), dtype=np.int64)
+        self.registers[RA] = self.STOP
+        self.written = np.zeros((size, lanes), dtype=np.bool_)
+        self.written[[ZE, IP, RA]] = True
+
+        # the stack grows after the data
+        words = max(
+            DataMemory.CAPACITY,
+            *(DataMemory.words_of(memory) for memory in [unit.memory, *inputs]),
+        )
+        self.memory = np.zeros((words, lanes), dtype=np.int64)
+        for lane, memory in enumerate(inputs):
+            for addr, data in memory.stack.items():
+                value = cast(IntegerData, data).value
+                self.memory[addr >> 3, lane] = wrapped(value)
+
+        self.running = np.ones(lanes, dtype=np.bool_)
+        self.retired = np.zeros(lanes, dtype=np.int64)
+        self.everyone = np.arange(lanes)
+        self.dispatched = 0
+
+    def run(self, max_steps: int | None = None) -> Status:
+        checked(max_steps)
+        steps = 0
+        while self.running.any() and (max_steps is None or steps < max_steps):
+            self.step()
+            steps += 1
+        self.dispatched += steps
+        return Status.EXHAUSTED if self.running.any() else Status.HALTED
+
+    def step(self) -> None:
+        regs = self.registers
+        ip = int(regs[IP, self.running].min())
+
+        selected = self.running & (regs[IP] == ip)
+        sel: Selection = slice(None) if selected.all() else selected
+
+        code = self.code[ip >> 2]
+        regs[IP, sel] = ip + 4
+        self.retired[sel] += 1
+        if code.opcode == Opcode.HLT:
+            self.running[sel] = False
+        else:
+            self.execute(code, sel, ip)
+            self.running[sel] = regs[IP, sel] != self.STOP
+
+    def execute(self, code: Decoded, sel: Selection, ip: int) -> None:
+        regs = self.registers
+        match code.opcode:
+            case Opcode.ADDIM:
+                self.write(code.dst, sel, regs[code.lhs, sel] + code.rhs)
+            case Opcode.LOAD:
+                words = self.words(regs[code.lhs, sel] + code.rhs, ip)
+                self.write(code.dst, sel, self.memory[words, self.lanes(sel)])
+            case Opcode.STOR:
+                words = self.words(regs[code.lhs, sel] + code.dst, ip)
+                self.memory[words, self.lanes(sel)] = regs[code.rhs, sel]
+            case opcode if opcode in BRANCHES:
+                self.branch(code, sel)
+            case Opcode.DIVI | Opcode.REMI if not regs[code.rhs, sel].all():
+                message = f"integer division by zero at {ip:04d}"
+                raise ZeroDivisionError(message)
+            case opcode:
+                ufunc = UFUNCS[opcode]
+                values = ufunc(regs[code.lhs, sel], regs[code.rhs, sel])
+                self.write(code.dst, sel, values)
+
+    def branch(self, code: Decoded, sel: Selection) -> None:
+        regs = self.registers
+        lhs, rhs = regs[code.lhs, sel], regs[code.rhs, sel]
+        target: Lanes | int
+        match code.opcode:
+            case Opcode.BRN:
+                taken, target = lhs % 2 == 0, rhs
+            case Opcode.BRNI:
+                taken, target = lhs % 2 == 0, code.dst
+            case opcode:
+                taken, target = COMPARES[opcode](lhs, rhs), code.dst
+        regs[IP, sel] = np.where(taken, target, regs[IP, sel])
+
+    def write(self, reg: int, sel: Selection, values: Lanes) -> None:
+        self.registers[reg, sel] = values
+        self.written[reg, sel] = True
+
+    def words(self, addrs: Lanes, ip: int) -> Lanes:
+        limit = len(self.memory) * 8
+        if (addrs & 7).any() or addrs.min() < 0 or addrs.max() >= limit:
+            message = f"unaligned or out of range address at {ip:04d}"
+            raise SleepyError(message)
+        return addrs >> 3
+
+    def lanes(self, sel: Selection) -> Lanes:
+        if isinstance(sel, slice):
+            return self.everyone
+        return np.flatnonzero(sel)
+
+    def state(self, lane: int) -> dict[str, Any]:
+        return {
+            "registers": {
+                name_of(index): int(value)
+                for index, value in enumerate(self.registers[:, lane])
+                if self.written[index, lane]
+            },
+        }
+
+
+def wrapped(value: int) -> int:
+    """Wrap a value to a signed 64-bit word."""
+    return (value + 2**63) % 2**64 - 2**63
+
+
+def wrapped_code(code: Decoded) -> Decoded:
+    if code.opcode != Opcode.ADDIM:
+        return code
+    return code._replace(rhs=wrapped(code.rhs))
@@ -0,0 +1,160 @@
+from array import array
+from enum import Enum
+
+from sleepy.core import SleepyError
+
+
+class Policy(Enum):
+    LRU = "lru"
+    PLRU = "plru"
+
+
+class Cache:
+
+    """
+    Set-associative cache model.
+
+    Tags, dirty bits and replacement state live in flat arrays indexed
+    by `set * ways + way`, so an access allocates nothing. A miss is
+    served by the `lower` level or by memory after `memory` cycles.
+    Lines are allocated on writes too, and dirty lines are written
+    back to the lower level on eviction unless `write_back` is off,
+    in which case every write goes through. Each level counts the
+    cycles of accesses served through it, lower levels included.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        size: int,
+        ways: int,
+        line: int,
+        *,
+        policy: Policy = Policy.LRU,
+        write_back: bool = True,
+        latency: int = 1,
+        lower: "Cache | None" = None,
+        memory: int = 100,
+    ) -> None:
+        sets = size // (ways * line)
+        if any(n <= 0 or n & (n - 1) for n in (sets, ways, line)):
+            message = f"cache of {size} by {ways} ways of {line} bytes"
+            raise SleepyError(message + " is not a power of two in sets")
+
+        self.ways = ways
+        self.offset = line.bit_length() - 1
+        self.index = sets.bit_length() - 1
+        self.policy = policy
+        self.write_back = write_back
+        self.latency = latency
+        self.lower = lower
+        self.memory = memory
+
+        self.tags = array("q", [-1]) * (sets * ways)
+        self.dirty = bytearray(sets * ways)
+        self.stamps = array("Q", [0]) * (sets * ways)
+        self.tree = bytearray(sets * ways)
+        self.clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.writebacks = 0
+        self.cycles = 0
+
+    def access(self, addr: int, *, write: bool) -> int:
+        """Access a byte, tell how many cycles it took."""
+        block = addr >> self.offset
+        base = (block & ((1 << self.index) - 1)) * self.ways
+        tag = block >> self.index
+        cycles = self.latency
+
+        try:
+            slot = self.tags.index(tag, base, base + self.ways)
+        except ValueError:
+            self.misses += 1
+            slot = self.victim(base)
+            cycles += self.evicted(slot, base)
+            cycles += self.below(addr, write=False)
+            self.tags[slot] = tag
+        else:
+            self.hits += 1
+
+        self.touch(slot, base)
+        if write and self.write_back:
+            self.dirty[slot] = 1
+        elif write:
+            cycles += self.below(addr, write=True)
+        self.cycles += cycles
+        return cycles
+
+    def below(self, addr: int, *, write: bool) -> int:
+        if self.lower is None:
+            return self.memory
+        return self.lower.access(addr, write=write)
+
+    def evicted(self, slot: int, base: int) -> int:
+        if not self.dirty[slot]:
+            return 0
+        self.dirty[slot] = 0
+        self.writebacks += 1
+        block = self.tags[slot] << self.index | base // self.ways
+        return self.below(block << self.offset, write=True)
+
+    def victim(self, base: int) -> int:
+        tags = self.tags
+        for slot in range(base, base + self.ways):
+            if tags[slot] == -1:
+                return slot
+        if self.policy == Policy.LRU:
+            return self.least_recent(base)
+        return self.pseudo_least_recent(base)
+
+    def least_recent(self, base: int) -> int:
+        stamps = self.stamps
+        victim = base
+        for slot in range(base + 1, base + self.ways):
+            if stamps[slot] < stamps[victim]:
+                victim = slot
+        return victim
+
+    def pseudo_least_recent(self, base: int) -> int:
+        # tree bit 1 means the victim is in the upper half
+        tree, node, lo, hi = self.tree, 0, 0, self.ways
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if tree[base + node]:
+                node, lo = 2 * node + 2, mid
+            else:
+                node, hi = 2 * node + 1, mid
+        return base + lo
+
+    def touch(self, slot: int, base: int) -> None:
+        if self.policy == Policy.LRU:
+            self.clock += 1
+            self.stamps[slot] = self.clock
+            return
+
+        tree, node, lo, hi = self.tree, 0, 0, self.ways
+        way = slot - base
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if way < mid:
+                tree[base + node] = 1
+                node, hi = 2 * node + 1, mid
+            else:
+                tree[base + node] = 0
+                node, lo = 2 * node + 2, mid
+
+    def levels(self) -> list["Cache"]:
+        return [self] + (self.lower.levels() if self.lower else [])
+
+    def to_text(self) -> str:
+        text = ""
+        for level, cache in enumerate(self.levels(), start=1):
+            text += (
+                f"L{level}: "
+                f"hits {cache.hits}, "
+                f"misses {cache.misses}, "
+                f"writebacks {cache.writebacks}, "
+                f"cycles {cache.cycles}\n"
+            )
+        return text
@@ -0,0 +1,78 @@
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from time import perf_counter
+
+from .step import Status
+
+
+@dataclass
+class Latency:
+
+    """Timings of a single `run_async`, in seconds."""
+
+    slices: int = 0
+    busy: float = 0.0
+    """Time spent running slices."""
+    longest: float = 0.0
+    """Longest time the event loop was blocked by a slice."""
+    wall: float = 0.0
+    """Time from the start to the end, waits on the loop included."""
+
+    @property
+    def waited(self) -> float:
+        return self.wall - self.busy
+
+    def to_text(self) -> str:
+        return (
+            f"slices {self.slices}, "
+            f"busy {self.busy * 1000:.2f} ms, "
+            f"longest {self.longest * 1000:.2f} ms, "
+            f"waited {self.waited * 1000:.2f} ms\n"
+        )
+
+
+class Cooperative(ABC):
+
+    """
+    Runs an interpreter on an event loop without blocking it.
+
+    A program is executed in slices of fuel, the loop is given
+    control between them. Cancelling the task stops the run between
+    slices, so the interpreter can still be resumed with `run`.
+    """
+
+    QUANTUM = 4096
+
+    latency: Latency | None = None
+    """Timings of the last `run_async`."""
+
+    @abstractmethod
+    def run(self, max_steps: int | None = None) -> Status:
+        raise NotImplementedError
+
+    async def run_async(self, slice: int = QUANTUM) -> Status:  # noqa: A002
+        if slice <= 0:
+            # an empty slice never halts, so the task would never finish
+            message = f"slice must be positive, got {slice}"
+            raise ValueError(message)
+
+        latency = Latency()
+        self.latency = latency
+
+        start = perf_counter()
+        try:
+            while True:
+                began = perf_counter()
+                status = self.run(slice)
+                elapsed = perf_counter() - began
+
+                latency.slices += 1
+                latency.busy += elapsed
+                latency.longest = max(latency.longest, elapsed)
+
+                if status == Status.HALTED:
+                    return status
+                await asyncio.sleep(0)
+        finally:
+            latency.wall = perf_counter() - start
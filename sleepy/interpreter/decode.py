@@ -0,0 +1,215 @@
+from enum import IntEnum
+from typing import Any, NamedTuple, cast
+
+from sleepy.asmik import (
+    Addi,
+    Addim,
+    Andb,
+    Blt,
+    Bne,
+    Branch,
+    Brn,
+    Brni,
+    CompareBranch,
+    Divi,
+    Hlt,
+    Instruction,
+    Integer,
+    Load,
+    Muli,
+    Orb,
+    Register,
+    Remi,
+    Slti,
+    Stor,
+    Xorb,
+)
+from sleepy.asmik.instruction import BinRegOperation
+from sleepy.core import SleepyError
+
+ZE = Register.ze().index
+IP = Register.ip().index
+RA = Register.ra().index
+
+
+class Opcode(IntEnum):
+    ADDI = 0
+    ADDIM = 1
+    MULI = 2
+    DIVI = 3
+    REMI = 4
+    SLTI = 5
+    ORB = 6
+    ANDB = 7
+    XORB = 8
+    LOAD = 9
+    STOR = 10
+    BRN = 11
+    HLT = 12
+    BRNI = 13
+    BNE = 14
+    BLT = 15
+
+
+BINARY = {
+    Addi: Opcode.ADDI,
+    Muli: Opcode.MULI,
+    Divi: Opcode.DIVI,
+    Remi: Opcode.REMI,
+    Slti: Opcode.SLTI,
+    Orb: Opcode.ORB,
+    Andb: Opcode.ANDB,
+    Xorb: Opcode.XORB,
+}
+
+COMPARE = {
+    Bne: Opcode.BNE,
+    Blt: Opcode.BLT,
+}
+
+BRANCHES = frozenset(
+    {Opcode.BRN, Opcode.BRNI, Opcode.BNE, Opcode.BLT},
+)
+"""Opcodes that may change ip."""
+
+
+class Decoded(NamedTuple):
+
+    """
+    Decoded instruction.
+
+    Operands are register indices, except the `rhs` of `addim`
+    that is a resolved immediate value. Load keeps a base address
+    in `lhs` and an offset in `rhs`, stor keeps an offset in `dst`,
+    a base address in `lhs` and a value in `rhs`, brn keeps
+    a condition in `lhs` and a label in `rhs`. Branches
+    to an immediate keep its resolved address in `dst`, brni keeps
+    a condition in `lhs`, bne and blt compare `lhs` to `rhs`.
+    """
+
+    opcode: Opcode
+    dst: int
+    lhs: int
+    rhs: int
+
+
+def name_of(index: int) -> str:
+    return repr(Register.indexed(index))
+
+
+def named(registers: list[Any]) -> dict[str, int]:
+    return {
+        name_of(index): value
+        for index, value in enumerate(registers)
+        if value is not None
+    }
+
+
+def decoded(instr: Instruction, addr: int) -> Decoded:
+    code: Decoded
+    match instr:
+        case Branch():
+            code = decoded_branch(instr)
+        case Load() | Stor():
+            code = decoded_memory(instr)
+        case _:
+            code = decoded_operation(instr)
+
+    if writes_ze(code):
+        message = f"ze is readonly, but written at {addr:04d}: {instr!r}"
+        raise SleepyError(message)
+
+    return resolved(code, addr)
+
+
+def decoded_operation(instr: Instruction) -> Decoded:
+    match instr:
+        case Addim(dst, lhs, rhs):
+            value = cast(Integer, rhs).value
+            return Decoded(Opcode.ADDIM, dst.index, lhs.index, value)
+        case Hlt():
+            return Decoded(Opcode.HLT, ZE, ZE, ZE)
+        case BinRegOperation(dst, lhs, rhs):
+            opcode = BINARY[type(instr)]
+            return Decoded(opcode, dst.index, lhs.index, rhs.index)
+        case _:
+            raise NotImplementedError
+
+
+def decoded_memory(instr: Load | Stor) -> Decoded:
+    match instr:
+        case Load(dst, src_addr, offset):
+            value = cast(Integer, offset).value
+            return Decoded(Opcode.LOAD, dst.index, src_addr.index, value)
+        case Stor(dst_addr, src, offset):
+            value = cast(Integer, offset).value
+            return Decoded(Opcode.STOR, value, dst_addr.index, src.index)
+
+
+def decoded_branch(instr: Branch) -> Decoded:
+    match instr:
+        case Brn(cond, label):
+            return Decoded(Opcode.BRN, ZE, cond.index, label.index)
+        case Brni(cond, label):
+            target = cast(Integer, label).value
+            return Decoded(Opcode.BRNI, target, cond.index, ZE)
+        case CompareBranch(lhs, rhs, label):
+            target = cast(Integer, label).value
+            opcode = COMPARE[type(instr)]
+            return Decoded(opcode, target, lhs.index, rhs.index)
+        case _:
+            raise NotImplementedError
+
+
+def resolved(code: Decoded, addr: int) -> Decoded:
+    if code.opcode == Opcode.ADDIM and code.lhs == IP:
+        # ip is already advanced when instruction is executed
+        return Decoded(Opcode.ADDIM, code.dst, ZE, addr + 4 + code.rhs)
+    return code
+
+
+def writes_ze(code: Decoded) -> bool:
+    return destination_of(code) == ZE
+
+
+def destination_of(code: Decoded) -> int | None:
+    if code.opcode in BRANCHES or code.opcode in (Opcode.STOR, Opcode.HLT):
+        return None
+    return code.dst
+
+
+def registers_of(code: Decoded) -> tuple[int, ...]:
+    return cast(tuple[int, ...], code[OPERANDS[code.opcode]])
+
+
+def sources_of(code: Decoded) -> tuple[int, ...]:
+    return cast(tuple[int, ...], code[SOURCES[code.opcode]])
+
+
+OPERANDS = tuple(
+    {
+        Opcode.ADDIM: slice(1, 3),
+        Opcode.LOAD: slice(1, 3),
+        Opcode.STOR: slice(2, 4),
+        Opcode.BRN: slice(2, 4),
+        Opcode.HLT: slice(0, 0),
+        Opcode.BRNI: slice(2, 3),
+        Opcode.BNE: slice(2, 4),
+        Opcode.BLT: slice(2, 4),
+    }.get(opcode, slice(1, 4))
+    for opcode in Opcode
+)
+"""Fields of a decoded instruction that are registers, by opcode."""
+
+SOURCES = tuple(
+    {
+        Opcode.ADDIM: slice(2, 3),
+        Opcode.LOAD: slice(2, 3),
+        Opcode.HLT: slice(0, 0),
+        Opcode.BRNI: slice(2, 3),
+    }.get(opcode, slice(2, 4))
+    for opcode in Opcode
+)
+"""Fields of a decoded instruction that are read registers, by opcode."""
+
+OPCODES = tuple(Opcode)
@@ -0,0 +1,478 @@
+from collections.abc import Callable
+from typing import Any, override
+
+from sleepy.asmik import AsmikUnit
+
+from .cooperative import Cooperative
+from .decode import (
+    IP,
+    RA,
+    ZE,
+    Decoded,
+    Opcode,
+    decoded,
+    named,
+    registers_of,
+)
+from .fusion import FusionStats, fused
+from .image import Image
+from .memory import Allocator, DataMemory
+from .snapshot import Snapshot
+from .step import Halt, Status, Step, checked
+
+Factory = Callable[[list[Any], DataMemory, Decoded, int], Step]
+
+
+class DispatchInterpreter(Cooperative):
+
+    """
+    Table-dispatched Asmik interpreter.
+
+    Instructions are decoded once on `load` and bound into
+    closures over the register file, so the `run` loop is just
+    an indexed call. A register is `None` until it is written.
+    Common instruction sequences are fused into a single step
+    unless `fuse` is off, see `fusion` for how often they ran.
+
+    Fuel of `run` is counted in dispatched steps, its countdown is
+    the loop itself, so an unlimited run is cut into long slices.
+    """
+
+    STOP = 666666666
+    SLICE = 1 << 20
+
+    def __init__(
+        self,
+        memory: Allocator = DataMemory.allocated,
+        *,
+        fuse: bool = True,
+    ) -> None:
+        self.registers: list[Any] = []
+        self.allocate = memory
+        self.memory = DataMemory.allocated(0)
+        self.code: list[Decoded] = []
+        self.steps: list[Step] = []
+        self.fuse = fuse
+        self.fusion = FusionStats()
+        self.dispatched = 0
+        self.halted = False
+        self.checkpoint: Snapshot | None = None
+
+    def load(self, unit: AsmikUnit) -> None:
+        memory = self.allocate(DataMemory.words_of(unit.memory))
+        memory.fill(unit.memory)
+
+        code = [
+            decoded(instr, i * 4) for i, instr in enumerate(unit.memory.instr)
+        ]
+
+        self.load_code(code, memory)
+
+    def load_image(self, image: Image) -> None:
+        memory = self.allocate(len(image.data))
+        memoryview(memory.words)[: len(image.data)] = image.data
+
+        self.load_code(image.decoded(), memory)
+
+    def load_code(self, code: list[Decoded], memory: DataMemory) -> None:
+        self.memory = memory
+        self.code = code
+
+        size = max(
+            [RA + 1]
+            + [max(registers_of(code), default=0) + 1 for code in self.code],
+        )
+        self.registers = [None] * size
+        self.registers[ZE] = 0
+        self.registers[IP] = 0
+        self.registers[RA] = self.STOP
+
+        self.steps = [
+            bound(self.registers, self.memory, code, (i + 1) * 4)
+            for i, code in enumerate(self.code)
+        ]
+
+        self.dispatched = 0
+        self.halted = False
+        self.checkpoint = None
+        self.fusion = FusionStats()
+        if self.fuse:
+            self.fusion = fused(
+                self.code,
+                self.steps,
+                self.registers,
+                self.memory,
+            )
+
+    @override
+    def run(self, max_steps: int | None = None) -> Status:
+        checked(max_steps)
+        budget = max_steps
+        while not self.halted:
+            count = self.SLICE if budget is None else min(budget, self.SLICE)
+            done, self.halted = self.dispatch(count)
+            if budget is not None and not self.halted:
+                budget -= done
+                if budget == 0:
+                    return Status.EXHAUSTED
+        return Status.HALTED
+
+    def dispatch(self, count: int) -> tuple[int, bool]:
+        """Dispatch at most `count` steps, tell how many and if halted."""
+        steps = self.steps
+        stop = self.STOP
+        ip = self.registers[IP]
+        done, halted = count, False
+        i = 0
+        try:
+            for i in range(count):
+                if ip == stop:
+                    done = i
+                    break
+                ip = steps[ip >> 2]()
+        except Halt as halt:
+            ip, done, halted = halt.ip, i + 1, True
+        self.registers[IP] = ip
+        self.dispatched += done
+        return done, halted or ip == stop
+
+    @property
+    def retired(self) -> int:
+        return self.dispatched + self.fusion.saved
+
+    def snapshot(self) -> Snapshot:
+        self.checkpoint = Snapshot.taken(
+            self.registers,
+            self.memory,
+            self.checkpoint,
+            self.retired,
+        )
+        return self.checkpoint
+
+    def restore(self, snapshot: Snapshot) -> None:
+        snapshot.restore(self.registers, self.memory)
+        self.checkpoint = snapshot
+        self.halted = self.registers[IP] == self.STOP
+        # fusion and traces keep counting, so the rest is made up here
+        self.dispatched += snapshot.retired - self.retired
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {"registers": named(self.registers)}
+
+
+def bound(
+    regs: list[Any],
+    memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    step = HANDLERS[code.opcode](regs, memory, code, nxt)
+    if IP not in registers_of(code):
+        return step
+    return touching_ip(step, regs, nxt)
+
+
+def touching_ip(step: Step, regs: list[Any], nxt: int) -> Step:
+    def execute() -> int:
+        regs[IP] = nxt
+        target = step()
+        return regs[IP] if target == nxt else target
+
+    return execute
+
+
+def addi(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] + regs[rhs]
+        return nxt
+
+    return execute
+
+
+def addim(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, imm = code.dst, code.lhs, code.rhs
+
+    def movi() -> int:
+        regs[d] = imm
+        return nxt
+
+    def mov() -> int:
+        regs[d] = regs[lhs]
+        return nxt
+
+    def execute() -> int:
+        regs[d] = regs[lhs] + imm
+        return nxt
+
+    if lhs == ZE:
+        return movi
+    if imm == 0:
+        return mov
+    return execute
+
+
+def muli(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] * regs[rhs]
+        return nxt
+
+    return execute
+
+
+def divi(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] // regs[rhs]
+        return nxt
+
+    return execute
+
+
+def remi(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] % regs[rhs]
+        return nxt
+
+    return execute
+
+
+def slti(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = 1 if regs[lhs] < regs[rhs] else 0
+        return nxt
+
+    return execute
+
+
+def orb(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] | regs[rhs]
+        return nxt
+
+    return execute
+
+
+def andb(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] & regs[rhs]
+        return nxt
+
+    return execute
+
+
+def xorb(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        regs[d] = regs[lhs] ^ regs[rhs]
+        return nxt
+
+    return execute
+
+
+def load(
+    regs: list[Any],
+    memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    d, base, offset = code.dst, code.lhs, code.rhs
+    words, limit, wide = memory.words, memory.limit, memory.WIDE
+    far = memory.load
+
+    def execute() -> int:
+        a = regs[base] + offset
+        if 0 <= a < limit and not a & 7:
+            value = words[a >> 3]
+            regs[d] = value if value != wide else far(a)
+        else:
+            regs[d] = far(a)
+        return nxt
+
+    def constant() -> int:
+        value = words[offset >> 3]
+        regs[d] = value if value != wide else far(offset)
+        return nxt
+
+    if base == ZE and 0 <= offset < limit and not offset & 7:
+        return constant
+    return execute
+
+
+def stor(
+    regs: list[Any],
+    memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    offset, base, src = code.dst, code.lhs, code.rhs
+    words, limit, wide = memory.words, memory.limit, memory.WIDE
+    far, dirty, bits = memory.store, memory.dirty, memory.PAGE_BITS
+
+    def execute() -> int:
+        a, value = regs[base] + offset, regs[src]
+        if 0 <= a < limit and not a & 7 and wide < value < -wide:
+            words[a >> 3] = value
+            dirty.add(a >> bits)
+        else:
+            far(a, value)
+        return nxt
+
+    return execute
+
+
+def brn(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    cond, label = code.lhs, code.rhs
+
+    def jump() -> int:
+        return regs[label]
+
+    def execute() -> int:
+        return regs[label] if regs[cond] % 2 == 0 else nxt
+
+    if cond == ZE:
+        return jump
+    return execute
+
+
+def brni(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    target, cond = code.dst, code.lhs
+
+    def jump() -> int:
+        return target
+
+    def execute() -> int:
+        return target if regs[cond] % 2 == 0 else nxt
+
+    if cond == ZE:
+        return jump
+    return execute
+
+
+def bne(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    target, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        return target if regs[lhs] != regs[rhs] else nxt
+
+    return execute
+
+
+def blt(
+    regs: list[Any],
+    _memory: DataMemory,
+    code: Decoded,
+    nxt: int,
+) -> Step:
+    target, lhs, rhs = code.dst, code.lhs, code.rhs
+
+    def execute() -> int:
+        return target if regs[lhs] < regs[rhs] else nxt
+
+    return execute
+
+
+def hlt(
+    _regs: list[Any],
+    _memory: DataMemory,
+    _code: Decoded,
+    nxt: int,
+) -> Step:
+    def execute() -> int:
+        raise Halt(nxt)
+
+    return execute
+
+
+HANDLERS: dict[Opcode, Factory] = {
+    Opcode.ADDI: addi,
+    Opcode.ADDIM: addim,
+    Opcode.MULI: muli,
+    Opcode.DIVI: divi,
+    Opcode.REMI: remi,
+    Opcode.SLTI: slti,
+    Opcode.ORB: orb,
+    Opcode.ANDB: andb,
+    Opcode.XORB: xorb,
+    Opcode.LOAD: load,
+    Opcode.STOR: stor,
+    Opcode.BRN: brn,
+    Opcode.HLT: hlt,
+    Opcode.BRNI: brni,
+    Opcode.BNE: bne,
+    Opcode.BLT: blt,
+}
@@ -0,0 +1,333 @@
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from .decode import IP, ZE, Decoded, Opcode, registers_of
+from .memory import DataMemory
+from .step import Step
+
+Codes = Sequence[Decoded]
+
+Counter = list[int]
+
+
+@dataclass
+class Superinstruction:
+
+    """
+    Fused sequence of instructions.
+
+    A fused step is installed only at the address of the first
+    instruction, so branches into the middle of the sequence still
+    execute the original instructions one by one. The counter of
+    a step counts runs of the whole sequence, a branch taken out of
+    its middle retires only the instructions before it.
+    """
+
+    name: str
+    opcodes: tuple[Opcode, ...]
+    matches: Callable[[Codes], bool]
+    factory: Callable[[list[Any], DataMemory, Codes, int, Counter], Step]
+
+    def matching(self, codes: Codes) -> bool:
+        return (
+            len(codes) == len(self.opcodes)
+            and all(
+                code.opcode == opcode
+                for code, opcode in zip(codes, self.opcodes, strict=True)
+            )
+            and all(IP not in registers_of(code) for code in codes)
+            and self.matches(codes)
+        )
+
+
+@dataclass
+class FusionStats:
+    static: dict[str, int] = field(default_factory=dict)
+    dynamic: dict[str, Counter] = field(default_factory=dict)
+    lengths: dict[str, int] = field(default_factory=dict)
+    sites: dict[int, int] = field(default_factory=dict)
+    """Lengths of fused steps by their addresses."""
+
+    @property
+    def fused(self) -> int:
+        """Count of dynamic instructions executed by whole fused runs."""
+        return sum(
+            counter[0] * self.lengths[name]
+            for name, counter in self.dynamic.items()
+        )
+
+    @property
+    def saved(self) -> int:
+        """Count of dispatches saved by fusion."""
+        return sum(
+            counter[0] * (self.lengths[name] - 1)
+            for name, counter in self.dynamic.items()
+        )
+
+    def to_text(self) -> str:
+        text = ""
+        for name, counter in self.dynamic.items():
+            text += (
+                f"{name}: "
+                f"static {self.static[name]}, "
+                f"dynamic {counter[0]}\n"
+            )
+        text += f"fused {self.fused}, saved {self.saved}\n"
+        return text
+
+
+def fused(
+    code: Codes,
+    steps: list[Step],
+    regs: list[Any],
+    memory: DataMemory,
+) -> FusionStats:
+    stats = FusionStats()
+    for superinstruction in SUPERINSTRUCTIONS:
+        stats.static[superinstruction.name] = 0
+        stats.dynamic[superinstruction.name] = [0]
+        stats.lengths[superinstruction.name] = len(superinstruction.opcodes)
+
+    for i in range(len(code)):
+        for superinstruction in SUPERINSTRUCTIONS:
+            codes = code[i : i + len(superinstruction.opcodes)]
+            if not superinstruction.matching(codes):
+                continue
+            steps[i] = superinstruction.factory(
+                regs,
+                memory,
+                codes,
+                (i + len(codes)) * 4,
+                stats.dynamic[superinstruction.name],
+            )
+            stats.static[superinstruction.name] += 1
+            stats.sites[i * 4] = len(codes)
+            break
+
+    return stats
+
+
+def add_const(
+    regs: list[Any],
+    _memory: DataMemory,
+    codes: Codes,
+    nxt: int,
+    counter: Counter,
+) -> Step:
+    """`addim t, ze, k` and `addi d, x, t`."""
+    t, k, d = codes[0].dst, codes[0].rhs, codes[1].dst
+    x = codes[1].lhs if codes[1].rhs == t else codes[1].rhs
+
+    def execute() -> int:
+        counter[0] += 1
+        regs[t] = k
+        regs[d] = regs[x] + k
+        return nxt
+
+    return execute
+
+
+def push_word(
+    regs: list[Any],
+    memory: DataMemory,
+    codes: Codes,
+    nxt: int,
+    counter: Counter,
+) -> Step:
+    """`stor b, x, o` and `addim b, b, n`."""
+    x, o, b, n = codes[0].rhs, codes[0].dst, codes[1].dst, codes[1].rhs
+    store = storing(memory)
+
+    def execute() -> int:
+        counter[0] += 1
+        a = regs[b]
+        store(a + o, regs[x])
+        regs[b] = a + n
+        return nxt
+
+    return execute
+
+
+def push_pair(
+    regs: list[Any],
+    memory: DataMemory,
+    codes: Codes,
+    nxt: int,
+    counter: Counter,
+) -> Step:
+    """`stor b, x, o`, `stor b, y, p` and `addim b, b, n`."""
+    x, o, y, p = codes[0].rhs, codes[0].dst, codes[1].rhs, codes[1].dst
+    b, n = codes[2].dst, codes[2].rhs
+    store = storing(memory)
+
+    def execute() -> int:
+        counter[0] += 1
+        a = regs[b]
+        store(a + o, regs[x])
+        store(a + p, regs[y])
+        regs[b] = a + n
+        return nxt
+
+    return execute
+
+
+def pop_word(
+    regs: list[Any],
+    memory: DataMemory,
+    codes: Codes,
+    nxt: int,
+    counter: Counter,
+) -> Step:
+    """`addim b, b, n` and `load x, b, o`."""
+    b, n, x, o = codes[0].dst, codes[0].rhs, codes[1].dst, codes[1].rhs
+    load = loading(memory)
+
+    def execute() -> int:
+        counter[0] += 1
+        a = regs[b] + n
+        regs[b] = a
+        regs[x] = load(a + o)
+        return nxt
+
+    return execute
+
+
+def pop_pair(
+    regs: list[Any],
+    memory: DataMemory,
+    codes: Codes,
+    nxt: int,
+    counter: Counter,
+) -> Step:
+    """`addim b, b, n`, `load x, b, o` and `load y, b, p`."""
+    b, n = codes[0].dst, codes[0].rhs
+    x, o, y, p = codes[1].dst, codes[1].rhs, codes[2].dst, codes[2].rhs
+    load = loading(memory)
+
+    def execute() -> int:
+        counter[0] += 1
+        a = regs[b] + n
+        regs[b] = a
+        regs[x] = load(a + o)
+        regs[y] = load(a + p)
+        return nxt
+
+    return execute
+
+
+def blt_jump(
+    regs: list[Any],
+    _memory: DataMemory,
+    codes: Codes,
+    _nxt: int,
+    counter: Counter,
+) -> Step:
+    """`blt l, r, then` and `brni ze, else`."""
+    lhs, rhs, then = codes[0].lhs, codes[0].rhs, codes[0].dst
+    other = codes[1].dst
+
+    def execute() -> int:
+        if regs[lhs] < regs[rhs]:
+            return then
+        counter[0] += 1
+        return other
+
+    return execute
+
+
+def storing(memory: DataMemory) -> Callable[[int, int], None]:
+    """Store as `memory` does, with its fields bound once."""
+    words, limit, wide = memory.words, memory.limit, memory.WIDE
+    far, dirty, bits = memory.store, memory.dirty, memory.PAGE_BITS
+
+    def store(a: int, value: int) -> None:
+        if 0 <= a < limit and not a & 7 and wide < value < -wide:
+            words[a >> 3] = value
+            dirty.add(a >> bits)
+        else:
+            far(a, value)
+
+    return store
+
+
+def loading(memory: DataMemory) -> Callable[[int], int]:
+    """Load as `memory` does, with its fields bound once."""
+    words, limit, wide = memory.words, memory.limit, memory.WIDE
+    far = memory.load
+
+    def load(a: int) -> int:
+        if 0 <= a < limit and not a & 7:
+            value = words[a >> 3]
+            return value if value != wide else far(a)
+        return far(a)
+
+    return load
+
+
+def is_add_const(codes: Codes) -> bool:
+    movi, addi = codes
+    return movi.lhs == ZE and movi.dst in (addi.lhs, addi.rhs)
+
+
+def is_push(codes: Codes) -> bool:
+    *stores, bump = codes
+    return all(stor.lhs == bump.dst for stor in stores) and is_bump(bump)
+
+
+def is_pop(codes: Codes) -> bool:
+    bump, *loads = codes
+    # a load into the base moves the rest, unless it is the last one
+    return (
+        all(load.lhs == bump.dst for load in loads)
+        and all(load.dst != bump.dst for load in loads[:-1])
+        and is_bump(bump)
+    )
+
+
+def is_bump(addim: Decoded) -> bool:
+    return addim.lhs == addim.dst
+
+
+def is_blt_jump(codes: Codes) -> bool:
+    return codes[1].lhs == ZE
+
+
+SUPERINSTRUCTIONS = [
+    Superinstruction(
+        "add-const",
+        (Opcode.ADDIM, Opcode.ADDI),
+        is_add_const,
+        add_const,
+    ),
+    Superinstruction(
+        "push-pair",
+        (Opcode.STOR, Opcode.STOR, Opcode.ADDIM),
+        is_push,
+        push_pair,
+    ),
+    Superinstruction(
+        "push-word",
+        (Opcode.STOR, Opcode.ADDIM),
+        is_push,
+        push_word,
+    ),
+    Superinstruction(
+        "pop-pair",
+        (Opcode.ADDIM, Opcode.LOAD, Opcode.LOAD),
+        is_pop,
+        pop_pair,
+    ),
+    Superinstruction(
+        "pop-word",
+        (Opcode.ADDIM, Opcode.LOAD),
+        is_pop,
+        pop_word,
+    ),
+    Superinstruction(
+        "blt-jump",
+        (Opcode.BLT, Opcode.BRNI),
+        is_blt_jump,
+        blt_jump,
+    ),
+]
@@ -0,0 +1,347 @@
+import mmap
+import struct
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+
+from sleepy.asmik import (
+    Addim,
+    AsmikUnit,
+    Branch,
+    Brn,
+    Brni,
+    CompareBranch,
+    Hlt,
+    Instruction,
+    Integer,
+    IntegerData,
+    Load,
+    Register,
+    Stor,
+)
+from sleepy.asmik.argument import IMMEDIATE, Immediate, fits
+from sleepy.asmik.instruction import BinRegOperation
+from sleepy.asmik.memory import Memory
+from sleepy.core import SleepyError
+
+from .decode import (
+    BINARY,
+    BRANCHES,
+    COMPARE,
+    OPCODES,
+    ZE,
+    Decoded,
+    Opcode,
+    resolved,
+    writes_ze,
+)
+from .memory import DataMemory
+
+MAGIC = b"SLPYIMG\0"
+VERSION = 6
+
+HEADER = struct.Struct("<8sHxxIII")
+"""Magic, version, sizes of the pool, the data and the text."""
+
+POOLED = 0x80
+"""Flag of an opcode with an immediate from the constant pool."""
+
+REGISTER = 16
+CONSTANT = 16
+"""Size of a constant pool entry in bytes."""
+
+SIGNED = frozenset({Opcode.ADDIM, Opcode.LOAD, Opcode.STOR})
+"""Opcodes with a signed immediate `rhs`."""
+
+TARGETED = BRANCHES - {Opcode.BRN}
+"""Opcodes of branches to an immediate target."""
+
+Binary = Callable[[Register, Register, Register], Instruction]
+
+INSTRUCTIONS: dict[Opcode, Binary] = {
+    opcode: kind for kind, opcode in BINARY.items()
+}
+
+Compare = Callable[[Register, Register, Immediate], CompareBranch]
+
+COMPARES: dict[Opcode, Compare] = {
+    opcode: kind for kind, opcode in COMPARE.items()
+}
+
+Words = array[int] | memoryview
+
+
+class ConstantPool:
+
+    """Immediates that do not fit into an instruction word."""
+
+    def __init__(self, values: list[int] | None = None) -> None:
+        self.values = values if values is not None else []
+        self.indices = {value: i for i, value in enumerate(self.values)}
+
+    def index(self, value: int) -> int:
+        if value not in self.indices:
+            self.indices[value] = len(self.values)
+            self.values.append(value)
+        return self.indices[value]
+
+
+def encoded(instr: Instruction, pool: ConstantPool) -> int:
+    """
+    Encode an instruction into a 64-bit word.
+
+    Opcode takes the low byte, then go 16-bit `dst` and `lhs` register
+    indices and a 24-bit `rhs`. The `rhs` of `addim` is a signed
+    immediate, or an index in the constant pool if the opcode has
+    the `POOLED` flag. A branch to an immediate keeps the index of
+    its target instruction, in `rhs` for brni and in `dst` for
+    compare and branch ones, or an index of the target address in
+    the constant pool with the `POOLED` flag if the target is too far.
+    Offsets of load and stor are signed `rhs` immediates, so stor
+    keeps its value in `dst`. Other operands are laid out as in
+    `Decoded`.
+    """
+    match instr:
+        case Addim():
+            return encoded_addim(instr, pool)
+        case Load() | Stor():
+            return encoded_access(instr)
+        case Branch():
+            return encoded_branch(instr, pool)
+        case Hlt():
+            ze = Register.ze()
+            return word(Opcode.HLT, ze, ze, ze)
+        case BinRegOperation(dst, lhs, rhs):
+            return word(BINARY[type(instr)], dst, lhs, rhs)
+        case _:
+            raise NotImplementedError
+
+
+def encoded_addim(instr: Addim, pool: ConstantPool) -> int:
+    dst, lhs, rhs = instr.dst, instr.lhs, instr.rhs
+    if not isinstance(rhs, Integer):
+        message = f"can not encode unresolved {instr!r}"
+        raise SleepyError(message)
+    if fits(rhs.value):
+        return word(Opcode.ADDIM, dst, lhs, rhs.value)
+    return word(Opcode.ADDIM | POOLED, dst, lhs, pool.index(rhs.value))
+
+
+def encoded_access(instr: Load | Stor) -> int:
+    offset = instr.offset
+    if not isinstance(offset, Integer) or not fits(offset.value):
+        message = f"can not encode an offset of {instr!r}"
+        raise SleepyError(message)
+    if isinstance(instr, Load):
+        return word(Opcode.LOAD, instr.dst, instr.src_addr, offset.value)
+    return word(Opcode.STOR, instr.src, instr.dst_addr, offset.value)
+
+
+def encoded_branch(instr: Branch, pool: ConstantPool) -> int:
+    ze = Register.ze()
+    match instr:
+        case Brn(cond, label):
+            return word(Opcode.BRN, ze, cond, label)
+        case Brni(cond, _):
+            index = target_of(instr)
+            if index >> IMMEDIATE:
+                pooled = pool.index(index * 4)
+                return word(Opcode.BRNI | POOLED, ze, cond, pooled)
+            return word(Opcode.BRNI, ze, cond, index)
+        case CompareBranch(lhs, rhs, _):
+            opcode, index = COMPARE[type(instr)], target_of(instr)
+            if index >> REGISTER:
+                pooled = pool.index(index * 4)
+                return word(opcode | POOLED, pooled, lhs, rhs)
+            return word(opcode, index, lhs, rhs)
+        case _:
+            raise NotImplementedError
+
+
+def target_of(instr: Brni | CompareBranch) -> int:
+    """Tell the index of the instruction a branch jumps to."""
+    label = instr.label
+    if not isinstance(label, Integer):
+        message = f"can not encode unresolved {instr!r}"
+        raise SleepyError(message)
+    if label.value < 0 or label.value & 3:
+        message = f"can not encode a misaligned target of {instr!r}"
+        raise SleepyError(message)
+    return label.value >> 2
+
+
+def word(
+    opcode: int,
+    dst: Register | int,
+    lhs: Register,
+    rhs: Register | int,
+) -> int:
+    if isinstance(dst, Register):
+        dst = dst.index
+    if max(dst, lhs.index) >> REGISTER:
+        message = f"too many registers to encode {dst!r}, {lhs!r}"
+        raise SleepyError(message)
+    if isinstance(rhs, Register):
+        rhs = rhs.index
+    return (
+        opcode
+        | dst << 8
+        | lhs.index << (8 + REGISTER)
+        | (rhs & ((1 << IMMEDIATE) - 1)) << (8 + 2 * REGISTER)
+    )
+
+
+def fields(word: int, pool: list[int]) -> Decoded:
+    opcode = word & 0xFF
+    dst = word >> 8 & ((1 << REGISTER) - 1)
+    lhs = word >> (8 + REGISTER) & ((1 << REGISTER) - 1)
+    rhs = word >> (8 + 2 * REGISTER)
+    if OPCODES[opcode & ~POOLED] in TARGETED:
+        return branch_fields(opcode, dst, lhs, rhs, pool)
+    if opcode & POOLED:
+        return Decoded(OPCODES[opcode & ~POOLED], dst, lhs, pool[rhs])
+    if opcode in SIGNED and rhs >> (IMMEDIATE - 1):
+        rhs -= 1 << IMMEDIATE
+    if opcode == Opcode.STOR:
+        return Decoded(Opcode.STOR, rhs, lhs, dst)
+    return Decoded(OPCODES[opcode], dst, lhs, rhs)
+
+
+def branch_fields(
+    opcode: int,
+    dst: int,
+    lhs: int,
+    rhs: int,
+    pool: list[int],
+) -> Decoded:
+    """Put the target address of a branch into `dst`, as decoded."""
+    kind = OPCODES[opcode & ~POOLED]
+    if kind == Opcode.BRNI:
+        target = pool[rhs] if opcode & POOLED else rhs * 4
+        return Decoded(kind, target, lhs, ZE)
+    target = pool[dst] if opcode & POOLED else dst * 4
+    return Decoded(kind, target, lhs, rhs)
+
+
+def instruction_of(code: Decoded) -> Instruction:
+    reg = Register.indexed
+    lhs = reg(code.lhs)
+    match code.opcode:
+        case Opcode.ADDIM:
+            return Addim(reg(code.dst), lhs, Integer(code.rhs))
+        case Opcode.LOAD:
+            return Load(reg(code.dst), lhs, Integer(code.rhs))
+        case Opcode.STOR:
+            return Stor(lhs, reg(code.rhs), Integer(code.dst))
+        case opcode if opcode in BRANCHES:
+            return branch_of(code)
+        case Opcode.HLT:
+            return Hlt()
+        case opcode:
+            return INSTRUCTIONS[opcode](reg(code.dst), lhs, reg(code.rhs))
+
+
+def branch_of(code: Decoded) -> Branch:
+    reg = Register.indexed
+    match code.opcode:
+        case Opcode.BRN:
+            return Brn(reg(code.lhs), reg(code.rhs))
+        case Opcode.BRNI:
+            return Brni(reg(code.lhs), Integer(code.dst))
+        case opcode:
+            label = Integer(code.dst)
+            return COMPARES[opcode](reg(code.lhs), reg(code.rhs), label)
+
+
+@dataclass
+class Image:
+
+    """
+    Binary image of a unit.
+
+    A header is followed by the constant pool of 128-bit integers,
+    the data segment of 64-bit words with `Memory.stack` and the
+    text segment of encoded instructions.
+    """
+
+    pool: list[int]
+    data: Words
+    text: Words
+
+    @staticmethod
+    def encoded(unit: AsmikUnit) -> "Image":
+        pool = ConstantPool()
+        text = array(
+            "Q",
+            (encoded(instr, pool) for instr in unit.memory.instr),
+        )
+
+        data = array("q", bytes(DataMemory.words_of(unit.memory) * 8))
+        for addr, cell in unit.memory.stack.items():
+            value = cast(IntegerData, cell).value
+            if addr & 7 or not -(2**63) <= value < 2**63:
+                message = f"can not encode data {value} at {addr:04d}"
+                raise SleepyError(message)
+            data[addr >> 3] = value
+
+        return Image(pool.values, data, text)
+
+    def save(self, path: Path) -> None:
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            len(self.pool),
+            len(self.data),
+            len(self.text),
+        )
+        with path.open("wb") as file:
+            file.write(header)
+            for value in self.pool:
+                file.write(value.to_bytes(CONSTANT, "little", signed=True))
+            file.write(self.data)
+            file.write(self.text)
+
+    @staticmethod
+    def mapped(path: Path) -> "Image":
+        with path.open("rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, pool, data, text = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            message = f"{path} is not an image of version {VERSION}"
+            raise SleepyError(message)
+
+        view = memoryview(buffer)
+        start = HEADER.size
+        values = [
+            int.from_bytes(view[i : i + CONSTANT], "little", signed=True)
+            for i in range(start, start + pool * CONSTANT, CONSTANT)
+        ]
+        start += pool * CONSTANT
+        words = view[start : start + data * 8].cast("q")
+        start += data * 8
+        code = view[start : start + text * 8].cast("Q")
+        return Image(values, words, code)
+
+    def decoded(self) -> list[Decoded]:
+        """Decode the text for execution, as `decoded` does."""
+        codes = []
+        for i, word in enumerate(self.text):
+            code = fields(word, self.pool)
+            if writes_ze(code):
+                instr = instruction_of(code)
+                message = f"ze is readonly, but written at {i * 4:04d}: "
+                raise SleepyError(message + repr(instr))
+            codes.append(resolved(code, i * 4))
+        return codes
+
+    def unit(self) -> AsmikUnit:
+        memory = Memory()
+        for i, value in enumerate(self.data):
+            memory.stack[i * 8] = IntegerData(value)
+        memory.stack_pointer = len(self.data) * 8
+        for word in self.text:
+            memory.instr.append(instruction_of(fields(word, self.pool)))
+        return AsmikUnit(memory)
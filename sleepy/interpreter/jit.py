@@ -0,0 +1,320 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, cast, override
+
+from sleepy.asmik import AsmikUnit
+
+from .decode import BRANCHES, IP, ZE, Decoded, Opcode, registers_of
+from .dispatch import DispatchInterpreter
+from .image import Image
+from .memory import Allocator, DataMemory
+from .step import Step
+
+if TYPE_CHECKING:
+    from types import CodeType
+
+COMPILED, ENTERED, EXITED, RETIRED = range(4)
+
+
+@dataclass
+class JitStats:
+    counters: list[int] = field(default_factory=lambda: [0, 0, 0, 0])
+
+    @property
+    def compiled(self) -> int:
+        """Count of traces compiled from source."""
+        return self.counters[COMPILED]
+
+    @property
+    def entered(self) -> int:
+        """Count of entries into compiled traces."""
+        return self.counters[ENTERED]
+
+    @property
+    def exited(self) -> int:
+        """Count of side exits on guard failures."""
+        return self.counters[EXITED]
+
+    @property
+    def retired(self) -> int:
+        """Count of instructions executed inside traces."""
+        return self.counters[RETIRED]
+
+
+class JitInterpreter(DispatchInterpreter):
+
+    """
+    Asmik interpreter with a tracing JIT.
+
+    Taken branches count hits of their targets. A target that
+    reaches `threshold` hits gets a trace: straight-line code from
+    it, followed through constant jumps and with guards on
+    conditional branches, is generated as a Python function with
+    registers in locals. The trace replaces the step at its entry,
+    and returns the ip to continue with on an exit, so the
+    dispatch loop takes over on any guard failure. A trace exits on
+    a jump back to its entry too, so it stays a single step of fuel.
+    """
+
+    THRESHOLD = 64
+
+    def __init__(
+        self,
+        memory: Allocator = DataMemory.allocated,
+        *,
+        fuse: bool = True,
+        threshold: int = THRESHOLD,
+    ) -> None:
+        super().__init__(memory, fuse=fuse)
+        self.threshold = threshold
+        self.jit = JitStats()
+        self.cache: dict[
+            int,
+            tuple[AsmikUnit | Image, dict[int, CodeType | None]],
+        ] = {}
+        self.traces: dict[int, CodeType | None] = {}
+
+    @property
+    @override
+    def retired(self) -> int:
+        return super().retired - self.jit.entered + self.jit.retired
+
+    @override
+    def load(self, unit: AsmikUnit) -> None:
+        super().load(unit)
+        self.attach(unit)
+
+    @override
+    def load_image(self, image: Image) -> None:
+        super().load_image(image)
+        self.attach(image)
+
+    def attach(self, program: AsmikUnit | Image) -> None:
+        self.jit = JitStats()
+        _, self.traces = self.cache.setdefault(id(program), (program, {}))
+
+        for i in range(len(self.code)):
+            length = self.fusion.sites.get(i * 4, 1)
+            if self.code[i + length - 1].opcode in BRANCHES:
+                self.steps[i] = self.counting(self.steps[i], (i + length) * 4)
+
+    def counting(self, step: Step, nxt: int) -> Step:
+        hits: dict[int, int] = {}
+        threshold = self.threshold
+
+        def execute() -> int:
+            target = step()
+            if target != nxt:
+                count = hits.get(target, 0) + 1
+                hits[target] = count
+                if count == threshold:
+                    self.install(target)
+            return target
+
+        return execute
+
+    def install(self, entry: int) -> None:
+        if not 0 <= entry < len(self.code) * 4 or entry & 3:
+            return
+
+        if entry not in self.traces:
+            source = trace_source(self.code, entry)
+            self.traces[entry] = (
+                compile(source, f"<trace {entry:04d}>", "exec")
+                if source is not None
+                else None
+            )
+            self.jit.counters[COMPILED] += source is not None
+
+        code = self.traces[entry]
+        if code is None:
+            return
+
+        namespace: dict[str, Any] = {
+            "regs": self.registers,
+            "words": self.memory.words,
+            "limit": self.memory.limit,
+            "WIDE": self.memory.WIDE,
+            "load": self.memory.load,
+            "store": self.memory.store,
+            "dirty": self.memory.dirty,
+            "counters": self.jit.counters,
+        }
+        exec(code, namespace)  # noqa: S102
+        self.steps[entry >> 2] = cast(Step, namespace["trace"])
+
+
+class TraceWriter:
+    LIMIT = 256
+
+    def __init__(self, code: Sequence[Decoded], entry: int) -> None:
+        self.code = code
+        self.entry = entry
+
+        self.body: list[tuple[Any, ...]] = []
+        self.used: set[int] = set()
+        self.written: set[int] = set()
+        self.consts: dict[int, int] = {}
+        self.visited: set[int] = set()
+
+    def traced(self) -> str | None:
+        addr: int | None = self.entry
+        while addr is not None:
+            addr = self.step(addr)
+        if not self.visited:
+            return None
+        return self.rendered()
+
+    def step(self, addr: int) -> int | None:
+        if (
+            addr in self.visited
+            or len(self.visited) == self.LIMIT
+            or not 0 <= addr >> 2 < len(self.code)
+            or self.code[addr >> 2].opcode == Opcode.HLT
+            or IP in registers_of(self.code[addr >> 2])
+        ):
+            self.body.append(("return", str(addr), self.length))
+            return None
+
+        code = self.code[addr >> 2]
+        self.visited.add(addr)
+        self.used.update(registers_of(code))
+
+        if code.opcode == Opcode.BRN:
+            return self.branch(code, addr + 4)
+        if code.opcode in BRANCHES:
+            return self.branch_to_immediate(code, addr + 4)
+
+        self.body.append(("do", *self.statement(code)))
+
+        if code.opcode == Opcode.STOR:
+            return addr + 4
+        self.written.add(code.dst)
+        if code.opcode == Opcode.ADDIM and code.lhs == ZE:
+            self.consts[code.dst] = code.rhs
+        else:
+            self.consts.pop(code.dst, None)
+
+        return addr + 4
+
+    def branch(self, code: Decoded, nxt: int) -> int | None:
+        target = self.consts.get(code.rhs)
+        if code.lhs == ZE and target is not None:
+            return target
+        if code.lhs == ZE:
+            self.body.append(("return", self.reg(code.rhs), self.length))
+            return None
+        self.body.append(
+            (
+                "guard",
+                f"{self.reg(code.lhs)} % 2 == 0",
+                str(target) if target is not None else self.reg(code.rhs),
+                self.length,
+            ),
+        )
+        return nxt
+
+    def branch_to_immediate(self, code: Decoded, nxt: int) -> int | None:
+        if code.opcode == Opcode.BRNI and code.lhs == ZE:
+            return code.dst
+        lhs, rhs = self.reg(code.lhs), self.reg(code.rhs)
+        condition = CONDITIONS[code.opcode].format(lhs=lhs, rhs=rhs)
+        self.body.append(("guard", condition, str(code.dst), self.length))
+        return nxt
+
+    def statement(self, code: Decoded) -> list[str]:
+        d, lhs, rhs = self.reg(code.dst), self.reg(code.lhs), self.reg(code.rhs)
+        match code.opcode:
+            case Opcode.ADDIM:
+                return [f"{d} = {self.immediate(code)}"]
+            case Opcode.SLTI:
+                return [f"{d} = 1 if {lhs} < {rhs} else 0"]
+            case Opcode.LOAD:
+                return [
+                    f"a = {self.address(code.lhs, code.rhs)}",
+                    "if 0 <= a < limit and not a & 7:",
+                    "    v = words[a >> 3]",
+                    f"    {d} = v if v != WIDE else load(a)",
+                    "else:",
+                    f"    {d} = load(a)",
+                ]
+            case Opcode.STOR:
+                return [
+                    f"a, v = {self.address(code.lhs, code.dst)}, {rhs}",
+                    "if 0 <= a < limit and not a & 7 and WIDE < v < -WIDE:",
+                    "    words[a >> 3] = v",
+                    f"    dirty.add(a >> {DataMemory.PAGE_BITS})",
+                    "else:",
+                    "    store(a, v)",
+                ]
+            case _:
+                return [f"{d} = {lhs} {OPERATORS[code.opcode]} {rhs}"]
+
+    def immediate(self, code: Decoded) -> str:
+        return self.address(code.lhs, code.rhs)
+
+    def address(self, base: int, offset: int) -> str:
+        if base == ZE:
+            return f"{offset}"
+        if offset == 0:
+            return self.reg(base)
+        return f"{self.reg(base)} + {offset}"
+
+    def rendered(self) -> str:
+        lines = ["def trace():", f"    counters[{ENTERED}] += 1"]
+        lines += [f"    {self.reg(i)} = regs[{i}]" for i in self.registers]
+        for kind, *args in self.body:
+            match kind:
+                case "do":
+                    lines += [f"    {line}" for line in args]
+                case "return":
+                    lines += [f"    {line}" for line in self.exit(*args)]
+                case "guard":
+                    condition, target, length = args
+                    lines += [f"    if {condition}:"]
+                    lines += [f"        counters[{EXITED}] += 1"]
+                    lines += [
+                        f"        {line}" for line in self.exit(target, length)
+                    ]
+        return "\n".join(lines) + "\n"
+
+    def exit(self, target: str, length: int) -> list[str]:
+        return [
+            *(f"regs[{i}] = {self.reg(i)}" for i in sorted(self.written)),
+            f"counters[{RETIRED}] += {length}",
+            f"return {target}",
+        ]
+
+    @property
+    def length(self) -> int:
+        return len(self.visited)
+
+    @property
+    def registers(self) -> list[int]:
+        return sorted(self.used - {ZE})
+
+    @staticmethod
+    def reg(index: int) -> str:
+        return "0" if index == ZE else f"r{index}"
+
+
+OPERATORS = {
+    Opcode.ADDI: "+",
+    Opcode.MULI: "*",
+    Opcode.DIVI: "//",
+    Opcode.REMI: "%",
+    Opcode.ORB: "|",
+    Opcode.ANDB: "&",
+    Opcode.XORB: "^",
+}
+
+CONDITIONS = {
+    Opcode.BRNI: "{lhs} % 2 == 0",
+    Opcode.BNE: "{lhs} != {rhs}",
+    Opcode.BLT: "{lhs} < {rhs}",
+}
+"""Conditions a branch to an immediate is taken on, by opcode."""
+
+
+def trace_source(code: Sequence[Decoded], entry: int) -> str | None:
+    return TraceWriter(code, entry).traced()
@@ -0,0 +1,77 @@
+import mmap
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+from sleepy.asmik import IntegerData
+from sleepy.asmik.memory import Memory
+
+Words = array[int] | memoryview
+
+
+class DataMemory:
+
+    """
+    Data memory of 64-bit words.
+
+    Aligned addresses below `limit` are served from a flat word
+    array, others go to a sparse dictionary. Values that do not fit
+    into a word are kept aside and marked in a word with `WIDE`.
+    Stores to the word array mark the pages they touch as `dirty`.
+    """
+
+    CAPACITY = 4096
+    WIDE = -(2**63)
+    PAGE_BITS = 12
+    """A page is `1 << PAGE_BITS` bytes long."""
+
+    def __init__(self, words: Words) -> None:
+        self.words = words
+        self.limit = len(words) * 8
+        self.wide: dict[int, int] = {}
+        self.sparse: dict[int, int] = {}
+        self.dirty: set[int] = set()
+        """Indices of pages stored to since the set was cleared."""
+
+    @staticmethod
+    def allocated(size: int) -> "DataMemory":
+        size = max(size, DataMemory.CAPACITY)
+        return DataMemory(array("q", bytes(size * 8)))
+
+    @staticmethod
+    def mapped(path: Path, size: int) -> "DataMemory":
+        size = max(size, DataMemory.CAPACITY)
+        with path.open("w+b") as file:
+            file.truncate(size * 8)
+            buffer = mmap.mmap(file.fileno(), size * 8)
+        return DataMemory(memoryview(buffer).cast("q"))
+
+    def fill(self, memory: Memory) -> None:
+        for addr, data in memory.stack.items():
+            self.store(addr, cast(IntegerData, data).value)
+
+    def load(self, addr: int) -> int:
+        if 0 <= addr < self.limit and not addr & 7:
+            value = self.words[addr >> 3]
+            return value if value != self.WIDE else self.wide[addr]
+        return self.sparse[addr]
+
+    def store(self, addr: int, value: int) -> None:
+        if 0 <= addr < self.limit and not addr & 7:
+            self.dirty.add(addr >> self.PAGE_BITS)
+            if self.WIDE < value < -self.WIDE:
+                self.words[addr >> 3] = value
+            else:
+                self.words[addr >> 3] = self.WIDE
+                self.wide[addr] = value
+        else:
+            self.sparse[addr] = value
+
+    @staticmethod
+    def words_of(memory: Memory) -> int:
+        return (memory.stack_pointer + 7) // 8
+
+
+Allocator = Callable[[int], DataMemory]
+"""Allocates a data memory of at least the given number of words."""
@@ -0,0 +1,132 @@
+from typing import Any, override
+
+from .cache import Cache
+from .decode import BRANCHES, IP, Decoded, Opcode
+from .pipeline import Pipeline
+from .predictor import Prediction
+from .profile import Profile
+from .trace import Trace, address, addressed_by, written_by
+
+
+class Observer:
+
+    """
+    Watches instructions executed by the reference interpreter.
+
+    Hooks get the index of an instruction and the registers, `before`
+    right after `ip` is advanced past it and `after` it is executed.
+    """
+
+    def before(self, i: int, regs: list[Any]) -> None:
+        pass
+
+    def after(self, i: int, regs: list[Any]) -> None:
+        pass
+
+
+class Observers(Observer):
+
+    """Several observers watching the same run, in order."""
+
+    def __init__(self, *observers: Observer) -> None:
+        self.observers = observers
+
+    @override
+    def before(self, i: int, regs: list[Any]) -> None:
+        for observer in self.observers:
+            observer.before(i, regs)
+
+    @override
+    def after(self, i: int, regs: list[Any]) -> None:
+        for observer in self.observers:
+            observer.after(i, regs)
+
+
+class Profiling(Observer):
+
+    """Counts executions and branch directions into `profile`."""
+
+    def __init__(self, profile: Profile, code: list[Decoded]) -> None:
+        self.profile = profile
+        self.branches = [instr.opcode in BRANCHES for instr in code]
+
+    @override
+    def after(self, i: int, regs: list[Any]) -> None:
+        self.profile.executed[i] += 1
+        if self.branches[i]:
+            ip = i * 4
+            taken = regs[IP] != ip + 4
+            branch = self.profile.taken if taken else self.profile.skipped
+            branch[ip] = branch.get(ip, 0) + 1
+
+
+class Tracing(Observer):
+
+    """Writes a record per instruction to `trace`."""
+
+    def __init__(self, trace: Trace, code: list[Decoded]) -> None:
+        self.record = trace.record
+        self.opcodes = [instr.opcode for instr in code]
+        self.written = [written_by(instr) for instr in code]
+        self.addressed = [addressed_by(instr) for instr in code]
+        self.addr = -1
+
+    @override
+    def before(self, i: int, regs: list[Any]) -> None:
+        # a load may overwrite its base register
+        self.addr = address(regs, self.addressed[i])
+
+    @override
+    def after(self, i: int, regs: list[Any]) -> None:
+        value = regs[self.written[i]]
+        self.record(i * 4, self.opcodes[i], value, self.addr)
+
+
+class Caching(Observer):
+
+    """Passes fetches and memory accesses through caches."""
+
+    def __init__(
+        self,
+        data: Cache,
+        instr: Cache | None,
+        code: list[Decoded],
+    ) -> None:
+        self.data = data
+        self.instr = instr
+        self.stores = [instr.opcode == Opcode.STOR for instr in code]
+        self.addressed = [addressed_by(instr) for instr in code]
+
+    @override
+    def before(self, i: int, regs: list[Any]) -> None:
+        if self.instr is not None:
+            self.instr.access(i * 4, write=False)
+        addressed = self.addressed[i]
+        if addressed is not None:
+            self.data.access(address(regs, addressed), write=self.stores[i])
+
+
+class Timing(Observer):
+
+    """Issues executed instructions to `pipeline`."""
+
+    def __init__(self, pipeline: Pipeline) -> None:
+        self.issue = pipeline.issue
+
+    @override
+    def after(self, i: int, regs: list[Any]) -> None:
+        self.issue(i, regs[IP])
+
+
+class Predicting(Observer):
+
+    """Resolves executed branches with `prediction`."""
+
+    def __init__(self, prediction: Prediction) -> None:
+        self.branches = prediction.branches
+        self.resolved = prediction.resolved
+
+    @override
+    def after(self, i: int, regs: list[Any]) -> None:
+        if self.branches[i]:
+            self.resolved(i, regs[IP])
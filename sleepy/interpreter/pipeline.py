@@ -0,0 +1,146 @@
+from array import array
+from enum import Enum
+
+from .decode import (
+    BRANCHES,
+    ZE,
+    Decoded,
+    Opcode,
+    destination_of,
+    sources_of,
+)
+from .predictor import Prediction
+
+
+class Stall(Enum):
+    RAW = "raw"
+    LOAD_USE = "load-use"
+    BRANCH = "branch"
+
+
+class Pipeline:
+
+    """
+    Timing model of a classic in-order 5-stage pipeline.
+
+    Instructions go through fetch, decode, execute, memory and write
+    back, one enters execute per cycle unless it stalls. An operand
+    is ready for execute a cycle after the producer executed, or two
+    after a `load`, with `forwarding`. Without it, operands are read
+    in decode after the producer wrote back. A `brn` is resolved
+    in execute, so if it was mispredicted the instructions fetched
+    after it are flushed. Without a `prediction`, branches are
+    predicted not taken.
+    """
+
+    FILL = 2
+    """Cycles before the first instruction enters execute."""
+    DRAIN = 2
+    """Cycles after the last instruction leaves execute."""
+
+    def __init__(
+        self,
+        *,
+        forwarding: bool = True,
+        penalty: int = 2,
+        prediction: Prediction | None = None,
+    ) -> None:
+        self.forwarding = forwarding
+        self.penalty = penalty
+        self.prediction = prediction
+
+        self.code: list[Decoded] = []
+        self.sources: list[tuple[int, ...]] = []
+        self.written: list[int] = []
+        self.loads = bytearray()
+        self.branches = bytearray()
+
+        self.ready = array("q")
+        self.loaded = bytearray()
+
+        self.clock = 0
+        self.instructions = 0
+        self.stalls = dict.fromkeys(Stall, 0)
+
+    def attach(self, code: list[Decoded], registers: int) -> None:
+        """Prepare tables for `code` and reset the counters."""
+        self.code = code
+        self.sources = [
+            tuple(reg for reg in sources_of(instr) if reg != ZE)
+            for instr in code
+        ]
+        self.written = [destination_of(instr) or ZE for instr in code]
+        self.loads = bytearray(instr.opcode == Opcode.LOAD for instr in code)
+        self.branches = bytearray(instr.opcode in BRANCHES for instr in code)
+
+        self.ready = array("q", [0]) * registers
+        self.loaded = bytearray(registers)
+        if self.prediction is not None:
+            self.prediction.attach(code)
+
+        self.clock = 0
+        self.instructions = 0
+        self.stalls = dict.fromkeys(Stall, 0)
+
+    def issue(self, i: int, target: int) -> None:
+        """Time the instruction at index `i` followed by the `target`."""
+        clock = self.waited(i, self.clock + 1)
+        self.scheduled(i, clock)
+
+        if self.branches[i] and self.mispredicted(i, target):
+            clock += self.penalty
+            self.stalls[Stall.BRANCH] += self.penalty
+
+        self.clock = clock
+        self.instructions += 1
+
+    def waited(self, i: int, start: int) -> int:
+        """Tell when sources of the instruction at index `i` are ready."""
+        ready, loaded = self.ready, self.loaded
+        clock, cause = start, Stall.RAW
+        for reg in self.sources[i]:
+            if ready[reg] > clock:
+                clock = ready[reg]
+                cause = Stall.LOAD_USE if loaded[reg] else Stall.RAW
+        if clock != start:
+            self.stalls[cause] += clock - start
+        return clock
+
+    def scheduled(self, i: int, clock: int) -> None:
+        """Make the result of the instruction issued at `clock` pending."""
+        dst = self.written[i]
+        if dst == ZE:
+            return
+        load = self.loads[i]
+        if not self.forwarding:
+            self.ready[dst] = clock + 3
+        else:
+            self.ready[dst] = clock + (2 if load else 1)
+        self.loaded[dst] = load
+
+    def mispredicted(self, i: int, target: int) -> bool:
+        if self.prediction is None:
+            return target != i * 4 + 4
+        return self.prediction.resolved(i, target)
+
+    @property
+    def cycles(self) -> int:
+        if self.instructions == 0:
+            return 0
+        return self.FILL + self.clock + self.DRAIN
+
+    @property
+    def cpi(self) -> float:
+        if self.instructions == 0:
+            return 0.0
+        return self.cycles / self.instructions
+
+    def to_text(self) -> str:
+        text = (
+            f"cycles {self.cycles}, "
+            f"instructions {self.instructions}, "
+            f"cpi {self.cpi:.3f}\n"
+        )
+        for cause, count in self.stalls.items():
+            text += f"stall {cause.value}: {count}\n"
+        return text
@@ -0,0 +1,236 @@
+from abc import ABC, abstractmethod
+from array import array
+
+from sleepy.asmik import AsmikUnit
+from sleepy.core import SleepyError
+
+from .decode import (
+    BRANCHES,
+    COMPARE,
+    RA,
+    ZE,
+    Decoded,
+    Opcode,
+)
+from .profile import regions
+
+JUMP, CALL, RETURN, CONDITIONAL = range(4)
+
+
+class Predictor(ABC):
+
+    """Predictor of directions of conditional branches."""
+
+    @abstractmethod
+    def predicted(self, ip: int) -> bool:
+        """Tell if the branch at `ip` is predicted to be taken."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, ip: int, taken: bool) -> None:  # noqa: FBT001
+        raise NotImplementedError
+
+
+class NotTaken(Predictor):
+    def predicted(self, ip: int) -> bool:  # noqa: ARG002
+        return False
+
+    def update(self, ip: int, taken: bool) -> None:  # noqa: FBT001
+        pass
+
+
+class Bimodal(Predictor):
+
+    """Table of 2-bit saturating counters indexed by the branch address."""
+
+    def __init__(self, bits: int = 10) -> None:
+        self.mask = (1 << bits) - 1
+        self.counters = bytearray([1]) * (1 << bits)
+
+    def predicted(self, ip: int) -> bool:
+        return self.counters[self.index(ip)] >= 2  # noqa: PLR2004
+
+    def update(self, ip: int, taken: bool) -> None:  # noqa: FBT001
+        index = self.index(ip)
+        counter = self.counters[index]
+        if taken and counter < 3:  # noqa: PLR2004
+            self.counters[index] = counter + 1
+        elif not taken and counter > 0:
+            self.counters[index] = counter - 1
+
+    def index(self, ip: int) -> int:
+        return (ip >> 2) & self.mask
+
+
+class Gshare(Bimodal):
+
+    """Counters indexed by the branch address xor the global history."""
+
+    def __init__(self, bits: int = 10) -> None:
+        super().__init__(bits)
+        self.history = 0
+
+    def update(self, ip: int, taken: bool) -> None:  # noqa: FBT001
+        super().update(ip, taken)
+        self.history = ((self.history << 1) | taken) & self.mask
+
+    def index(self, ip: int) -> int:
+        return ((ip >> 2) ^ self.history) & self.mask
+
+
+class ReturnStack:
+
+    """Circular stack of return addresses, the oldest are overwritten."""
+
+    def __init__(self, depth: int = 16) -> None:
+        if depth <= 0:
+            message = f"return stack depth must be positive, got {depth}"
+            raise SleepyError(message)
+        self.entries = array("q", [-1]) * depth
+        self.top = 0
+        self.size = 0
+
+    def push(self, addr: int) -> None:
+        self.entries[self.top] = addr
+        self.top = (self.top + 1) % len(self.entries)
+        self.size = min(self.size + 1, len(self.entries))
+
+    def pop(self) -> int:
+        """Tell the predicted return address, -1 if there is none."""
+        if self.size == 0:
+            return -1
+        self.size -= 1
+        self.top = (self.top - 1) % len(self.entries)
+        return self.entries[self.top]
+
+
+def kind_of(code: list[Decoded], i: int) -> int:
+    instr = code[i]
+    if instr.lhs != ZE or instr.opcode in COMPARE.values():
+        return CONDITIONAL
+    if instr.opcode == Opcode.BRN and instr.rhs == RA:
+        return RETURN
+    if i > 0 and is_link(code[i - 1], i * 4):
+        return CALL
+    return JUMP
+
+
+def is_link(code: Decoded, ip: int) -> bool:
+    """Tell if `code` is `addim ra, ip, 4` for a branch at `ip`."""
+    # the instruction before the branch, with `ip` already resolved
+    return code == Decoded(Opcode.ADDIM, RA, ZE, ip + 4)
+
+
+class Prediction:
+
+    """
+    Branch prediction evaluated on a single unit.
+
+    Directions of conditional branches come from the `predictor`.
+    All the other branches are taken, a target of a return comes
+    from the `stack` if there is one, the other targets are the last
+    ones seen at the same address. A call is a `brn ze` or a `brni ze`
+    right after `addim ra, ip, 4`, and a return is a `brn ze, ra`.
+    Other writes to `ra`, as restoring it before a tail call, do not
+    make the next branch a call.
+    """
+
+    def __init__(
+        self,
+        predictor: Predictor,
+        stack: ReturnStack | None = None,
+    ) -> None:
+        self.predictor = predictor
+        self.stack = stack
+
+        self.code: list[Decoded] = []
+        self.branches = bytearray()
+        self.kinds = bytearray()
+        self.targets = array("q")
+        self.executed = array("Q")
+        self.missed = array("Q")
+
+    def attach(self, code: list[Decoded]) -> None:
+        """Prepare tables for `code` and reset the counters."""
+        self.code = code
+        self.branches = bytearray(instr.opcode in BRANCHES for instr in code)
+        self.kinds = bytearray(
+            kind_of(code, i)
+            if instr.opcode in BRANCHES
+            else JUMP
+            for i, instr in enumerate(code)
+        )
+        self.targets = array("q", [-1]) * len(code)
+        self.executed = array("Q", [0]) * len(code)
+        self.missed = array("Q", [0]) * len(code)
+
+    def resolved(self, i: int, target: int) -> bool:
+        """Resolve the branch at index `i`, tell if it was mispredicted."""
+        ip = i * 4
+        kind = self.kinds[i]
+        if kind == CONDITIONAL:
+            taken = target != ip + 4
+            missed = self.predictor.predicted(ip) != taken
+            self.predictor.update(ip, taken)
+        elif kind == RETURN and self.stack is not None:
+            missed = self.stack.pop() != target
+        else:
+            missed = self.targets[i] != target
+            self.targets[i] = target
+            if kind == CALL and self.stack is not None:
+                self.stack.push(ip + 4)
+
+        self.executed[i] += 1
+        self.missed[i] += missed
+        return missed
+
+    @property
+    def rate(self) -> float:
+        return rate(sum(self.missed), sum(self.executed))
+
+    def addresses(self) -> dict[int, float]:
+        """Misprediction rates of executed branches by their addresses."""
+        return {
+            i * 4: rate(missed, executed)
+            for i, (missed, executed) in enumerate(
+                zip(self.missed, self.executed, strict=True),
+            )
+            if executed
+        }
+
+    def procedures(self, unit: AsmikUnit) -> dict[str, float]:
+        starts = {"main": 0} | unit.procedures
+        missed = regions(self.missed, starts)
+        executed = regions(self.executed, starts)
+        return {
+            name: rate(missed[name], executed[name])
+            for name in starts
+            if executed[name]
+        }
+
+    def to_text(self, unit: AsmikUnit) -> str:
+        text = (
+            f"branches {sum(self.executed)}, "
+            f"mispredicted {sum(self.missed)}, "
+            f"rate {self.rate:.3f}\n"
+        )
+
+        text += "prediction branch\n"
+        for addr, value in self.addresses().items():
+            instr = unit.memory.instr[addr // 4]
+            text += (
+                f"{addr:04d}: {instr!r:<28} "
+                f"{self.missed[addr // 4]:>8} / "
+                f"{self.executed[addr // 4]:<8} "
+                f"rate {value:.3f}\n"
+            )
+
+        text += "prediction procedure\n"
+        for name, value in self.procedures(unit).items():
+            text += f"{name}: {value:.3f}\n"
+
+        return text
+
+
+def rate(missed: int, executed: int) -> float:
+    return missed / executed if executed else 0.0
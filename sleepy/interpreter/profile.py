@@ -0,0 +1,82 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from sleepy.asmik import AsmikUnit, Branch
+
+
+@dataclass
+class Profile:
+
+    """
+    Execution counts of a single unit.
+
+    Counts are kept per instruction address, branches also count how
+    often they were taken. Everything else is aggregated from these
+    on demand: per opcode, per procedure and per Tafka block.
+    """
+
+    executed: list[int] = field(default_factory=list)
+    """Execution counts by instruction index."""
+    taken: dict[int, int] = field(default_factory=dict)
+    """Taken counts of branches by their addresses."""
+    skipped: dict[int, int] = field(default_factory=dict)
+    """Not taken counts of branches by their addresses."""
+
+    @staticmethod
+    def empty(size: int) -> "Profile":
+        return Profile([0] * size)
+
+    def opcodes(self, unit: AsmikUnit) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for instr, count in zip(unit.memory.instr, self.executed, strict=True):
+            counts[instr.name] = counts.get(instr.name, 0) + count
+        return counts
+
+    def procedures(self, unit: AsmikUnit) -> dict[str, int]:
+        starts = {"main": 0} | unit.procedures
+        return self.regions(starts)
+
+    def blocks(self, unit: AsmikUnit) -> dict[str, int]:
+        # procedure parameters are moved before its first block
+        starts = {
+            name: addr
+            for name, addr in unit.procedures.items()
+            if addr not in unit.blocks.values()
+        }
+        return self.regions(starts | unit.blocks)
+
+    def regions(self, starts: dict[str, int]) -> dict[str, int]:
+        return regions(self.executed, starts)
+
+    def to_text(self, unit: AsmikUnit) -> str:
+        text = "profile instr\n"
+        for i, instr in enumerate(unit.memory.instr):
+            addr = i * 4
+            text += f"{addr:04d}: {instr!r:<28} {self.executed[i]:>8}"
+            if isinstance(instr, Branch):
+                text += (
+                    f", taken {self.taken.get(addr, 0)}"
+                    f", not taken {self.skipped.get(addr, 0)}"
+                )
+            text += "\n"
+
+        for title, counts in (
+            ("opcode", self.opcodes(unit)),
+            ("procedure", self.procedures(unit)),
+            ("block", self.blocks(unit)),
+        ):
+            text += f"profile {title}\n"
+            for name, count in sorted(counts.items(), key=lambda x: -x[1]):
+                text += f"{name}: {count}\n"
+
+        return text
+
+
+def regions(counts: Sequence[int], starts: dict[str, int]) -> dict[str, int]:
+    """Sum counts by instruction over regions lasting until the next start."""
+    bounds = sorted(starts.items(), key=lambda start: start[1])
+    ends = [addr for _, addr in bounds[1:]] + [len(counts) * 4]
+    return {
+        name: sum(counts[begin // 4 : end // 4])
+        for (name, begin), end in zip(bounds, ends, strict=True)
+    }
@@ -0,0 +1,140 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from sleepy.core import SleepyError
+
+from .memory import DataMemory
+from .profile import Profile
+
+PAGE = 1 << DataMemory.PAGE_BITS
+"""Size of a memory page in bytes."""
+
+
+@dataclass(frozen=True, repr=False)
+class Snapshot:
+
+    """
+    Registers, data memory and counters of an interpreter.
+
+    Memory is cut into pages. A snapshot is taken on top of a `base`
+    the memory was in when its dirty pages were last cleared, so only
+    the pages stored to since then are copied and the rest is shared
+    with the base. Code is not a part of a snapshot, so it is restored
+    into an interpreter with the same unit loaded.
+    """
+
+    registers: tuple[Any, ...]
+    pages: tuple[bytes, ...]
+    wide: dict[int, int]
+    sparse: dict[int, int]
+    retired: int = 0
+    profile: Profile | None = None
+
+    @staticmethod
+    def taken(
+        registers: list[Any],
+        memory: DataMemory,
+        base: "Snapshot | None" = None,
+        retired: int = 0,
+        profile: Profile | None = None,
+    ) -> "Snapshot":
+        view = memoryview(memory.words).cast("B")
+        count = (len(view) + PAGE - 1) // PAGE
+
+        if base is not None and len(base.pages) == count:
+            pages = list(base.pages)
+            dirty = memory.dirty
+        else:
+            pages = [b""] * count
+            dirty = set(range(count))
+
+        for i in dirty:
+            pages[i] = view[i * PAGE : (i + 1) * PAGE].tobytes()
+        memory.dirty.clear()
+
+        return Snapshot(
+            tuple(registers),
+            tuple(pages),
+            dict(memory.wide),
+            dict(memory.sparse),
+            retired,
+            copied(profile),
+        )
+
+    def restore(self, registers: list[Any], memory: DataMemory) -> None:
+        """
+        Restore in place, as steps hold the registers and the memory.
+
+        The memory becomes clean, so the snapshot is the base of the next.
+        """
+        size = sum(len(page) for page in self.pages)
+        if len(registers) != len(self.registers) or memory.limit != size:
+            message = "snapshot does not match the loaded unit"
+            raise SleepyError(message)
+
+        registers[:] = self.registers
+
+        view = memoryview(memory.words).cast("B")
+        for i, page in enumerate(self.pages):
+            view[i * PAGE : i * PAGE + len(page)] = page
+        memory.dirty.clear()
+
+        memory.wide.clear()
+        memory.wide.update(self.wide)
+        memory.sparse.clear()
+        memory.sparse.update(self.sparse)
+
+    def save(self, path: Path) -> None:
+        header = {
+            "registers": self.registers,
+            "pages": [len(page) for page in self.pages],
+            "wide": list(self.wide.items()),
+            "sparse": list(self.sparse.items()),
+            "retired": self.retired,
+            "profile": None,
+        }
+        if self.profile is not None:
+            header["profile"] = {
+                "executed": self.profile.executed,
+                "taken": list(self.profile.taken.items()),
+                "skipped": list(self.profile.skipped.items()),
+            }
+        with path.open("wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            for page in self.pages:
+                file.write(page)
+
+    @staticmethod
+    def loaded(path: Path) -> "Snapshot":
+        with path.open("rb") as file:
+            header = json.loads(file.readline())
+            pages = tuple(file.read(size) for size in header["pages"])
+
+        counts, profile = header["profile"], None
+        if counts is not None:
+            profile = Profile(
+                counts["executed"],
+                dict(counts["taken"]),
+                dict(counts["skipped"]),
+            )
+
+        return Snapshot(
+            tuple(header["registers"]),
+            pages,
+            dict(header["wide"]),
+            dict(header["sparse"]),
+            header["retired"],
+            profile,
+        )
+
+
+def copied(profile: Profile | None) -> Profile | None:
+    if profile is None:
+        return None
+    return Profile(
+        list(profile.executed),
+        dict(profile.taken),
+        dict(profile.skipped),
+    )
@@ -0,0 +1,25 @@
+from collections.abc import Callable
+from enum import Enum
+
+Step = Callable[[], int]
+"""Executes an instruction and returns the next ip."""
+
+
+class Halt(Exception):  # noqa: N818
+    def __init__(self, ip: int) -> None:
+        super().__init__()
+        self.ip = ip
+
+
+def checked(max_steps: int | None) -> None:
+    if max_steps is not None and max_steps < 0:
+        message = f"max_steps must not be negative, got {max_steps}"
+        raise ValueError(message)
+
+
+class Status(Enum):
+
+    """Tells why `run` returned."""
+
+    HALTED = "halted"
+    EXHAUSTED = "exhausted"
@@ -0,0 +1,234 @@
+import mmap
+import struct
+from abc import ABC, abstractmethod
+from pathlib import Path
+from types import TracebackType
+from typing import Any, NamedTuple, Self
+
+from sleepy.asmik import AsmikUnit
+from sleepy.core import SleepyError
+
+from .decode import BRANCHES, IP, ZE, Decoded, Opcode
+
+MAGIC = b"SLPYTRCE"
+
+HEADER = struct.Struct("<8sQQ")
+"""Magic, capacity of a ring or 0 for a file, count of written records."""
+
+RECORD = struct.Struct("<IBBxxQQ")
+"""Ip, opcode, flags, value and memory address of an instruction."""
+
+ADDRESSED = 1
+"""Flag of a record with a memory address."""
+
+MASK = 2**64 - 1
+
+
+class Record(NamedTuple):
+
+    """
+    Executed instruction.
+
+    The value is the one written to the destination register, stored
+    to memory by `stor` or the next ip after `brn`, wrapped to
+    64 bits. The address is the one `load` or `stor` touched.
+    """
+
+    ip: int
+    opcode: Opcode
+    value: int
+    addr: int | None
+
+
+class Trace(ABC):
+
+    """Sink of fixed-size binary records of executed instructions."""
+
+    @abstractmethod
+    def record(self, ip: int, opcode: int, value: int, addr: int) -> None:
+        """Write a record, a negative `addr` means no address."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def flush(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class RingTrace(Trace):
+
+    """
+    Trace in a memory mapped ring buffer.
+
+    Keeps only the last `capacity` records, so a file never grows
+    beyond its initial size however long the run is.
+    """
+
+    def __init__(self, path: Path, capacity: int) -> None:
+        size = HEADER.size + capacity * RECORD.size
+        with path.open("w+b") as file:
+            file.truncate(size)
+            self.buffer = mmap.mmap(file.fileno(), size)
+        self.capacity = capacity
+        self.count = 0
+        self.slot = 0
+        self.flush()
+
+    def record(self, ip: int, opcode: int, value: int, addr: int) -> None:
+        RECORD.pack_into(
+            self.buffer,
+            HEADER.size + self.slot * RECORD.size,
+            ip,
+            opcode,
+            ADDRESSED if addr >= 0 else 0,
+            value & MASK,
+            addr & MASK,
+        )
+        self.count += 1
+        self.slot += 1
+        if self.slot == self.capacity:
+            self.slot = 0
+
+    def flush(self) -> None:
+        HEADER.pack_into(self.buffer, 0, MAGIC, self.capacity, self.count)
+        self.buffer.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.buffer.close()
+
+
+class FileTrace(Trace):
+
+    """Trace appended to a file, flushed every `every` records."""
+
+    EVERY = 4096
+
+    def __init__(self, path: Path, every: int = EVERY) -> None:
+        self.file = path.open("wb")
+        self.file.write(HEADER.pack(MAGIC, 0, 0))
+        self.every = every * RECORD.size
+        self.pending = bytearray()
+
+    def record(self, ip: int, opcode: int, value: int, addr: int) -> None:
+        self.pending += RECORD.pack(
+            ip,
+            opcode,
+            ADDRESSED if addr >= 0 else 0,
+            value & MASK,
+            addr & MASK,
+        )
+        if len(self.pending) >= self.every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write(self.pending)
+        self.file.flush()
+        self.pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+def records(
+    path: Path,
+    start: int = 0,
+    count: int | None = None,
+) -> list[Record]:
+    """
+    Read a window of records kept in a trace.
+
+    Records are numbered from the oldest one kept, a ring keeps
+    only the last records of a run.
+    """
+    with path.open("rb") as file:
+        magic, capacity, written = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            message = f"{path} is not a trace"
+            raise SleepyError(message)
+
+        if capacity == 0:
+            kept = (path.stat().st_size - HEADER.size) // RECORD.size
+            first = 0
+        else:
+            kept, first = min(written, capacity), max(written - capacity, 0)
+
+        end = kept if count is None else min(start + count, kept)
+        window = []
+        for n in range(start, end):
+            slot = (first + n) % capacity if capacity else n
+            file.seek(HEADER.size + slot * RECORD.size)
+            window.append(decoded(file.read(RECORD.size)))
+        return window
+
+
+def written_by(code: Decoded) -> int:
+    """Register holding the value of a record after `code` is executed."""
+    match code.opcode:
+        case Opcode.STOR:
+            return code.rhs
+        case opcode if opcode in BRANCHES:
+            return IP
+        case Opcode.HLT:
+            return ZE
+        case _:
+            return code.dst
+
+
+def addressed_by(code: Decoded) -> tuple[int, int] | None:
+    """Tell the base register and the offset of an address `code` touches."""
+    match code.opcode:
+        case Opcode.LOAD:
+            return code.lhs, code.rhs
+        case Opcode.STOR:
+            return code.lhs, code.dst
+        case _:
+            return None
+
+
+def address(registers: list[Any], addressed: tuple[int, int] | None) -> int:
+    """Tell the address `addressed_by` points to, or -1 if there is none."""
+    if addressed is None:
+        return -1
+    base, offset = addressed
+    return registers[base] + offset
+
+
+def decoded(data: bytes) -> Record:
+    ip, opcode, flags, value, addr = RECORD.unpack(data)
+    return Record(
+        ip,
+        Opcode(opcode),
+        signed(value),
+        signed(addr) if flags & ADDRESSED else None,
+    )
+
+
+def signed(word: int) -> int:
+    return word - (MASK + 1) if word > MASK >> 1 else word
+
+
+def to_text(window: list[Record], unit: AsmikUnit) -> str:
+    text = ""
+    for record in window:
+        instr = unit.memory.instr[record.ip // 4]
+        text += f"{record.ip:04d}: {instr!r:<28} -> {record.value}"
+        if record.addr is not None:
+            text += f" @ {record.addr:04d}"
+        text += "\n"
+    return text
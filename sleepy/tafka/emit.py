@@ -17,6 +17,8 @@ class TafkaEmitVisitor(ProgramVisitor[None]):
         self.lbl_names = map(str, range(10000000))
 
         self.vars = MetaTable[taf.Var]()
+        self.consts = MetaTable[taf.Const]()
+        """Constants of procedures by their closures, even being emitted."""
 
         self.current_block = self.main
         self.last_result = taf.Var("0", taf.Int())
@@ -68,15 +70,13 @@ class TafkaEmitVisitor(ProgramVisitor[None]):
                             args,
                         )
                     case program.Closure() as closure:
-                        self.visit_symbol(symbol)
-                        self.visit_application_variable(
-                            self.last_result,
+                        self.visit_application_procedure(
+                            self.consts[closure],
                             args,
                         )
             case program.Closure() as closure:
-                self.visit_lambda(closure)
-                self.visit_application_variable(
-                    self.last_result,
+                self.visit_application_procedure(
+                    self.emit_procedure(closure),
                     args,
                 )
 
@@ -107,15 +107,19 @@ class TafkaEmitVisitor(ProgramVisitor[None]):
                 raise NotImplementedError(str(intrinsic))
         self.emit_intermidiate(rvalue)
 
-    def visit_application_variable(
+    def visit_application_procedure(
         self,
-        invokable: taf.Var,
+        procedure: taf.Const,
         args: list[taf.Var],
     ) -> None:
-        self.emit_intermidiate(taf.Invokation(invokable, args))
+        # the callee is known, so its address is not loaded to call it
+        self.emit_intermidiate(taf.Invokation(procedure, args))
 
     @override
     def visit_lambda(self, tree: program.Closure) -> None:
+        self.emit_intermidiate(taf.Load(self.emit_procedure(tree)))
+
+    def emit_procedure(self, tree: program.Closure) -> taf.Const:
         current_block = self.current_block
 
         label = self.next_lbl()
@@ -128,6 +132,10 @@ class TafkaEmitVisitor(ProgramVisitor[None]):
         for param, var in zip(tree.parameters, params, strict=True):
             self.vars[param.name] = var
 
+        # the value is known after the body, that may refer to `self`
+        signature = taf.Signature([_.kind for _ in params], taf.Int())
+        self.consts[tree] = taf.Const(label.name, signature)
+
         body = taf.Block(label, statements=[])
 
         self.current_block = body
@@ -136,20 +144,24 @@ class TafkaEmitVisitor(ProgramVisitor[None]):
 
         self.emit_statement(taf.Return(self.last_result))
 
-        value = self.last_result.kind
+        signature.value = self.last_result.kind
 
         self.current_block = current_block
 
-        procedure = taf.Procedure(label.name, body, params, value)
+        procedure = taf.Procedure(label.name, body, params, signature.value)
         self.procedures.append(procedure)
 
-        self.emit_intermidiate(
-            taf.Load(taf.Const(label.name, procedure.signature)),
-        )
+        return self.consts[tree]
 
     @override
     def visit_symbol(self, tree: program.Symbol) -> None:
-        self.last_result = self.vars[tree]
+        if tree in self.vars:
+            self.last_result = self.vars[tree]
+            return
+
+        # `self` is bound to a closure, that is loaded in its own body
+        closure = self.unit.bindings.resolve(tree)
+        self.emit_intermidiate(taf.Load(self.consts[closure]))
 
     @override
     def visit_kind(self, tree: program.Kind) -> None:
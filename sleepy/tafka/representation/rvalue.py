@@ -25,7 +25,7 @@ class Intrinsic(RValue):
 
 @dataclass
 class Invokation(RValue):
-    closure: Var
+    closure: Var | Const
     args: list[Var]
 
     @override
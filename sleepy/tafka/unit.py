@@ -3,8 +3,19 @@ from dataclasses import dataclass
 from sleepy.program import ProgramUnit
 
 from .emit import TafkaEmitVisitor
-from .representation import Block, Procedure
+from .representation import (
+    Block,
+    Conditional,
+    Const,
+    Goto,
+    Load,
+    Procedure,
+    Set,
+    Signature,
+    Statement,
+)
 from .text import TafkaTextListener
+from .usage import Usages
 from .walker import TafkaWalker
 
 
@@ -17,7 +28,49 @@ class TafkaUnit:
     def emitted_from(unit: ProgramUnit) -> "TafkaUnit":
         tafka = TafkaEmitVisitor(unit)
         tafka.visit_program(unit.program)
-        return TafkaUnit(tafka.main, tafka.procedures)
+        emitted = TafkaUnit(tafka.main, tafka.procedures)
+        emitted.eliminate_dead_loads()
+        return emitted
+
+    def eliminate_dead_loads(self) -> None:
+        """
+        Remove loads of procedure addresses that are never read.
+
+        Procedures known statically are invoked directly, so a closure
+        bound to a name is mostly loaded only to be left unused.
+        """
+        reads = self.usages().reads
+        for block in self.blocks():
+            block.statements = [
+                statement
+                for statement in block.statements
+                if not is_dead_load(statement, reads)
+            ]
+
+    def blocks(self) -> list[Block]:
+        """Tell blocks of main and procedures reachable from entries."""
+        blocks: dict[str, Block] = {}
+        pending = [self.main, *(_.entry for _ in self.procedures)]
+        while pending:
+            block = pending.pop()
+            if block.label.name in blocks:
+                continue
+            blocks[block.label.name] = block
+            match block.last:
+                case Goto(next):
+                    pending.append(next)
+                case Conditional(_, then_branch, else_branch, next):
+                    pending += [then_branch, else_branch, next]
+        return list(blocks.values())
+
+    def usages(self) -> Usages:
+        """Collect reads and writes of variables over the whole unit."""
+        collector = Usages.Collector()
+        walker = TafkaWalker(collector)
+        for procedure in self.procedures:
+            walker.explore_procedure(procedure)
+        walker.explore_block(self.main)
+        return collector.usages
 
     def to_text(self) -> str:
         out = TafkaTextListener()
@@ -29,3 +82,11 @@ class TafkaUnit:
         walker.explore_block(self.main)
 
         return out.text.getvalue()
+
+
+def is_dead_load(statement: Statement, reads: dict[str, list[int]]) -> bool:
+    match statement:
+        case Set(target, Load(Const(_, Signature()))):
+            return repr(target) not in reads
+        case _:
+            return False
@@ -151,7 +151,8 @@ class Usages:
             target: taf.Var,
             source: taf.Invokation,
         ) -> None:
-            self.read(source.closure)
+            if isinstance(source.closure, taf.Var):
+                self.read(source.closure)
             for argument in source.args:
                 self.read(argument)
             self.write(target)
@@ -264,7 +265,8 @@ class UsageDumper(TafkaWalker.ContextedListener):
         target: taf.Var,
         source: taf.Invokation,
     ) -> None:
-        self.writeln_next_rw(*[target, source.closure, *source.args])
+        closure = [_ for _ in [source.closure] if isinstance(_, taf.Var)]
+        self.writeln_next_rw(target, *closure, *source.args)
 
     @override
     def on_load(self, target: taf.Var, source: taf.Load) -> None:
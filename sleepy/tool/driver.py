@@ -0,0 +1,135 @@
+import argparse
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any, TypeVar
+
+from sleepy.asmik import AsmikUnit
+from sleepy.interpreter import DispatchInterpreter, Status
+from sleepy.syntax import LarkParser, SleepyParser, to_program
+from sleepy.tafka import TafkaUnit
+
+STAGES = ("read", "parse", "program", "tafka", "asmik", "run")
+
+T = TypeVar("T")
+
+parser: SleepyParser | None = None
+"""Parser of the worker, warmed up once by `warmed`."""
+
+
+@dataclass
+class Result:
+    path: Path
+    state: dict[str, Any] | None = None
+    status: Status | None = None
+    error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    """Wall time of stages the program passed, in seconds."""
+
+
+@dataclass
+class Timings:
+
+    """Wall time of stages aggregated across workers."""
+
+    stages: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(STAGES, 0.0),
+    )
+    programs: int = 0
+    failed: int = 0
+
+    def add(self, result: Result) -> None:
+        for stage, seconds in result.timings.items():
+            self.stages[stage] += seconds
+        self.programs += 1
+        self.failed += result.error is not None
+
+    def to_text(self) -> str:
+        text = f"programs {self.programs}, failed {self.failed}\n"
+        for stage, seconds in self.stages.items():
+            text += f"{stage:>8}: {seconds * 1000:10.2f} ms\n"
+        return text
+
+
+def warmed() -> SleepyParser:
+    global parser  # noqa: PLW0603
+    if parser is None:
+        parser = LarkParser()
+    return parser
+
+
+def executed(path: Path, max_steps: int | None = None) -> Result:
+    """Compile and run a program, reporting errors in the result."""
+    parse = warmed().parse_program
+    result = Result(path)
+
+    def timed(stage: str, action: Callable[[], T]) -> T:
+        start = perf_counter()
+        try:
+            return action()
+        finally:
+            result.timings[stage] = perf_counter() - start
+
+    try:
+        source = timed("read", path.read_text)
+        syntax = timed("parse", lambda: parse(source))
+        program = timed("program", lambda: to_program(syntax))
+        tafka = timed("tafka", lambda: TafkaUnit.emitted_from(program))
+        asmik = timed("asmik", lambda: AsmikUnit.emited_from(tafka))
+
+        interp = DispatchInterpreter()
+        interp.load(asmik)
+        result.status = timed("run", lambda: interp.run(max_steps))
+        result.state = interp.state
+    except Exception as error:  # noqa: BLE001
+        # any failure is of this program only, so it does not stop others
+        result.error = f"{type(error).__name__}: {error}"
+
+    return result
+
+
+def executed_all(
+    paths: Iterable[Path],
+    workers: int | None = None,
+    max_steps: int | None = None,
+) -> Iterator[Result]:
+    """
+    Compile and run programs on a process pool.
+
+    Each worker warms up its own parser once, results are yielded
+    in the order of completion.
+    """
+    with ProcessPoolExecutor(workers, initializer=warmed) as pool:
+        futures = [pool.submit(executed, path, max_steps) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(
+        description="Compile and run Sleepy programs in parallel.",
+    )
+    arguments.add_argument("paths", nargs="+", type=Path)
+    arguments.add_argument("--workers", type=int, default=None)
+    arguments.add_argument("--max-steps", type=int, default=None)
+    args = arguments.parse_args()
+
+    timings = Timings()
+    start = perf_counter()
+    for result in executed_all(args.paths, args.workers, args.max_steps):
+        timings.add(result)
+        if result.error is not None:
+            print(f"{result.path}: {result.error}")  # noqa: T201
+        else:
+            status = result.status.value if result.status else None
+            print(f"{result.path}: {status}, {result.state}")  # noqa: T201
+    wall = perf_counter() - start
+
+    print(timings.to_text(), end="")  # noqa: T201
+    print(f"    wall: {wall * 1000:10.2f} ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,36 @@
+from collections.abc import Callable
 from test.common import parser
+from typing import Any
 
-from sleepy.asmik import AsmikUnit
-from sleepy.interpreter import AsmikInterpreter
+from sleepy.asmik import Allocator, AsmikUnit
+from sleepy.interpreter import AsmikInterpreter, DispatchInterpreter
 from sleepy.syntax import to_program
 from sleepy.tafka import TafkaUnit
 
+Interpreter = Callable[..., AsmikInterpreter | DispatchInterpreter]
 
-def evaluate(source: str) -> str:
+
+def compiled(source: str, allocator: Allocator | None = None) -> AsmikUnit:
     syntax = parser.parse_program(source)
     program = to_program(syntax)
     tafka = TafkaUnit.emitted_from(program)
-    asmik = AsmikUnit.emited_from(tafka)
+    return AsmikUnit.emited_from(tafka, allocator)
+
 
-    interp = AsmikInterpreter()
-    interp.load(asmik)
+def evaluated(
+    source: str,
+    interpreter: Interpreter = AsmikInterpreter,
+    allocator: Allocator | None = None,
+) -> dict[str, Any]:
+    interp = interpreter()
+    interp.load(compiled(source, allocator))
     interp.run()
+    return interp.state
+
 
-    return str(interp.state["registers"]["a1"])
+def evaluate(
+    source: str,
+    interpreter: Interpreter = AsmikInterpreter,
+    allocator: Allocator | None = None,
+) -> str:
+    return str(evaluated(source, interpreter, allocator)["registers"]["a1"])
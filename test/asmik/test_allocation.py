@@ -0,0 +1,102 @@
+from test.asmik.evaluate import compiled, evaluate
+
+import pytest
+
+from sleepy.asmik import Allocator, GraphColoring, LinearScan
+from sleepy.asmik.allocation import is_mov
+from sleepy.asmik.argument import PhysicalRegister, VirtualRegister
+from sleepy.asmik.flow import uses_of
+from sleepy.core import SleepyError
+from sleepy.interpreter import AsmikInterpreter
+
+source = """
+    (def x 5)
+    (def f (lambda (n int) (sum n x)))
+    (if (eq (f 1) 6) (f 3) 0)
+"""
+
+
+def test_physical_only() -> None:
+    unit = compiled(source, LinearScan(4))
+    registers = [reg for instr in unit.memory.instr for reg in uses_of(instr)]
+    assert not any(isinstance(reg, VirtualRegister) for reg in registers)
+    assert PhysicalRegister.general(5) not in registers
+    assert evaluate(source, allocator=LinearScan(4)) == "8"
+
+
+def test_report() -> None:
+    scarce = compiled(source, LinearScan(3)).allocation
+    plenty = compiled(source, LinearScan(16)).allocation
+    assert scarce is not None
+    assert plenty is not None
+
+    unit = compiled(source)
+    assert set(plenty.procedures) == {"main", *unit.procedures}
+
+    # x is shared with f, registers live across calls are on the stack
+    assert plenty.procedures["main"].spilled == 1
+    assert scarce.procedures["main"].spilled > 1
+    assert scarce.procedures["main"].registers == 1
+    (procedure,) = unit.procedures
+    assert plenty.procedures[procedure].loads == 1
+
+    text = plenty.to_text()
+    assert text.startswith("allocation\nmain: registers ")
+    assert "spilled 1, " in text
+
+
+@pytest.mark.parametrize("registers", [2, 17])
+def test_registers(registers: int) -> None:
+    with pytest.raises(SleepyError):
+        LinearScan(registers)
+
+
+copying = """
+    (def f (lambda (n int) (if (eq n 0) n (sum n 1))))
+    (def a (f 1))
+    (def b (f a))
+    (sum a b)
+"""
+
+
+def moves(allocator: Allocator | None) -> int:
+    unit = compiled(copying, allocator)
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    interp.run_profiled()
+    return sum(
+        count
+        for instr, count in zip(
+            unit.memory.instr,
+            interp.profile.executed,
+            strict=True,
+        )
+        if is_mov(instr)
+    )
+
+
+def test_coalesced() -> None:
+    assert moves(GraphColoring(16)) < moves(None)
+    assert moves(GraphColoring(4)) < moves(LinearScan(4))
+
+    unit = compiled(copying)
+    colored = compiled(copying, GraphColoring(16)).allocation
+    scanned = compiled(copying, LinearScan(16)).allocation
+    assert colored is not None
+    assert scanned is not None
+    for name, spills in colored.procedures.items():
+        assert spills.registers <= scanned.procedures[name].registers
+    removed = [
+        sum(_.removed for _ in allocation.procedures.values())
+        for allocation in (colored, scanned)
+    ]
+    assert removed[0] > removed[1]
+
+    registers = {
+        reg.index
+        for instr in unit.memory.instr
+        for reg in uses_of(instr)
+        if isinstance(reg, VirtualRegister)
+    }
+    used = sum(_.registers + _.spilled for _ in colored.procedures.values())
+    assert used < len(registers)
@@ -0,0 +1,107 @@
+from test.asmik.evaluate import compiled
+
+import pytest
+
+from sleepy.asmik import AsmikUnit
+from sleepy.asmik.argument import IMMEDIATE
+from sleepy.core import SleepyError
+from sleepy.interpreter import AsmikInterpreter, Status
+
+pytest.importorskip("numpy")
+
+from sleepy.interpreter.batch import (
+    BatchInterpreter,
+    wrapped,
+)
+
+template = """
+    (def step (lambda (a int b int)
+        (if (lt a b)
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a 7)))))
+    (def x0 (step {} 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    (def x3 (step x2 1))
+    x3
+"""
+
+
+def units(count: int) -> list[AsmikUnit]:
+    # wide constants stay in data memory, so the code is same
+    wide = 1 << IMMEDIATE
+    return [
+        compiled(template.format((-1) ** i * (wide + i))) for i in range(count)
+    ]
+
+
+def reference(unit: AsmikUnit) -> AsmikInterpreter:
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    interp.run()
+    return interp
+
+
+def wrapped_state(interp: AsmikInterpreter) -> dict[str, dict[str, int]]:
+    registers = interp.state["registers"]
+    return {
+        "registers": {
+            name: wrapped(value) for name, value in registers.items()
+        },
+    }
+
+
+@pytest.mark.parametrize("lanes", [1, 2, 7])
+def test_lanes(lanes: int) -> None:
+    inputs = units(lanes)
+    assert len({repr(unit.memory.instr) for unit in inputs}) == 1
+
+    interp = BatchInterpreter()
+    interp.load(inputs[0], [unit.memory for unit in inputs])
+    assert interp.run() == Status.HALTED
+
+    for lane, unit in enumerate(inputs):
+        expected = reference(unit)
+        assert interp.state(lane) == wrapped_state(expected)
+        assert interp.retired[lane] == expected.retired
+
+    assert interp.dispatched >= max(interp.retired)
+
+
+def test_diverged() -> None:
+    inputs = units(2)
+
+    interp = BatchInterpreter()
+    interp.load(inputs[0], [unit.memory for unit in inputs])
+    interp.run()
+
+    assert interp.dispatched > max(interp.retired)
+
+
+def test_resume() -> None:
+    inputs = units(3)
+
+    interp = BatchInterpreter()
+    interp.load(inputs[0], [unit.memory for unit in inputs])
+    while interp.run(max_steps=5) == Status.EXHAUSTED:
+        pass
+
+    for lane, unit in enumerate(inputs):
+        assert interp.state(lane) == wrapped_state(reference(unit))
+
+    with pytest.raises(ValueError, match="negative"):
+        interp.run(max_steps=-1)
+    assert interp.run(max_steps=5) == Status.HALTED
+
+
+def test_other_code() -> None:
+    interp = BatchInterpreter()
+    unit, other = compiled(template.format(1)), compiled(template.format(2))
+    with pytest.raises(SleepyError, match="lane 1"):
+        interp.load(unit, [unit.memory, other.memory])
+
+
+def test_wrapped() -> None:
+    assert wrapped(2**64 - 1) == -1
+    assert wrapped(2**63) == -(2**63)
+    assert wrapped(-1) == -1
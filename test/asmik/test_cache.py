@@ -0,0 +1,94 @@
+import pytest
+from test.asmik.evaluate import compiled, evaluated
+
+from sleepy.core import SleepyError
+from sleepy.interpreter import AsmikInterpreter, Cache, Policy, Status
+
+source = """
+    (def f (lambda (n int) (if (eq n 1) n (sum n 1))))
+    (def a (f 1))
+    (def b (f 2))
+    (f 3)
+"""
+
+
+def test_hits_and_misses() -> None:
+    cache = Cache(64, 2, 16, latency=1, memory=10)
+
+    assert cache.access(0, write=False) == 1 + 10
+    assert cache.access(8, write=False) == 1
+    assert cache.access(16, write=True) == 1 + 10
+    assert (cache.hits, cache.misses, cache.writebacks) == (1, 2, 0)
+    assert cache.cycles == 1 + 10 + 1 + 1 + 10
+
+
+@pytest.mark.parametrize(
+    ("policy", "evicted"),
+    [
+        (Policy.LRU, 1),
+        (Policy.PLRU, 2),
+    ],
+)
+def test_replacement(policy: Policy, evicted: int) -> None:
+    # a single set of 4 ways
+    cache = Cache(64, 4, 16, policy=policy)
+    for line in (0, 1, 2, 3, 0, 4):
+        cache.access(line * 16, write=False)
+    assert cache.misses == 5  # noqa: PLR2004
+
+    cache.access(0, write=False)
+    assert cache.misses == 5  # noqa: PLR2004
+    cache.access(evicted * 16, write=False)
+    assert cache.misses == 6  # noqa: PLR2004
+
+
+def test_write_back() -> None:
+    l2 = Cache(256, 4, 16, latency=5, memory=50)
+    l1 = Cache(32, 1, 16, latency=1, lower=l2)
+
+    l1.access(0, write=True)
+    l1.access(32, write=False)
+    assert l1.writebacks == 1
+    assert (l2.hits, l2.misses) == (1, 2)
+
+    l1.access(64, write=False)
+    assert l1.writebacks == 1
+
+
+def test_write_through() -> None:
+    l2 = Cache(256, 4, 16, latency=5, memory=50)
+    l1 = Cache(32, 1, 16, write_back=False, lower=l2)
+
+    l1.access(0, write=True)
+    l1.access(0, write=True)
+    l1.access(32, write=False)
+    assert l1.writebacks == 0
+    assert (l2.hits, l2.misses) == (2, 2)
+
+
+def test_geometry() -> None:
+    with pytest.raises(SleepyError):
+        Cache(96, 2, 16)
+    with pytest.raises(SleepyError):
+        Cache(64, 2, 12)
+
+
+def test_run_cached() -> None:
+    unit = compiled(source)
+    data = Cache(256, 2, 16, lower=Cache(4096, 4, 32))
+    instr = Cache(512, 2, 32, policy=Policy.PLRU)
+
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    assert interp.run_cached(data, instr) == Status.HALTED
+    assert interp.state == evaluated(source)
+
+    reference = AsmikInterpreter()
+    reference.load(unit)
+    reference.run_profiled()
+    opcodes = reference.profile.opcodes(unit)
+
+    assert instr.hits + instr.misses == interp.retired
+    assert data.hits + data.misses == opcodes["load"] + opcodes.get("stor", 0)
+    assert data.to_text().startswith(f"L1: hits {data.hits}, ")
+    assert "\nL2: " in data.to_text()
@@ -0,0 +1,84 @@
+import asyncio
+from functools import partial
+from test.asmik.evaluate import Interpreter, compiled, evaluated
+
+import pytest
+
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    JitInterpreter,
+    Status,
+)
+
+source = """
+    (def step (lambda (a int b int)
+        (if (lt a b)
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a 7)))))
+    (def x0 (step 1 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    x2
+"""
+
+interpreters = pytest.mark.parametrize(
+    "interpreter",
+    [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(JitInterpreter, threshold=1),
+    ],
+)
+
+
+@interpreters
+def test_run_async(interpreter: Interpreter) -> None:
+    interps = [interpreter() for _ in range(3)]
+    for interp in interps:
+        interp.load(compiled(source))
+
+    async def running() -> list[Status]:
+        return await asyncio.gather(
+            *(interp.run_async(slice=4) for interp in interps),
+        )
+
+    assert asyncio.run(running()) == [Status.HALTED] * 3
+
+    for interp in interps:
+        assert interp.state == evaluated(source)
+        assert interp.latency is not None
+        assert interp.latency.slices > 1
+        assert interp.latency.longest <= interp.latency.busy
+        assert interp.latency.busy <= interp.latency.wall
+
+
+@interpreters
+def test_cancel(interpreter: Interpreter) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+
+    async def cancelled() -> None:
+        task = asyncio.create_task(interp.run_async(slice=1))
+        for _ in range(4):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled())
+
+    assert interp.latency is not None
+    assert interp.latency.slices > 0
+    assert interp.run() == Status.HALTED
+    assert interp.state == evaluated(source)
+
+
+@interpreters
+@pytest.mark.parametrize("slice_", [0, -1])
+def test_empty_slice(interpreter: Interpreter, slice_: int) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+    with pytest.raises(ValueError, match="positive"):
+        asyncio.run(interp.run_async(slice=slice_))
+    assert interp.run() == Status.HALTED
@@ -0,0 +1,202 @@
+from functools import partial
+from test.asmik.evaluate import Interpreter, compiled, evaluated
+
+import pytest
+
+from sleepy.asmik import (
+    Addi,
+    Addim,
+    AsmikUnit,
+    Blt,
+    Bne,
+    Brn,
+    Brni,
+    Hlt,
+    Integer,
+    IntegerData,
+    Load,
+    Register,
+    Stor,
+)
+from sleepy.asmik.argument import VirtualRegister
+from sleepy.asmik.instruction import movi
+from sleepy.asmik.memory import Memory
+from sleepy.core import SleepyError
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    Image,
+    JitInterpreter,
+)
+
+
+def unit_of(*instructions: Addim | Hlt) -> AsmikUnit:
+    memory = Memory()
+    memory.instr.extend(instructions)
+    return AsmikUnit(memory)
+
+
+def test_halt() -> None:
+    unit = unit_of(
+        Addim(Register.a1(), Register.ze(), Integer(7)),
+        Hlt(),
+        Addim(Register.a1(), Register.ze(), Integer(8)),
+    )
+
+    reference = AsmikInterpreter()
+    reference.load(unit)
+    reference.run()
+
+    interp = DispatchInterpreter()
+    interp.load(unit)
+    interp.run()
+
+    assert interp.state == reference.state
+
+
+def test_ze_is_readonly() -> None:
+    unit = unit_of(Addim(Register.ze(), Register.ze(), Integer(1)))
+    with pytest.raises(SleepyError):
+        DispatchInterpreter().load(unit)
+
+
+def test_branch_into_fused() -> None:
+    v, ze, a1 = VirtualRegister, Register.ze(), Register.a1()
+    memory = Memory()
+    memory.instr.extend(
+        [
+            movi(v(0), Integer(7)),
+            Brni(ze, Integer(12)),
+            movi(v(0), Integer(5)),
+            Addi(a1, v(0), v(0)),
+            Brn(ze, Register.ra()),
+        ],
+    )
+    unit = AsmikUnit(memory)
+
+    interp = DispatchInterpreter()
+    interp.load(unit)
+    interp.run()
+
+    assert interp.state["registers"]["a1"] == 14  # noqa: PLR2004
+    assert interp.fusion.static["add-const"] == 1
+    assert interp.fusion.fused == 0
+
+
+def test_immediate_branches() -> None:
+    v, ze, a1 = VirtualRegister, Register.ze(), Register.a1()
+    memory = Memory()
+    memory.instr.extend(
+        [
+            movi(v(0), Integer(0)),
+            movi(v(1), Integer(5)),
+            movi(a1, Integer(0)),
+            Addim(v(0), v(0), Integer(1)),
+            Bne(v(0), v(1), Integer(20)),
+            Addim(a1, a1, Integer(10)),
+            Blt(v(0), v(1), Integer(12)),
+            Brni(ze, Integer(40)),
+            Addim(a1, a1, Integer(1000)),
+            Addim(a1, a1, Integer(1000)),
+            Bne(v(0), v(1), Integer(32)),
+            Brni(a1, Integer(52)),
+            Addim(a1, a1, Integer(1000)),
+            Brn(ze, Register.ra()),
+        ],
+    )
+    unit = AsmikUnit(memory)
+    image = Image.encoded(unit)
+    assert image.unit().memory.instr == memory.instr
+
+    interpreters: list[Interpreter] = [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(DispatchInterpreter, fuse=False),
+        partial(JitInterpreter, threshold=1),
+    ]
+    for interpreter in interpreters:
+        interp = interpreter()
+        interp.load(unit)
+        interp.run()
+        assert interp.state["registers"]["a1"] == 50  # noqa: PLR2004
+
+    interp = JitInterpreter(threshold=1)
+    interp.load_image(image)
+    interp.run()
+    assert interp.state["registers"]["a1"] == 50  # noqa: PLR2004
+    assert interp.jit.compiled > 0
+
+
+def test_offsets() -> None:
+    v, ze, a1 = VirtualRegister, Register.ze(), Register.a1()
+    memory = Memory()
+    memory.data_put(IntegerData(5))
+    memory.data_put(IntegerData(7))
+    memory.instr.extend(
+        [
+            Load(v(0), ze, Integer(8)),
+            movi(v(1), Integer(24)),
+            Stor(v(1), v(0), Integer(-8)),
+            Load(v(2), v(1), Integer(-24)),
+            Load(v(3), ze, Integer(16)),
+            Addi(a1, v(2), v(3)),
+            Brn(ze, Register.ra()),
+        ],
+    )
+    unit = AsmikUnit(memory)
+
+    interpreters: list[Interpreter] = [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(JitInterpreter, threshold=1),
+    ]
+    for interpreter in interpreters:
+        interp = interpreter()
+        interp.load(unit)
+        interp.run()
+        assert interp.state["registers"]["a1"] == 12  # noqa: PLR2004
+
+
+def test_fusion_stats() -> None:
+    source = """
+        (def g (lambda (n int) (sum n 1)))
+        (def fib (lambda (n int)
+            (if (lt n 2) (g n) (sum (self (sum n -1)) (self (sum n -2))))))
+        (fib 10)
+    """
+    reference = AsmikInterpreter()
+    reference.load(compiled(source))
+    reference.run()
+
+    interp = DispatchInterpreter()
+    interp.load(compiled(source))
+    interp.run()
+
+    assert interp.state == reference.state
+    assert interp.retired == reference.retired
+    assert interp.fusion.to_text() == (
+        "add-const: static 3, dynamic 265\n"
+        "push-pair: static 2, dynamic 176\n"
+        "push-word: static 2, dynamic 0\n"
+        "pop-pair: static 2, dynamic 176\n"
+        "pop-word: static 0, dynamic 0\n"
+        "blt-jump: static 1, dynamic 88\n"
+        "fused 1762, saved 1057\n"
+    )
+
+
+def test_fused_words() -> None:
+    source = """
+        (def f (lambda (n int) (if (lt n 3) (sum n 1) (mul n 2))))
+        (def a (f 1))
+        (def b (f a))
+        (f b)
+    """
+    interp = DispatchInterpreter()
+    interp.load(compiled(source))
+    interp.run()
+
+    assert interp.state == evaluated(source)
+    # the last call is a tail one, so it saves nothing
+    assert interp.fusion.dynamic["push-word"] == [len(["a", "b"])]
+    assert interp.fusion.dynamic["pop-word"] == [len(["a", "b"])]
@@ -1,9 +1,40 @@
-from test.asmik.evaluate import evaluate
+from collections.abc import Callable
+from functools import partial
+from test.asmik.evaluate import Interpreter, compiled, evaluate, evaluated
 
 import pytest
 
+from sleepy.asmik import Allocator, GraphColoring, LinearScan
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    JitInterpreter,
+)
+
+interpreters = pytest.mark.parametrize(
+    "interpreter",
+    [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(DispatchInterpreter, fuse=False),
+        partial(JitInterpreter, threshold=1),
+        partial(JitInterpreter, fuse=False, threshold=1),
+    ],
+)
+
+allocators = pytest.mark.parametrize(
+    "allocator",
+    [
+        partial(LinearScan, 3),
+        partial(LinearScan, 4),
+        partial(LinearScan, 16),
+        partial(GraphColoring, 3),
+        partial(GraphColoring, 4),
+        partial(GraphColoring, 16),
+    ],
+)
 
-@pytest.mark.parametrize(
+programs = pytest.mark.parametrize(
     ("src", "res"),
     [
         ("0", "0"),
@@ -20,6 +51,9 @@ import pytest
         ("(if (eq 1 2) 6 9)", "9"),
         ("(if (eq (rem 2 2) 0) 1 0)", "1"),
         ("(if (eq (div 2 2) 0) 1 0)", "0"),
+        ("(if (lt 1 2) 6 9)", "6"),
+        ("(if (lt 2 2) 6 9)", "9"),
+        ("(def a (lt 1 2)) (if a a 0)", "1"),
         ("(def a 7) a", "7"),
         ("(def a 70) (def b 8) (sum a b)", "78"),
         (
@@ -54,7 +88,75 @@ import pytest
             """,
             "1",
         ),
+        (
+            """
+            (def fact (lambda (n int)
+                (if (eq n 0) 1 (mul n (self (sum n -1))))))
+            (fact 6)
+            """,
+            "720",
+        ),
+        ("((lambda (n int) (sum n 1)) 41)", "42"),
+        (
+            """
+            (def loop (lambda (n int acc int)
+                (if (eq n 0) acc (self (sum n -1) (sum acc n)))))
+            (loop 100 (loop 10 0))
+            """,
+            "5105",
+        ),
+        (
+            """
+            (def fib (lambda (n int)
+                (if (lt n 2) n (sum (self (sum n -1)) (self (sum n -2))))))
+            (fib 10)
+            """,
+            "55",
+        ),
     ],
 )
-def test_evaluate(src: str, res: str) -> None:
-    assert evaluate(src) == res
+
+
+@interpreters
+@programs
+def test_evaluate(src: str, res: str, interpreter: Interpreter) -> None:
+    assert evaluate(src, interpreter) == res
+
+
+@interpreters
+@programs
+def test_state(src: str, res: str, interpreter: Interpreter) -> None:
+    expected = evaluated(src, AsmikInterpreter)
+    actual = evaluated(src, interpreter)
+    assert actual == expected
+    assert str(actual["registers"]["a1"]) == res
+
+
+@interpreters
+@allocators
+@programs
+def test_allocated(
+    src: str,
+    res: str,
+    interpreter: Interpreter,
+    allocator: Callable[[], Allocator],
+) -> None:
+    assert evaluate(src, interpreter, allocator()) == res
+
+
+def test_direct_calls() -> None:
+    called = compiled("(def id (lambda (n int) n)) (id 1)")
+    assert called.memory.stack == {}
+
+    loaded = compiled("(def id (lambda (n int) n)) (id 1) id")
+    [entry] = loaded.procedures.values()
+    assert list(map(repr, loaded.memory.stack.values())) == [str(entry)]
+    assert evaluate("(def id (lambda (n int) n)) (id 1) id") == str(entry)
+
+
+def test_fused_comparisons() -> None:
+    unit = compiled("(def a 1) (if (lt a 2) (if (eq a 1) 6 7) 9)")
+    names = [instr.name for instr in unit.memory.instr]
+    assert "slti" not in names
+    assert "blt" in names
+    assert "bne" in names
@@ -0,0 +1,54 @@
+from test.asmik.evaluate import compiled, evaluated
+
+from sleepy.asmik import GraphColoring
+from sleepy.asmik.argument import Integer, Register
+from sleepy.asmik.instruction import Addim, Load, Stor
+
+source = """
+    (def fact (lambda (n int)
+        (if (eq n 0) 1 (mul n (self (sum n -1))))))
+    (fact 5)
+"""
+
+
+def test_saved_across_calls() -> None:
+    unit = compiled(source)
+    sp = Register.sp()
+    stores = [_ for _ in unit.memory.instr if isinstance(_, Stor)]
+    loads = [_ for _ in unit.memory.instr if isinstance(_, Load)]
+
+    # fact saves its return address and `n`, main calls it last
+    assert len(stores) == 2  # noqa: PLR2004
+    assert all(_.dst_addr == sp for _ in stores)
+    assert len([_ for _ in loads if _.src_addr == sp]) == 2  # noqa: PLR2004
+
+
+def test_stack_balanced() -> None:
+    prologue = compiled(source).memory.instr[0]
+    assert isinstance(prologue, Addim)
+    assert isinstance(prologue.rhs, Integer)
+
+    state = evaluated(source)
+    assert state["registers"]["a1"] == 120  # noqa: PLR2004
+    assert state["registers"]["sp"] == prologue.rhs.value
+
+
+def test_allocated() -> None:
+    unit = compiled(source, GraphColoring(4))
+    assert unit.allocation is not None
+    assert unit.allocation.procedures["main"].spilled == 0
+
+
+def test_tail_calls() -> None:
+    source = """
+        (def loop (lambda (n int acc int)
+            (if (eq n 0) acc (self (sum n -1) (sum acc n)))))
+        (loop 1000 0)
+    """
+    unit = compiled(source)
+    written = [_.dst for _ in unit.memory.instr if isinstance(_, Addim)]
+    assert not [_ for _ in unit.memory.instr if isinstance(_, Stor)]
+    assert Register.ra() not in written
+
+    state = evaluated(source)
+    assert state["registers"]["a1"] == 500500  # noqa: PLR2004
@@ -0,0 +1,100 @@
+from functools import partial
+from test.asmik.evaluate import Interpreter, compiled, evaluated
+
+import pytest
+
+from sleepy.asmik import AsmikUnit, Hlt, Integer, Register
+from sleepy.asmik.instruction import movi
+from sleepy.asmik.memory import Memory
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    JitInterpreter,
+    Status,
+)
+
+source = """
+    (def step (lambda (a int b int)
+        (if (lt a b)
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a 7)))))
+    (def x0 (step 1 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    (def x3 (step x2 1))
+    x3
+"""
+
+interpreters = pytest.mark.parametrize(
+    "interpreter",
+    [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(DispatchInterpreter, fuse=False),
+        partial(JitInterpreter, threshold=1),
+        partial(JitInterpreter, fuse=False, threshold=1),
+    ],
+)
+
+
+def retired() -> int:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    interp.run()
+    return interp.retired
+
+
+@interpreters
+def test_retired(interpreter: Interpreter) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+    assert interp.run() == Status.HALTED
+    assert interp.retired == retired()
+
+
+@interpreters
+@pytest.mark.parametrize("fuel", [1, 3, 10])
+def test_resume(interpreter: Interpreter, fuel: int) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+
+    runs = 1
+    while interp.run(max_steps=fuel) == Status.EXHAUSTED:
+        runs += 1
+
+    assert interp.state == evaluated(source)
+    assert interp.retired == retired()
+    assert runs > 1
+    assert interp.run(max_steps=fuel) == Status.HALTED
+
+
+@interpreters
+def test_exhausted(interpreter: Interpreter) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+    assert interp.run(max_steps=0) == Status.EXHAUSTED
+    assert interp.retired == 0
+
+
+@interpreters
+def test_halted(interpreter: Interpreter) -> None:
+    a1 = Register.a1()
+    memory = Memory()
+    memory.instr += [movi(a1, Integer(7)), Hlt(), movi(a1, Integer(8))]
+
+    interp = interpreter()
+    interp.load(AsmikUnit(memory))
+    assert interp.run() == Status.HALTED
+    assert interp.run(max_steps=1) == Status.HALTED
+    assert interp.run() == Status.HALTED
+    assert interp.state["registers"]["a1"] == 7  # noqa: PLR2004
+    assert interp.retired == len(["movi", "hlt"])
+
+
+@interpreters
+def test_negative(interpreter: Interpreter) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+    with pytest.raises(ValueError, match="negative"):
+        interp.run(max_steps=-1)
+    assert interp.run() == Status.HALTED
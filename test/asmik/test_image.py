@@ -0,0 +1,159 @@
+from functools import partial
+from pathlib import Path
+from test.asmik.evaluate import Interpreter, compiled, evaluated
+
+import pytest
+
+from sleepy.asmik import AsmikUnit, Integer, Register
+from sleepy.asmik.argument import VirtualRegister
+from sleepy.asmik.instruction import Addim, Blt, Bne, Brn, Brni, Load, Stor
+from sleepy.asmik.memory import Memory
+from sleepy.core import SleepyError
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    Image,
+    JitInterpreter,
+)
+from sleepy.interpreter.image import ConstantPool, encoded
+
+source = """
+    (def step (lambda (a int b int)
+        (if (or (lt a b) (eq a b))
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a -7)))))
+    (def x0 (step 1 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    x2
+"""
+
+
+def test_roundtrip(tmp_path: Path) -> None:
+    unit = compiled(source)
+    Image.encoded(unit).save(tmp_path / "image")
+
+    image = Image.mapped(tmp_path / "image")
+    assert image.pool == [2**64 - 1]
+    assert image.unit().to_text() == unit.to_text()
+
+
+@pytest.mark.parametrize(
+    "interpreter",
+    [
+        DispatchInterpreter,
+        partial(DispatchInterpreter, fuse=False),
+        partial(JitInterpreter, threshold=1),
+    ],
+)
+def test_load_image(interpreter: Interpreter, tmp_path: Path) -> None:
+    Image.encoded(compiled(source)).save(tmp_path / "image")
+
+    interp = interpreter()
+    assert isinstance(interp, DispatchInterpreter)
+    interp.load_image(Image.mapped(tmp_path / "image"))
+    interp.run()
+
+    assert interp.state == evaluated(source)
+
+
+def test_reference(tmp_path: Path) -> None:
+    Image.encoded(compiled(source)).save(tmp_path / "image")
+
+    interp = AsmikInterpreter()
+    interp.load(Image.mapped(tmp_path / "image").unit())
+    interp.run()
+
+    assert interp.state == evaluated(source)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [0, 1, -1, 2**23 - 1, -(2**23), 2**23, -(2**23) - 1, 2**100],
+)
+def test_immediates(value: int) -> None:
+    pool = ConstantPool()
+    instr = Addim(Register.a1(), Register.ze(), Integer(value))
+    memory = Memory()
+    memory.instr.append(instr)
+
+    image = Image.encoded(AsmikUnit(memory))
+    assert image.unit().memory.instr == [instr]
+    assert encoded(instr, pool) == image.text[0]
+
+
+@pytest.mark.parametrize("offset", [0, 8, -8, 2**23 - 8, -(2**23)])
+def test_offsets(offset: int) -> None:
+    v, ze = VirtualRegister, Register.ze()
+    memory = Memory()
+    memory.instr += [
+        Load(v(1), ze, Integer(offset)),
+        Stor(v(2), v(3), Integer(offset)),
+    ]
+
+    image = Image.encoded(AsmikUnit(memory))
+    assert image.unit().memory.instr == memory.instr
+
+    memory.instr = [Stor(v(2), v(3), Integer(2**23))]
+    with pytest.raises(SleepyError):
+        Image.encoded(AsmikUnit(memory))
+
+
+@pytest.mark.parametrize("target", [0, 4, 2**18 - 4, 2**18, 2**26 - 4, 2**26])
+def test_targets(target: int) -> None:
+    v, label = VirtualRegister, Integer(target)
+    memory = Memory()
+    memory.instr += [
+        Brni(v(1), label),
+        Bne(v(1), v(2), label),
+        Blt(v(1), v(2), label),
+    ]
+
+    image = Image.encoded(AsmikUnit(memory))
+    assert image.unit().memory.instr == memory.instr
+
+    memory.instr = [Brni(v(1), Integer(target + 2))]
+    with pytest.raises(SleepyError):
+        Image.encoded(AsmikUnit(memory))
+
+
+def test_far_code(tmp_path: Path) -> None:
+    ze, a1 = Register.ze(), Register.a1()
+    far = 2**16
+    memory = Memory()
+    memory.instr += [
+        Brni(ze, Integer(far * 4)),
+        Brn(ze, Register.ra()),
+        *(Addim(a1, a1, Integer(1)) for _ in range(far - 2)),
+        Addim(a1, ze, Integer(7)),
+        Bne(a1, ze, Integer(4)),
+    ]
+    Image.encoded(AsmikUnit(memory)).save(tmp_path / "image")
+
+    image = Image.mapped(tmp_path / "image")
+    assert image.unit().memory.instr == memory.instr
+
+    interp = DispatchInterpreter(fuse=False)
+    interp.load_image(image)
+    interp.run()
+    assert interp.retired == 4  # noqa: PLR2004
+    assert interp.state["registers"]["a1"] == 7  # noqa: PLR2004
+
+
+def test_errors(tmp_path: Path) -> None:
+    memory = Memory()
+    memory.instr.append(
+        Addim(VirtualRegister(2**16), Register.ze(), Integer(1)),
+    )
+    with pytest.raises(SleepyError):
+        Image.encoded(AsmikUnit(memory))
+
+    path = tmp_path / "image"
+    path.write_bytes(bytes(64))
+    with pytest.raises(SleepyError):
+        Image.mapped(path)
+
+    memory = Memory()
+    memory.instr.append(Addim(Register.ze(), Register.ze(), Integer(1)))
+    with pytest.raises(SleepyError):
+        DispatchInterpreter().load_image(Image.encoded(AsmikUnit(memory)))
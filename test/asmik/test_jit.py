@@ -0,0 +1,40 @@
+from test.asmik.evaluate import compiled, evaluated
+
+from sleepy.interpreter import AsmikInterpreter, JitInterpreter
+
+source = """
+    (def step (lambda (a int b int)
+        (if (lt a b)
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a 7)))))
+    (def x0 (step 1 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    (def x3 (step x2 1))
+    (def x4 (step x3 5))
+    (def x5 (step x4 1))
+    x5
+"""
+
+
+def test_traces() -> None:
+    unit = compiled(source)
+
+    interp = JitInterpreter(threshold=2)
+    interp.load(unit)
+    interp.run()
+
+    assert interp.state == evaluated(source, AsmikInterpreter)
+    assert interp.jit.compiled > 0
+    assert interp.jit.entered > 0
+    assert interp.jit.exited > 0
+
+    compiled_before = interp.jit.compiled
+
+    interp.load(unit)
+    interp.run()
+
+    assert interp.state == evaluated(source, AsmikInterpreter)
+    assert interp.jit.compiled == 0
+    assert interp.jit.entered > 0
+    assert len(interp.traces) == compiled_before
@@ -0,0 +1,59 @@
+from functools import partial
+from pathlib import Path
+from test.asmik.evaluate import Interpreter, compiled
+
+import pytest
+
+from sleepy.interpreter import AsmikInterpreter, DispatchInterpreter
+from sleepy.interpreter.memory import DataMemory
+
+
+@pytest.mark.parametrize(
+    ("addr", "value"),
+    [
+        (0, 1),
+        (8, -1),
+        (16, 2**63 - 1),
+        (24, -(2**63)),
+        (32, 2**64 - 1),
+        (40, -(2**100)),
+        (3, 5),
+        (-8, 6),
+        (2**40, 7),
+    ],
+)
+def test_store_load(addr: int, value: int) -> None:
+    memory = DataMemory.allocated(8)
+    memory.store(addr, value)
+    assert memory.load(addr) == value
+
+
+def test_narrow_overwrites_wide() -> None:
+    memory = DataMemory.allocated(8)
+    memory.store(0, 2**64)
+    memory.store(0, 1)
+    assert memory.load(0) == 1
+
+
+def test_far_unknown() -> None:
+    memory = DataMemory.allocated(8)
+    with pytest.raises(KeyError):
+        memory.load(2**40)
+
+
+def test_mapped(tmp_path: Path) -> None:
+    size = 1 << 16
+    memory = DataMemory.mapped(tmp_path / "memory", size)
+    memory.store(8 * (size - 1), size)
+    memory.store(16, 2**64)
+    assert memory.load(8 * (size - 1)) == size
+    assert memory.load(16) == 2**64
+    assert memory.sparse == {}
+
+
+@pytest.mark.parametrize("interpreter", [AsmikInterpreter, DispatchInterpreter])
+def test_mapped_interpreter(tmp_path: Path, interpreter: Interpreter) -> None:
+    interp = interpreter(memory=partial(DataMemory.mapped, tmp_path / "memory"))
+    interp.load(compiled("(sum 2131 (mul 2 3))"))
+    interp.run()
+    assert str(interp.state["registers"]["a1"]) == "2137"
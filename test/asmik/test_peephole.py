@@ -0,0 +1,99 @@
+from test.asmik.evaluate import compiled, evaluate
+from test.tafka.emit import tafka_emit
+
+from sleepy.asmik import AsmikUnit
+from sleepy.asmik.argument import (
+    IMMEDIATE,
+    Integer,
+    Register,
+    Unassigned,
+    VirtualRegister,
+)
+from sleepy.asmik.emit import AsmikEmitListener
+from sleepy.asmik.instruction import (
+    Addi,
+    Bne,
+    Brni,
+    Instruction,
+    Load,
+    Stor,
+    mov,
+)
+from sleepy.asmik.peephole import Peephole
+
+v = [VirtualRegister(number) for number in range(8)]
+ze = Register.ze()
+
+
+def optimized(code: list[Instruction], **labels: int) -> AsmikEmitListener:
+    asmik = AsmikEmitListener()
+    asmik.memory.instr = code
+    asmik.resolved = {label: i * 4 for label, i in labels.items()}
+    Peephole(asmik).optimize()
+    return asmik
+
+
+def test_self_move() -> None:
+    asmik = optimized([mov(v[0], v[0]), mov(v[1], v[0])], end=2)
+    assert asmik.memory.instr == [mov(v[1], v[0])]
+    assert asmik.resolved == {"end": 4}
+
+
+def test_branch_to_next() -> None:
+    code = [
+        Bne(v[0], v[1], Unassigned("next")),
+        Brni(ze, Unassigned("next")),
+        Brni(v[0], Unassigned("far")),
+        mov(v[2], v[1]),
+    ]
+    asmik = optimized(code, next=2, far=0)
+    assert asmik.memory.instr == code[2:]
+    assert asmik.resolved == {"next": 0, "far": 0}
+
+
+def test_move_back() -> None:
+    ra = Register.ra()
+    asmik = optimized([mov(ra, v[0]), mov(v[0], ra)])
+    assert asmik.memory.instr == [mov(ra, v[0])]
+
+
+def test_constant_reload() -> None:
+    code = [
+        Load(v[0], ze, Integer(8)),
+        Load(v[1], ze, Integer(8)),
+        Load(v[0], ze, Integer(8)),
+        Addi(v[2], v[0], v[1]),
+        Load(v[3], ze, Integer(8)),
+        Load(v[4], v[0], Integer(8)),
+    ]
+    asmik = optimized(code, block=4)
+    assert asmik.memory.instr == [
+        code[0],
+        mov(v[1], v[0]),
+        *code[3:],
+    ]
+    assert asmik.resolved == {"block": 12}
+
+
+def test_constant_stored() -> None:
+    code = [
+        Load(v[0], ze, Integer(8)),
+        Stor(v[4], v[5]),
+        Load(v[1], ze, Integer(8)),
+    ]
+    assert optimized(code).memory.instr == code
+
+
+def test_stats() -> None:
+    wide = 1 << IMMEDIATE
+    source = f"(if (eq {wide} {wide}) (if (eq {wide} 2) 1 2) 3)"
+    plain = AsmikUnit.emited_from(tafka_emit(source), peephole=False)
+    unit = compiled(source)
+
+    assert unit.peephole["branch to next"] > 0
+    assert unit.peephole["constant reload"] > 0
+    assert len(unit.memory.instr) < len(plain.memory.instr)
+    assert len(plain.memory.instr) - len(unit.memory.instr) == (
+        unit.peephole["branch to next"]
+    )
+    assert evaluate(source) == "2"
@@ -0,0 +1,89 @@
+from test.asmik.evaluate import compiled, evaluated
+
+import pytest
+
+from sleepy.asmik import (
+    Addi,
+    Addim,
+    AsmikUnit,
+    Brn,
+    Integer,
+    IntegerData,
+    Load,
+    Register,
+)
+from sleepy.asmik.argument import VirtualRegister
+from sleepy.asmik.memory import Memory
+from sleepy.interpreter import AsmikInterpreter, Pipeline, Stall, Status
+
+source = """
+    (def f (lambda (n int) (if (eq n 1) n (sum n 1))))
+    (def a (f 1))
+    (def b (f 2))
+    (f 3)
+"""
+
+
+def hazards() -> AsmikUnit:
+    v = VirtualRegister
+    memory = Memory()
+    memory.data_put(IntegerData(5))
+    memory.instr.extend(
+        [
+            Addim(v(1), Register.ze(), Integer(0)),
+            Load(v(2), v(1)),
+            Addi(v(3), v(2), v(2)),
+            Addi(v(4), v(3), v(3)),
+            Brn(Register.ze(), Register.ra()),
+        ],
+    )
+    return AsmikUnit(memory)
+
+
+@pytest.mark.parametrize(
+    ("forwarding", "cycles", "stalls"),
+    [
+        (True, 12, {Stall.RAW: 0, Stall.LOAD_USE: 1, Stall.BRANCH: 2}),
+        (False, 17, {Stall.RAW: 4, Stall.LOAD_USE: 2, Stall.BRANCH: 2}),
+    ],
+)
+def test_stalls(
+    forwarding: bool,  # noqa: FBT001
+    cycles: int,
+    stalls: dict[Stall, int],
+) -> None:
+    pipeline = Pipeline(forwarding=forwarding)
+    interp = AsmikInterpreter()
+    interp.load(hazards())
+    interp.run_timed(pipeline)
+
+    assert pipeline.instructions == 5  # noqa: PLR2004
+    assert pipeline.cycles == cycles
+    assert pipeline.stalls == stalls
+
+
+def test_run_timed() -> None:
+    unit = compiled(source)
+
+    forwarded = Pipeline()
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    while interp.run_timed(forwarded, max_steps=16) != Status.HALTED:
+        pass
+    assert interp.state == evaluated(source)
+    assert forwarded.instructions == interp.retired
+
+    stalled = Pipeline(forwarding=False, penalty=3)
+    interp.load(unit)
+    interp.run_timed(stalled)
+
+    assert forwarded.cycles < stalled.cycles
+    assert stalled.cycles == (
+        Pipeline.FILL
+        + stalled.instructions
+        + sum(stalled.stalls.values())
+        + Pipeline.DRAIN
+    )
+    assert stalled.cpi > forwarded.cpi > 1
+    assert stalled.to_text().startswith(f"cycles {stalled.cycles}, ")
+    assert "stall load-use: " in stalled.to_text()
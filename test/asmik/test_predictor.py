@@ -0,0 +1,137 @@
+from test.asmik.evaluate import compiled, evaluated
+
+import pytest
+
+from sleepy.core import SleepyError
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    Bimodal,
+    Gshare,
+    NotTaken,
+    Pipeline,
+    Prediction,
+    Predictor,
+    ReturnStack,
+    Stall,
+    Status,
+)
+from sleepy.interpreter.predictor import CALL, JUMP, RETURN
+
+source = """
+    (def f (lambda (n int) (if (lt n 5) n (rem n 5))))
+    (def a (f 1))
+    (def b (f 2))
+    (def c (f 7))
+    (def d (f 3))
+    (def e (f 4))
+    (sum a (sum b (sum c (sum d e))))
+"""
+
+
+def predicted(prediction: Prediction) -> AsmikInterpreter:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    assert interp.run_predicted(prediction) == Status.HALTED
+    return interp
+
+
+@pytest.mark.parametrize("predictor", [Bimodal(4), Gshare(4)])
+def test_counters(predictor: Predictor) -> None:
+    # gshare needs the history to settle
+    for _ in range(8):
+        predictor.update(8, taken=True)
+    assert predictor.predicted(8)
+
+    for _ in range(8):
+        predictor.update(8, taken=False)
+    assert not predictor.predicted(8)
+
+
+def test_return_stack() -> None:
+    stack = ReturnStack(2)
+    for addr in (4, 8, 12):
+        stack.push(addr)
+    assert [stack.pop() for _ in range(3)] == [12, 8, -1]
+
+    with pytest.raises(SleepyError):
+        ReturnStack(0)
+
+
+def test_run_predicted() -> None:
+    unit = compiled(source)
+    prediction = Prediction(Gshare(), ReturnStack())
+    interp = predicted(prediction)
+    assert interp.state == evaluated(source)
+
+    reference = AsmikInterpreter()
+    reference.load(unit)
+    reference.run_profiled()
+    opcodes = reference.profile.opcodes(unit)
+    branches = ["brn", "brni", "bne", "blt"]
+    assert sum(prediction.executed) == sum(opcodes.get(m, 0) for m in branches)
+
+    # main returns to the stop address that was never called
+    rates = prediction.addresses()
+    returns = [
+        addr
+        for addr in rates
+        if prediction.kinds[addr // 4] == RETURN
+        and addr > min(unit.procedures.values())
+    ]
+    assert returns
+    assert all(rates[addr] == 0 for addr in returns)
+    assert set(prediction.procedures(unit)) == {"main", *unit.procedures}
+
+    text = prediction.to_text(unit)
+    assert text.startswith(f"branches {sum(prediction.executed)}, ")
+    assert "prediction procedure\nmain: " in text
+
+
+def test_return_stack_helps() -> None:
+    static = Prediction(NotTaken())
+    stacked = Prediction(NotTaken(), ReturnStack())
+    predicted(static)
+    predicted(stacked)
+    assert stacked.rate < static.rate
+
+
+def test_pipeline_penalty() -> None:
+    prediction = Prediction(Bimodal(), ReturnStack())
+    pipeline = Pipeline(prediction=prediction, penalty=3)
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    interp.run_timed(pipeline)
+
+    assert pipeline.stalls[Stall.BRANCH] == 3 * sum(prediction.missed)
+
+
+def test_tail_calls() -> None:
+    source = """
+        (def g (lambda (n int) (sum n 1)))
+        (def loop (lambda (n int acc int)
+            (if (eq n 0) acc (self (sum n -1) (g acc)))))
+        (def a (loop 5 0))
+        (sum a (loop 3 a))
+    """
+    unit = compiled(source)
+    prediction = Prediction(Gshare(), ReturnStack())
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    assert interp.run_predicted(prediction) == Status.HALTED
+    assert interp.state == evaluated(source)
+
+    # restoring `ra` right before the tail call does not make it a call
+    loop = unit.procedures["$1: (int, int) -> int"] // 4
+    kinds = [prediction.kinds[i] for i in range(loop, len(unit.memory.instr))]
+    assert kinds.count(CALL) == 1
+    assert JUMP in kinds
+
+    rates = prediction.addresses()
+    returns = [
+        addr
+        for addr in rates
+        if prediction.kinds[addr // 4] == RETURN
+        and addr > min(unit.procedures.values())
+    ]
+    assert returns
+    assert all(rates[addr] == 0 for addr in returns)
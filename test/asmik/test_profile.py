@@ -0,0 +1,96 @@
+from test.asmik.evaluate import compiled, evaluated
+
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    Gshare,
+    Observers,
+    Prediction,
+    Status,
+)
+from sleepy.interpreter.observer import Predicting, Profiling
+
+source = """
+    (def f (lambda (n int) (if (eq n 1) n (sum n 1))))
+    (def a (f 1))
+    (def b (f 2))
+    (f 3)
+"""
+
+
+def profiled() -> AsmikInterpreter:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    assert interp.run_profiled() == Status.HALTED
+    return interp
+
+
+def test_counts() -> None:
+    interp = profiled()
+    unit = compiled(source)
+    profile = interp.profile
+
+    assert interp.state == evaluated(source)
+    assert sum(profile.executed) == interp.retired
+
+    (entry,) = unit.procedures.values()
+    assert profile.executed[entry // 4] == 3  # noqa: PLR2004
+    assert profile.executed[0] == 1
+
+    opcodes = profile.opcodes(unit)
+    branches = sum(profile.taken.values()) + sum(profile.skipped.values())
+    assert branches == opcodes["brn"] + opcodes["brni"] + opcodes["bne"]
+    assert sum(profile.skipped.values()) == 1
+
+
+def test_aggregated() -> None:
+    interp = profiled()
+    unit = compiled(source)
+    profile = interp.profile
+
+    procedures = profile.procedures(unit)
+    assert set(procedures) == {"main", *unit.procedures}
+    assert sum(procedures.values()) == interp.retired
+
+    blocks = profile.blocks(unit)
+    assert set(unit.blocks) <= set(blocks)
+    assert sum(blocks.values()) == interp.retired
+
+    assert sum(profile.opcodes(unit).values()) == interp.retired
+
+
+def test_to_text() -> None:
+    interp = profiled()
+    unit = compiled(source)
+    text = interp.profile.to_text(unit)
+
+    assert text.startswith("profile instr\n0000: addim sp, ze, 0")
+    assert "bne v6, v7, 108                     3, taken 2, not taken 1" in text
+    assert "profile opcode\naddim: 30\n" in text
+    assert "profile procedure\n" in text
+    assert "profile block\n" in text
+
+
+def test_resumed() -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    while interp.run_profiled(max_steps=7) == Status.EXHAUSTED:
+        pass
+    assert sum(interp.profile.executed) == interp.retired
+    assert interp.state == evaluated(source)
+
+
+def test_observers() -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    prediction = Prediction(Gshare())
+    prediction.attach(interp.code)
+    profiling = Profiling(interp.profile, interp.code)
+    observers = Observers(profiling, Predicting(prediction))
+    assert interp.observed(observers) == Status.HALTED
+
+    profile = profiled().profile
+    assert interp.profile.executed == profile.executed
+    assert interp.profile.taken == profile.taken
+    assert sum(prediction.executed) == sum(profile.taken.values()) + sum(
+        profile.skipped.values(),
+    )
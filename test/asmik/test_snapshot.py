@@ -0,0 +1,141 @@
+from functools import partial
+from pathlib import Path
+from test.asmik.evaluate import Interpreter, compiled, evaluated
+
+import pytest
+
+from sleepy.core import SleepyError
+from sleepy.interpreter import (
+    AsmikInterpreter,
+    DispatchInterpreter,
+    JitInterpreter,
+    Snapshot,
+    Status,
+)
+from sleepy.interpreter.memory import DataMemory
+
+source = """
+    (def step (lambda (a int b int)
+        (if (lt a b)
+            (sum (mul a 3) b)
+            (if (eq (rem a 2) 0) (div a 2) (rem a 7)))))
+    (def x0 (step 1 2))
+    (def x1 (step x0 3))
+    (def x2 (step x1 4))
+    x2
+"""
+
+interpreters = pytest.mark.parametrize(
+    "interpreter",
+    [
+        AsmikInterpreter,
+        DispatchInterpreter,
+        partial(JitInterpreter, threshold=1),
+    ],
+)
+
+
+@interpreters
+def test_restore(interpreter: Interpreter) -> None:
+    interp = interpreter()
+    interp.load(compiled(source))
+    assert interp.run(max_steps=20) == Status.EXHAUSTED
+
+    snapshot = interp.snapshot()
+    assert not interp.memory.dirty
+    interp.run()
+    assert interp.state == evaluated(source)
+    assert interp.memory.dirty
+    retired = interp.retired
+
+    interp.restore(snapshot)
+    assert interp.retired == snapshot.retired >= 20  # noqa: PLR2004
+    assert interp.run() == Status.HALTED
+    assert interp.state == evaluated(source)
+    assert interp.retired == retired
+
+
+@interpreters
+def test_fork(interpreter: Interpreter, tmp_path: Path) -> None:
+    warm = interpreter()
+    warm.load(compiled(source))
+    warm.run(max_steps=20)
+    warm.snapshot().save(tmp_path / "snapshot")
+    warm.run()
+
+    snapshot = Snapshot.loaded(tmp_path / "snapshot")
+    for _ in range(2):
+        fork = interpreter()
+        fork.load(compiled(source))
+        fork.restore(snapshot)
+        assert fork.run() == Status.HALTED
+        assert fork.state == evaluated(source)
+        assert fork.retired == warm.retired
+
+
+def test_copy_on_write() -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+
+    value, far = interp.memory.load(0), 3
+    first = interp.snapshot()
+    interp.memory.store(0, 2**64 - 1)
+    interp.memory.store(far, 5)
+    second = interp.snapshot()
+
+    assert second.pages[0] is not first.pages[0]
+    shared = zip(second.pages[1:], first.pages[1:], strict=True)
+    assert all(page is previous for page, previous in shared)
+
+    interp.restore(first)
+    assert interp.memory.load(0) == value
+    assert far not in interp.memory.sparse
+
+    interp.restore(second)
+    assert interp.memory.load(0) == 2**64 - 1
+    assert interp.memory.load(far) == 5  # noqa: PLR2004
+
+
+def test_dirty_pages() -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    first = interp.snapshot()
+
+    # a write past the store is not seen, as clean pages are not read
+    words = len(interp.memory.words)
+    interp.memory.words[words - 1] = 7
+    interp.memory.store(0, 1)
+    second = interp.snapshot()
+
+    assert second.pages[0] != first.pages[0]
+    assert second.pages[-1] is first.pages[-1]
+
+
+def test_profile(tmp_path: Path) -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled(source))
+    interp.run_profiled(max_steps=20)
+    interp.snapshot().save(tmp_path / "snapshot")
+    interp.run_profiled()
+    executed = list(interp.profile.executed)
+    taken = dict(interp.profile.taken)
+
+    interp.restore(Snapshot.loaded(tmp_path / "snapshot"))
+    assert sum(interp.profile.executed) == interp.retired == 20  # noqa: PLR2004
+    interp.run_profiled()
+    assert interp.profile.executed == executed
+    assert interp.profile.taken == taken
+
+
+def test_mismatch() -> None:
+    interp = AsmikInterpreter()
+    interp.load(compiled("1"))
+    snapshot = interp.snapshot()
+
+    def larger(_: int) -> DataMemory:
+        return DataMemory.allocated(2 * DataMemory.CAPACITY)
+
+    other = AsmikInterpreter(memory=larger)
+    other.load(compiled("1"))
+    with pytest.raises(SleepyError):
+        other.restore(snapshot)
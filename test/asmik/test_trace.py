@@ -0,0 +1,68 @@
+from pathlib import Path
+from test.asmik.evaluate import compiled, evaluated
+
+from sleepy.interpreter import AsmikInterpreter, Status
+from sleepy.interpreter.decode import Opcode
+from sleepy.interpreter.trace import FileTrace, RingTrace, records, to_text
+
+source = """
+    (def f (lambda (n int) (if (eq n 1) n (sum n 1))))
+    (def a (f 1))
+    (f 3)
+"""
+
+
+def test_file(tmp_path: Path) -> None:
+    path = tmp_path / "trace"
+    unit = compiled(source)
+
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    with FileTrace(path, every=4) as trace:
+        assert interp.run_traced(trace) == Status.HALTED
+
+    assert interp.state == evaluated(source)
+
+    window = records(path)
+    assert len(window) == interp.retired
+    assert [record.ip for record in window[:3]] == [0, 4, 8]
+    assert window[4].opcode == Opcode.STOR
+    assert window[4].addr == 0
+    assert window[3].addr is None
+    assert window[-1].opcode == Opcode.BRN
+    assert window[-1].value == AsmikInterpreter.STOP
+
+    text = to_text(records(path, 4, 1), unit)
+    assert text.startswith("0016: stor sp, v8")
+    assert text.endswith(f"@ {window[4].addr:04d}\n")
+
+
+def test_ring(tmp_path: Path) -> None:
+    path = tmp_path / "trace"
+    unit = compiled(source)
+
+    full = AsmikInterpreter()
+    full.load(unit)
+    with FileTrace(tmp_path / "full") as trace:
+        full.run_traced(trace)
+
+    interp = AsmikInterpreter()
+    interp.load(unit)
+    with RingTrace(path, capacity=16) as trace:
+        while interp.run_traced(trace, max_steps=5) == Status.EXHAUSTED:
+            pass
+
+    assert path.stat().st_size < 16 * 32 + 64
+    assert records(path) == records(tmp_path / "full")[-16:]
+    assert records(path, 14, 8) == records(tmp_path / "full")[-2:]
+
+
+def test_wide_values(tmp_path: Path) -> None:
+    path = tmp_path / "trace"
+
+    interp = AsmikInterpreter()
+    interp.load(compiled("(eq 1 2)"))
+    with FileTrace(path) as trace:
+        interp.run_traced(trace)
+
+    assert -1 in [record.value for record in records(path)]
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+from sleepy.interpreter import Status
+from sleepy.tool.driver import Timings, executed, executed_all
+
+programs = {
+    "sum.sleepy": ("(sum 2 2)", 4),
+    "call.sleepy": ("(def id (lambda (n int) n)) (id 11)", 11),
+    "if.sleepy": ("(if (eq 1 2) 6 9)", 9),
+}
+
+wide = """
+    (def f (lambda (a int b int c int d int e int g int h int) a))
+    (f 1 2 3 4 5 6 7)
+"""
+
+
+def written(tmp_path: Path) -> list[Path]:
+    paths = []
+    for name, (source, _) in programs.items():
+        path = tmp_path / name
+        path.write_text(source)
+        paths.append(path)
+    return paths
+
+
+def test_executed(tmp_path: Path) -> None:
+    for path in written(tmp_path):
+        result = executed(path)
+        assert result.error is None
+        assert result.status == Status.HALTED
+        assert result.state is not None
+        assert result.state["registers"]["a1"] == programs[path.name][1]
+        assert set(result.timings) == {
+            "read",
+            "parse",
+            "program",
+            "tafka",
+            "asmik",
+            "run",
+        }
+
+
+def test_executed_error(tmp_path: Path) -> None:
+    path = tmp_path / "broken.sleepy"
+    path.write_text("(sum 2")
+
+    result = executed(path)
+    assert result.state is None
+    assert result.error is not None
+    assert "parse" in result.timings
+    assert "run" not in result.timings
+
+
+def test_executed_unsupported(tmp_path: Path) -> None:
+    path = tmp_path / "wide.sleepy"
+    path.write_text(wide)
+
+    result = executed(path)
+    assert result.state is None
+    assert result.error is not None
+    assert result.error.startswith("NotImplementedError")
+
+
+def test_executed_exhausted(tmp_path: Path) -> None:
+    path = tmp_path / "sum.sleepy"
+    path.write_text("(sum 2 2)")
+
+    result = executed(path, max_steps=1)
+    assert result.status == Status.EXHAUSTED
+
+
+def test_executed_all(tmp_path: Path) -> None:
+    paths = written(tmp_path)
+
+    timings = Timings()
+    results = {}
+    for result in executed_all(paths, workers=2):
+        timings.add(result)
+        results[result.path.name] = result
+
+    assert set(results) == set(programs)
+    for name, (_, expected) in programs.items():
+        state = results[name].state
+        assert state is not None
+        assert state["registers"]["a1"] == expected
+
+    assert timings.programs == len(programs)
+    assert timings.failed == 0
+    assert timings.stages["parse"] > 0
+    assert timings.to_text().startswith("programs 3, failed 0\n")
+
+
+def test_executed_all_failed(tmp_path: Path) -> None:
+    failing = {"wide.sleepy": wide, "broken.sleepy": "(sum 2"}
+    paths = written(tmp_path)
+    for name, source in failing.items():
+        paths.append(tmp_path / name)
+        paths[-1].write_text(source)
+
+    timings = Timings()
+    results = {}
+    for result in executed_all(paths, workers=2):
+        timings.add(result)
+        results[result.path.name] = result
+
+    for name in failing:
+        assert results[name].error is not None
+    for name, (_, expected) in programs.items():
+        state = results[name].state
+        assert state is not None
+        assert state["registers"]["a1"] == expected
+
+    assert timings.programs == len(programs) + len(failing)
+    assert timings.failed == len(failing)